@@ -1,9 +1,7 @@
 # agents/assessor.py
-import json
 import sys
 from pathlib import Path
 from pydantic import BaseModel
-from gigachat import GigaChat
 import os
 from dotenv import load_dotenv
 from typing import List, Dict, Optional
@@ -11,9 +9,18 @@ from typing import List, Dict, Optional
 # Добавляем путь для импорта RAG
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
+from llm.registry import get_gigachat
+from llm.gateway import complete, acomplete
+from llm.scheduler import Priority
+from llm.deadline import latency_budget, run_rag
+from llm.json_parser import extract_json, parse_model
+from llm.structured import function_for
+from rag.context import assemble_context, token_budget
+from prompts.templates import PROMPTS
+
 # Импортируем RAG (с обработкой ошибок)
 try:
-    from rag.retriever import retrieve_context
+    from rag.retriever import retrieve_context, retrieve_many
 
     RAG_AVAILABLE = True
 except ImportError:
@@ -24,6 +31,10 @@ except ImportError:
     def retrieve_context(query: str, k: int = 4) -> List[str]:
         return []
 
+
+    def retrieve_many(queries: List[str], k=3, filters=None) -> List[List[str]]:
+        return [[] for _ in queries]
+
 # Загружаем токен из .env
 load_dotenv()
 
@@ -39,79 +50,27 @@ class AssessResult(BaseModel):
     context_used: Optional[bool] = False
 
 
+# Схема для структурированного ответа (LLM_STRUCTURED_OUTPUT)
+ASSESS_FUNCTION = function_for(AssessResult, "submit_assessment", "Оценка знаний пользователя", fields={
+    "scores": "Баллы 0-100: theory, practice, interview_readiness",
+    "weak_topics": "Конкретные слабые темы",
+    "follow_up": "Уточняющий вопрос для следующего шага",
+    "feedback": "Разбор: что уже ок, что мешает собеседованиям и что делать дальше",
+})
+
+
 # ===============================
 #  Основной класс агента с RAG
 # ===============================
 class AssessorAgent:
     def __init__(self, use_rag: bool = True):
-        self.llm = GigaChat(
-            credentials=os.getenv("GIGACHAT_CLIENT_SECRET"),
-            verify_ssl_certs=False,
-            model="GigaChat"
-        )
+        # Общий на процесс клиент: один пул соединений и один токен на модель
+        self.llm = get_gigachat()
         self.use_rag = use_rag and RAG_AVAILABLE
 
-        # Сохраняем оригинальные промпты
-        self.prompt_without_rag = """
-        Ты — эксперт по техническим собеседованиям и оценке знаний.
-
-        Темы для оценки: {topics}
-
-        Ответ пользователя: {answer}
-
-        Всегда:
-        - давай явный вердикт по готовности к собеседованиям;
-        - объясняй, что означают выставленные баллы и какие темы проседают;
-        - предлагай конкретные следующие шаги.
-
-        Даже если запрос сформулирован общо, всё равно сделай разумное предположение и дай вердикт по готовности.
-
-        Верни строго JSON:
-        {{
-          "scores": {{
-            "theory": int,            # теоретическая база (0-100)
-            "practice": int,          # практический опыт (0-100)
-            "interview_readiness": int # готовность к собеседованию (0-100)
-          }},
-          "weak_topics": ["конкретные слабые темы"],
-          "follow_up": "уточняющий вопрос для следующего шага",
-          "feedback": "конструктивный разбор: что уже ок, что мешает собеседованиям и что делать дальше"
-        }}
-        """
-
-        self.prompt_with_rag = """
-        Ты — эксперт по техническим собеседованиям. Используй информацию из базы знаний, но не цитируй её дословно.
-
-        КОНТЕКСТ ПОЛЬЗОВАТЕЛЯ:
-        - Уровень: {level}
-        - Направление: {track}
-        - Текущий вопрос: {question}
-
-        КОНТЕКСТ ИЗ БАЗЫ ЗНАНИЙ (примеры вопросов и тем):
-        {rag_context}
-
-        Темы для оценки: {topics}
-
-        Ответ пользователя: {answer}
-
-        Всегда:
-        - давай явный вердикт по готовности к собеседованиям;
-        - используй контекст только как подсказку, но отвечай применительно к пользователю;
-        - объясняй, что означают выставленные баллы и какие темы проседают;
-        - предлагай конкретные следующие шаги.
-
-        Верни строго JSON:
-        {{
-          "scores": {{
-            "theory": int,            # теоретическая база (0-100)
-            "practice": int,          # практический опыт (0-100)
-            "interview_readiness": int # готовность к собеседованию (0-100)
-          }},
-          "weak_topics": ["конкретные слабые темы"],
-          "follow_up": "уточняющий вопрос для следующего шага",
-          "feedback": "конструктивный разбор: что уже ок, что мешает собеседованиям и что делать дальше"
-        }}
-        """
+        # Промпты из общего реестра (скомпилированы один раз)
+        self.prompt_without_rag = PROMPTS.get("assessor.assess")
+        self.prompt_with_rag = PROMPTS.get("assessor.assess_rag")
 
     def _get_rag_context(self, topics: List[str], answer: str) -> Dict[str, str]:
         """Получает контекст из RAG базы знаний (оригинальная функция)"""
@@ -119,15 +78,12 @@ class AssessorAgent:
             return {"context": "", "example_topics": ""}
 
         try:
-            # Поиск по темам
-            query = f"{' '.join(topics)} техническое собеседование оценка ответов"
-            context_chunks = retrieve_context(query, k=3)
-
-            # Поиск по ответу пользователя
+            # Поиск по темам и (для содержательного ответа) по ответу - одним запросом
+            queries = [f"{' '.join(topics)} техническое собеседование оценка ответов"]
             if answer and len(answer) > 10:
-                answer_query = f"ответ на вопрос о {topics[0] if topics else 'программировании'}"
-                answer_context = retrieve_context(answer_query, k=1)
-                context_chunks.extend(answer_context)
+                queries.append(f"ответ на вопрос о {topics[0] if topics else 'программировании'}")
+            found = retrieve_many(queries, k=[3, 1][:len(queries)])
+            context_chunks = [chunk for chunks in found for chunk in chunks]
 
             # Извлекаем темы из контекста для примера
             example_topics = []
@@ -141,7 +97,7 @@ class AssessorAgent:
                         example_topics.append("Базы данных")
 
             return {
-                "context": "\n".join([f"- {chunk[:300]}..." for chunk in context_chunks]),
+                "context": assemble_context(context_chunks, token_budget("assessor", "assess")),
                 "example_topics": ", ".join(set(example_topics)) if example_topics else "нет примеров"
             }
 
@@ -149,20 +105,13 @@ class AssessorAgent:
             print(f"⚠️  Ошибка RAG в Assessor: {e}")
             return {"context": "", "example_topics": ""}
 
-    def assess(self, answer: str, topics: list, user_context: dict = None) -> AssessResult:
-        """Оценивает ответ пользователя с использованием RAG (улучшенная)"""
-
-        # Устанавливаем контекст по умолчанию
-        if user_context is None:
-            user_context = {}
-
+    def _build_assess_prompt(self, answer: str, topics: list, user_context: dict,
+                             rag_context: Dict[str, str]) -> tuple:
+        """Выбирает и заполняет промпт, возвращает (text, context_used)"""
         level = user_context.get('level', 'junior')
         track = user_context.get('track', 'general')
         question = user_context.get('current_question', 'Общие знания')
 
-        # Получаем контекст из RAG
-        rag_context = self._get_rag_context(topics, answer)
-
         # Выбираем промпт в зависимости от наличия RAG
         if self.use_rag and rag_context["context"]:
             text = self.prompt_with_rag.format(
@@ -173,159 +122,182 @@ class AssessorAgent:
                 topics=topics,
                 answer=answer
             )
-            context_used = True
-        else:
-            text = self.prompt_without_rag.format(
-                topics=topics,
-                answer=answer
-            )
-            context_used = False
+            return text, True
 
-        # Отправляем в GigaChat
+        text = self.prompt_without_rag.format(
+            topics=topics,
+            answer=answer
+        )
+        return text, False
+
+    def _parse_assess(self, content: str, context_used: bool = False) -> AssessResult:
+        """Разбирает ответ модели в AssessResult (ValueError - не разобрался)"""
+        return parse_model(
+            content, AssessResult,
+            defaults={"scores": {}, "weak_topics": [], "follow_up": "", "feedback": ""},
+            context_used=context_used
+        )
+
+    def _parse_assess_response(self, content: str, topics: list, context_used: bool) -> AssessResult:
+        """Разбирает ответ модели; при ошибке JSON возвращает fallback оценку"""
         try:
-            response = self.llm.chat(text)
+            return self._parse_assess(content, context_used)
 
-            content = response.choices[0].message.content
+        except ValueError as e:  # в т.ч. ValidationError pydantic
+            print(f"❌ Ошибка парсинга JSON: {e}")
+            print(f"Ответ модели: {content[:200]}...")
+            return self._fallback_assess_result(topics, context_used)
+
+    def _fallback_assess_result(self, topics: list, context_used: bool) -> AssessResult:
+        """Оценка по умолчанию, если ответ модели не удалось разобрать"""
+        return AssessResult(
+            scores={
+                "theory": 60,
+                "practice": 60,
+                "interview_readiness": 60
+            },
+            weak_topics=topics[:2] if topics else ["алгоритмы", "системный дизайн"],
+            follow_up="Расскажите, какие задачи вы уже решали на собеседованиях или в проектах?",
+            feedback=(
+                "Ответ выглядит в целом неплохо, чтобы начинать пробовать собеседования, "
+                "но для более точной оценки лучше пройти полноценный тест через команду /assess."
+            ),
+            context_used=context_used
+        )
 
-            # Чистим JSON от возможных меток кода
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.strip("`").strip()
+    def _error_assess_result(self) -> AssessResult:
+        """Оценка на случай технической ошибки"""
+        return AssessResult(
+            scores={
+                "theory": 50,
+                "practice": 50,
+                "interview_readiness": 50
+            },
+            weak_topics=["технические вопросы", "алгоритмы"],
+            follow_up="Хочется ли вам сейчас получить подробный план подготовки или пройти мини‑тест?",
+            feedback=(
+                "Произошла техническая ошибка при анализе ответа. "
+                "Попробуйте ещё раз или воспользуйтесь командой /assess."
+            ),
+            context_used=False
+        )
 
-            data = json.loads(content)
+    @latency_budget("assessor", "assess")
+    def assess(self, answer: str, topics: list, user_context: dict = None) -> AssessResult:
+        """Оценивает ответ пользователя с использованием RAG (улучшенная)"""
 
-            return AssessResult(
-                scores=data.get("scores", {}),
-                weak_topics=data.get("weak_topics", []),
-                follow_up=data.get("follow_up", ""),
-                feedback=data.get("feedback", ""),
-                context_used=context_used
-            )
+        # Устанавливаем контекст по умолчанию
+        if user_context is None:
+            user_context = {}
 
-        except json.JSONDecodeError as e:
-            print(f"❌ Ошибка парсинга JSON: {e}")
-            print(f"Ответ модели: {content[:200] if 'content' in locals() else 'Нет ответа'}...")
-
-            import re
-            json_match = re.search(r'\{.*\}', content, re.DOTALL) if 'content' in locals() else None
-
-            if json_match:
-                try:
-                    data = json.loads(json_match.group())
-                    return AssessResult(
-                        scores=data.get("scores", {}),
-                        weak_topics=data.get("weak_topics", []),
-                        follow_up=data.get("follow_up", ""),
-                        feedback=data.get("feedback", ""),
-                        context_used=context_used
-                    )
-                except Exception as inner_e:
-                    print(f"⚠️ Повторная ошибка парсинга JSON: {inner_e}")
-
-            # Fallback
-            return AssessResult(
-                scores={
-                    "theory": 60,
-                    "practice": 60,
-                    "interview_readiness": 60
-                },
-                weak_topics=topics[:2] if topics else ["алгоритмы", "системный дизайн"],
-                follow_up="Расскажите, какие задачи вы уже решали на собеседованиях или в проектах?",
-                feedback=(
-                    "Ответ выглядит в целом неплохо, чтобы начинать пробовать собеседования, "
-                    "но для более точной оценки лучше пройти полноценный тест через команду /assess."
-                ),
-                context_used=context_used
-            )
+        # Получаем контекст из RAG
+        rag_context = self._get_rag_context(topics, answer)
+        text, context_used = self._build_assess_prompt(answer, topics, user_context, rag_context)
 
+        # Отправляем в GigaChat
+        try:
+            content = complete(self.llm, text, agent="assessor", method="assess",
+                               validate=self._parse_assess, function=ASSESS_FUNCTION,
+                               priority=Priority.INTERACTIVE)
+            return self._parse_assess_response(content, topics, context_used)
         except Exception as e:
             print(f"❌ Ошибка в assess: {e}")
-            return AssessResult(
-                scores={
-                    "theory": 50,
-                    "practice": 50,
-                    "interview_readiness": 50
-                },
-                weak_topics=["технические вопросы", "алгоритмы"],
-                follow_up="Хочется ли вам сейчас получить подробный план подготовки или пройти мини‑тест?",
-                feedback=(
-                    "Произошла техническая ошибка при анализе ответа. "
-                    "Попробуйте ещё раз или воспользуйтесь командой /assess."
-                ),
-                context_used=False
-            )
-
-    def assess_with_feedback(self, question: str, user_answer: str,
-                             correct_answer: str = None, user_context: dict = None) -> Dict:
-        """Расширенная оценка с учетом правильного ответа (улучшенная)"""
+            return self._error_assess_result()
 
+    @latency_budget("assessor", "assess")
+    async def aassess(self, answer: str, topics: list, user_context: dict = None) -> AssessResult:
+        """Асинхронная версия assess, не блокирует event loop"""
         if user_context is None:
             user_context = {}
 
-        level = user_context.get('level', 'junior')
-        track = user_context.get('track', 'general')
+        rag_context = await run_rag(self._get_rag_context, topics, answer,
+                                    default={"context": "", "example_topics": ""})
+        text, context_used = self._build_assess_prompt(answer, topics, user_context, rag_context)
+
+        try:
+            content = await acomplete(self.llm, text, agent="assessor", method="assess",
+                                      validate=self._parse_assess, function=ASSESS_FUNCTION,
+                                      priority=Priority.INTERACTIVE)
+            return self._parse_assess_response(content, topics, context_used)
+        except Exception as e:
+            print(f"❌ Ошибка в assess: {e}")
+            return self._error_assess_result()
 
-        # Ищем контекст по вопросу
+    def _get_feedback_context(self, question: str) -> str:
+        """Ищет контекст по вопросу для assess_with_feedback"""
         context = ""
         if self.use_rag:
             try:
                 context_chunks = retrieve_context(question, k=2)
                 if context_chunks:
-                    context = "\n".join(context_chunks)
+                    context = assemble_context(context_chunks, token_budget("assessor", "assess_with_feedback"),
+                                               template="{chunk}")
             except Exception as e:
                 print(f"⚠️  Ошибка RAG в assess_with_feedback: {e}")
+        return context
 
-        prompt = f"""
-Оцени ответ на технический вопрос.
-
-КОНТЕКСТ:
-- Уровень: {level}
-- Направление: {track}
-
-Вопрос: {question}
-Ответ пользователя: {user_answer}
-{f'Правильный ответ (справочно): {correct_answer}' if correct_answer else ''}
-{f'Дополнительный контекст: {context}' if context else ''}
-
-Проанализируй ответ по критериям:
-1. Техническая точность (0-40)
-2. Полнота ответа (0-30)  
-3. Структура и ясность (0-20)
-4. Примеры и детали (0-10)
-
-Верни строго JSON:
-{{
-    "total_score": 0-100,
-    "criteria_scores": {{
-        "accuracy": 0-40,
-        "completeness": 0-30,
-        "clarity": 0-20,
-        "examples": 0-10
-    }},
-    "strengths": ["сильные стороны"],
-    "improvements": ["что улучшить"],
-    "recommended_resources": ["ресурсы для изучения"]
-}}
-"""
+    def _build_feedback_prompt(self, question: str, user_answer: str, correct_answer: Optional[str],
+                               user_context: dict, context: str) -> str:
+        """Строит промпт для расширенной оценки"""
+        level = user_context.get('level', 'junior')
+        track = user_context.get('track', 'general')
+
+        details = []
+        if correct_answer:
+            details.append(f"Правильный ответ (справочно): {correct_answer}")
+        if context:
+            details.append(f"Дополнительный контекст: {context}")
+
+        return PROMPTS.render("assessor.feedback", level=level, track=track, question=question,
+                              user_answer=user_answer, details="\n".join(details))
+
+    def _parse_feedback_response(self, content: str) -> Dict:
+        """Разбирает JSON расширенной оценки"""
+        return extract_json(content)
+
+    def _fallback_feedback(self) -> Dict:
+        """Расширенная оценка по умолчанию"""
+        return {
+            "total_score": 50,
+            "criteria_scores": {"accuracy": 20, "completeness": 15, "clarity": 10, "examples": 5},
+            "strengths": ["Базовое понимание темы"],
+            "improvements": ["Нужно больше деталей и примеров"],
+            "recommended_resources": ["Документация, LeetCode, YouTube уроки"]
+        }
+
+    @latency_budget("assessor", "assess_with_feedback")
+    def assess_with_feedback(self, question: str, user_answer: str,
+                             correct_answer: str = None, user_context: dict = None) -> Dict:
+        """Расширенная оценка с учетом правильного ответа (улучшенная)"""
+
+        if user_context is None:
+            user_context = {}
+
+        context = self._get_feedback_context(question)
+        prompt = self._build_feedback_prompt(question, user_answer, correct_answer, user_context, context)
 
         try:
-            response = self.llm.chat(prompt)
-            content = response.choices[0].message.content
+            content = complete(self.llm, prompt, agent="assessor", method="assess_with_feedback",
+                               priority=Priority.INTERACTIVE)
+            return self._parse_feedback_response(content)
+        except Exception as e:
+            print(f"❌ Ошибка в assess_with_feedback: {e}")
+            return self._fallback_feedback()
+
+    @latency_budget("assessor", "assess_with_feedback")
+    async def aassess_with_feedback(self, question: str, user_answer: str,
+                                    correct_answer: str = None, user_context: dict = None) -> Dict:
+        """Асинхронная версия assess_with_feedback"""
+        if user_context is None:
+            user_context = {}
 
-            # Очистка JSON
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.strip("`").strip()
+        context = await run_rag(self._get_feedback_context, question, default="")
+        prompt = self._build_feedback_prompt(question, user_answer, correct_answer, user_context, context)
 
-            return json.loads(content)
+        try:
+            content = await acomplete(self.llm, prompt, agent="assessor", method="assess_with_feedback",
+                                      priority=Priority.INTERACTIVE)
+            return self._parse_feedback_response(content)
         except Exception as e:
             print(f"❌ Ошибка в assess_with_feedback: {e}")
-            return {
-                "total_score": 50,
-                "criteria_scores": {"accuracy": 20, "completeness": 15, "clarity": 10, "examples": 5},
-                "strengths": ["Базовое понимание темы"],
-                "improvements": ["Нужно больше деталей и примеров"],
-                "recommended_resources": ["Документация, LeetCode, YouTube уроки"]
-            }
\ No newline at end of file
+            return self._fallback_feedback()
\ No newline at end of file
@@ -3,7 +3,6 @@ import json
 import sys
 from pathlib import Path
 from pydantic import BaseModel
-from gigachat import GigaChat
 from dotenv import load_dotenv
 import os
 from typing import Dict, Any, Optional
@@ -11,6 +10,9 @@ from typing import Dict, Any, Optional
 # Добавляем путь для импорта
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
+from llm import config as llm_config
+from llm.registry import get_gigachat
+
 # Импортируем RAG (с обработкой ошибок)
 try:
     from rag.retriever import retrieve_context
@@ -40,14 +42,11 @@ class CoordinatorAgent:
     def __init__(self, use_rag: bool = True):
         load_dotenv()
         self.client_secret = os.getenv("GIGACHAT_CLIENT_SECRET")
-        if not self.client_secret:
+        if not self.client_secret and llm_config.LLM_BACKEND != "fake":
             raise ValueError("❌ Не найден GIGACHAT_CLIENT_SECRET в .env")
 
-        self.llm = GigaChat(
-            credentials=self.client_secret,
-            verify_ssl_certs=False,
-            model="GigaChat"
-        )
+        # Общий на процесс клиент: один пул соединений и один токен на модель
+        self.llm = get_gigachat()
         self.use_rag = use_rag and RAG_AVAILABLE
         self.user_states = {}  # user_id -> state
 
@@ -1,9 +1,21 @@
 # agents/interviewer_agent.py
-import json
 import sys
+import json
 from pathlib import Path
 from pydantic import BaseModel
-from gigachat import GigaChat
+from llm import config
+from llm.registry import get_gigachat
+from llm.gateway import complete, acomplete
+from llm.scheduler import Priority
+from llm.deadline import latency_budget, run_rag, bounded, deadline, budget_for
+from llm.json_parser import extract_json, parse_model, JSONExtractError
+from llm.structured import function_for
+from llm.dialog import build_chat
+from llm.batching import MicroBatcher
+from llm.prefetch import Prefetcher
+from agents.question_pool import QuestionPool
+from rag.context import assemble_context, token_budget
+from prompts.templates import PROMPTS
 from dotenv import load_dotenv
 import os
 from typing import List, Optional, Dict, Any
@@ -47,6 +59,13 @@ class InterviewScore(BaseModel):
     recommended_resources: Optional[List[str]] = None
 
 
+# Схема для структурированного ответа (LLM_STRUCTURED_OUTPUT)
+SCORE_FUNCTION = function_for(InterviewScore, "submit_score", "Оценка ответа кандидата на вопрос интервью", fields={
+    "score": "Оценка от 0 до 100",
+    "comment": "Конструктивный фидбек по ответу",
+})
+
+
 class InterviewSession(BaseModel):
     id: str
     topic: str
@@ -56,6 +75,9 @@ class InterviewSession(BaseModel):
     scores: List[InterviewScore] = []
     started_at: str
     user_context: Optional[Dict] = None  # ← ДОБАВИЛ: контекст пользователя
+    dialog: List[Dict[str, str]] = []  # реплики оценки ответов (режим диалога)
+    mode: str = "live"  # live - оценка после каждого ответа, exam - одной проверкой в конце
+    answers: List[str] = []  # ответы режима экзамена до проверки
 
 
 # ===============================
@@ -63,15 +85,28 @@ class InterviewSession(BaseModel):
 # ===============================
 class InterviewerAgent:
     def __init__(self, use_rag: bool = True):
-        self.llm = GigaChat(
-            credentials=os.getenv("GIGACHAT_CLIENT_SECRET"),
-            verify_ssl_certs=False,
-            model="GigaChat"  # ← ДОБАВИЛ: явное указание модели
-        )
+        # Общий на процесс клиент: один пул соединений и один токен на модель
+        self.llm = get_gigachat()
 
         self.use_rag = use_rag and RAG_AVAILABLE
         self.active_sessions: Dict[str, InterviewSession] = {}
 
+        # Оценка ответов разных пользователей одним вызовом (INTERVIEW_BATCH)
+        self.grader = MicroBatcher(self._grade_batch, self._grade_one,
+                                   max_batch=config.INTERVIEW_BATCH_SIZE,
+                                   window=config.INTERVIEW_BATCH_WINDOW)
+
+        # Заранее сгенерированные вопросы (QUESTION_POOL): start_interview без ожидания LLM
+        self.question_pool = QuestionPool(
+            self._generate_pool_set,
+            target=config.QUESTION_POOL_SIZE,
+            low_water=config.QUESTION_POOL_LOW_WATER,
+            max_serves=config.QUESTION_POOL_MAX_SERVES
+        ) if config.QUESTION_POOL else None
+
+        # Подсказки и рекомендации, запрошенные заранее (INTERVIEW_PREFETCH)
+        self.prefetcher = Prefetcher()
+
     def _get_rag_context_for_questions(self, topic: str, level: str, track: str = None) -> str:
         """Получает контекст из RAG для генерации вопросов"""
         if not self.use_rag:
@@ -86,12 +121,8 @@ class InterviewerAgent:
 
             context_chunks = retrieve_context(query, k=3)
 
-            if context_chunks:
-                return "\n".join([
-                    f"Пример {i + 1}: {chunk[:300]}..."
-                    for i, chunk in enumerate(context_chunks)
-                ])
-            return ""
+            return assemble_context(context_chunks, token_budget("interviewer", "start_interview"),
+                                    template="Пример {i}: {chunk}")
 
         except Exception as e:
             print(f"⚠️  Ошибка RAG в Interviewer: {e}")
@@ -99,31 +130,63 @@ class InterviewerAgent:
 
     def _extract_json(self, text: str) -> dict:
         """Безопасно достаёт JSON из ответа"""
-        # Очистка от Markdown блоков
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0].strip()
-        elif "```" in text:
-            text = text.strip("`").strip()
-
-        # Поиск JSON в тексте
-        import re
-        json_match = re.search(r'\{.*\}', text, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group())
-            except:
-                pass
+        return extract_json(text)
 
-        # Если не нашли JSON, пробуем распарсить весь текст
-        try:
-            return json.loads(text)
-        except:
-            raise ValueError(f"Не удалось извлечь JSON из ответа: {text[:200]}")
-
-    def start_interview(self, topic: str, level: str = "middle",
-                        user_context: Dict = None, session_id: str = None) -> InterviewSession:
-        """Начинает новое интервью по теме"""
+    def _build_questions_prompt(self, topic: str, user_level: str, track: str, rag_context: str) -> tuple:
+        """Строит промпт для генерации вопросов, возвращает (prompt, rag_used)"""
+        if rag_context:
+            prompt = PROMPTS.render("interviewer.questions_rag", rag_context=rag_context,
+                                    user_level=user_level, track=track, topic=topic)
+            return prompt, True
+
+        prompt = PROMPTS.render("interviewer.questions", user_level=user_level, track=track, topic=topic)
+        return prompt, False
+
+    def _parse_questions(self, content: str, topic: str, rag_used: bool) -> List[InterviewQuestion]:
+        """Разбирает ответ модели со списком вопросов"""
+        data = self._extract_json(content)
+
+        questions = []
+        for q_data in data.get("questions", [])[:3]:  # Берем максимум 3 вопроса
+            questions.append(InterviewQuestion(
+                topic=q_data.get("topic", topic),
+                question=q_data.get("question", f"Расскажите о {topic}"),
+                expected_concepts=q_data.get("expected_concepts", [topic]),
+                difficulty=q_data.get("difficulty", "medium"),
+                hints=q_data.get("hints", []),
+                rag_context_used=rag_used
+            ))
+        return questions
+
+    def _fallback_questions(self, topic: str) -> List[InterviewQuestion]:
+        """Fallback вопросы на случай ошибки генерации"""
+        return [
+            InterviewQuestion(
+                topic=topic,
+                question=f"Что вы знаете о {topic}?",
+                expected_concepts=[topic, "базовые принципы"],
+                difficulty="easy",
+                rag_context_used=False
+            ),
+            InterviewQuestion(
+                topic=topic,
+                question=f"Приведите пример использования {topic}",
+                expected_concepts=["практическое применение"],
+                difficulty="medium",
+                rag_context_used=False
+            ),
+            InterviewQuestion(
+                topic=topic,
+                question=f"Какие проблемы могут возникнуть при работе с {topic} и как их решить?",
+                expected_concepts=["проблемы", "решения"],
+                difficulty="hard",
+                rag_context_used=False
+            )
+        ]
 
+    def _prepare_interview(self, topic: str, level: str, user_context: Optional[Dict],
+                           session_id: Optional[str]) -> tuple:
+        """Нормализует параметры интервью: (user_context, track, user_level, session_id)"""
         if user_context is None:
             user_context = {}
 
@@ -133,122 +196,149 @@ class InterviewerAgent:
         if not session_id:
             session_id = f"interview_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{topic[:20]}"
 
-        # Получаем контекст из RAG
-        rag_context = self._get_rag_context_for_questions(topic, user_level, track)
-
-        # Промпт для генерации вопросов
-        if rag_context:
-            prompt = f"""
-Ты — опытный технический интервьюер. У тебя есть доступ к базе вопросов.
-
-КОНТЕКСТ ИЗ БАЗЫ ЗНАНИЙ:
-{rag_context}
-
-КОНТЕКСТ ПОЛЬЗОВАТЕЛЯ:
-- Уровень: {user_level}
-- Направление: {track}
-
-Сгенерируй 3 уникальных вопроса по теме: {topic}
-Вопросы должны соответствовать уровню {user_level}.
-
-Формат строго JSON:
-{{
-  "questions": [
-    {{
-      "topic": "конкретная подтема",
-      "question": "текст вопроса",
-      "expected_concepts": ["концепция1", "концепция2", "концепция3"],
-      "difficulty": "easy/medium/hard",
-      "hints": ["подсказка 1", "подсказка 2"]
-    }}
-  ]
-}}
-
-Создай 1 легкий, 1 средний и 1 сложный вопрос.
-"""
-            rag_used = True
-        else:
-            prompt = f"""
-Ты — опытный технический интервьюер.
-
-КОНТЕКСТ ПОЛЬЗОВАТЕЛЯ:
-- Уровень: {user_level}
-- Направление: {track}
-
-Сгенерируй 3 вопроса по теме: {topic}
-Вопросы должны соответствовать уровню {user_level}.
-
-Формат строго JSON:
-{{
-  "questions": [
-    {{
-      "topic": "конкретная подтема",
-      "question": "текст вопроса",
-      "expected_concepts": ["концепция1", "концепция2"],
-      "difficulty": "easy/medium/hard",
-      "hints": ["подсказка при затруднении"]
-    }}
-  ]
-}}
-"""
-            rag_used = False
-
-        # Генерируем вопросы
-        try:
-            response = self.llm.chat(prompt)
-            data = self._extract_json(response.choices[0].message.content)
-
-            questions = []
-            for q_data in data.get("questions", [])[:3]:  # Берем максимум 3 вопроса
-                questions.append(InterviewQuestion(
-                    topic=q_data.get("topic", topic),
-                    question=q_data.get("question", f"Расскажите о {topic}"),
-                    expected_concepts=q_data.get("expected_concepts", [topic]),
-                    difficulty=q_data.get("difficulty", "medium"),
-                    hints=q_data.get("hints", []),
-                    rag_context_used=rag_used
-                ))
+        return user_context, track, user_level, session_id
 
-        except Exception as e:
-            print(f"❌ Ошибка генерации вопросов: {e}")
-            # Fallback вопросы
-            questions = [
-                InterviewQuestion(
-                    topic=topic,
-                    question=f"Что вы знаете о {topic}?",
-                    expected_concepts=[topic, "базовые принципы"],
-                    difficulty="easy",
-                    rag_context_used=False
-                ),
-                InterviewQuestion(
-                    topic=topic,
-                    question=f"Приведите пример использования {topic}",
-                    expected_concepts=["практическое применение"],
-                    difficulty="medium",
-                    rag_context_used=False
-                ),
-                InterviewQuestion(
-                    topic=topic,
-                    question=f"Какие проблемы могут возникнуть при работе с {topic} и как их решить?",
-                    expected_concepts=["проблемы", "решения"],
-                    difficulty="hard",
-                    rag_context_used=False
-                )
-            ]
-
-        # Создаем сессию
+    def _create_session(self, session_id: str, topic: str, user_level: str,
+                        questions: List[InterviewQuestion], user_context: Dict,
+                        mode: Optional[str] = None) -> InterviewSession:
+        """Создает и регистрирует сессию интервью"""
         session = InterviewSession(
             id=session_id,
             topic=topic,
             level=user_level,
             questions=questions,
             started_at=datetime.now().isoformat(),
-            user_context=user_context  # ← СОХРАНЯЕМ контекст
+            user_context=user_context,  # ← СОХРАНЯЕМ контекст
+            mode=mode or config.INTERVIEW_MODE
         )
 
         self.active_sessions[session_id] = session
+        self._prefetch(session)
         return session
 
+    def _prefetch_enabled(self, kind: str) -> bool:
+        return "all" in config.INTERVIEW_PREFETCH or kind in config.INTERVIEW_PREFETCH
+
+    def _prefetch(self, session: InterviewSession):
+        """
+        Пока пользователь отвечает, запрашивает в фоне то, что ему понадобится дальше
+
+        Подсказки - к текущему вопросу, рекомендации - после оценки последнего
+        ответа. Вызовы идут с фоновым приоритетом и отменяются вместе с сессией.
+        """
+        index = session.current_question_index
+        if index < len(session.questions):
+            question = session.questions[index]
+            if self._prefetch_enabled("hints") and not question.hints:
+                prompt = PROMPTS.render("interviewer.hints", question=question.question,
+                                        topic=question.topic, level=session.level)
+                self.prefetcher.start(session.id, (session.id, "hints", index),
+                                      lambda: self._fetch_hints(question, prompt))
+
+        elif session.scores and session.mode != "exam" and self._prefetch_enabled("recommendations"):
+            weak_points = self.get_interview_summary(session.id).get("weak_points", [])
+            if weak_points:
+                prompt = self._build_recommendations_prompt(weak_points)
+                self.prefetcher.start(session.id, (session.id, "recommendations"),
+                                      lambda: self._fetch_recommendations(prompt))
+
+    async def _fetch_hints(self, question: InterviewQuestion, prompt: str) -> Optional[List[str]]:
+        content = await acomplete(self.llm, prompt, agent="interviewer", method="get_hints", cache=True,
+                                  validate=self._extract_hints, priority=Priority.BACKGROUND)
+        return self._parse_hints(question, content)
+
+    async def _fetch_recommendations(self, prompt: str) -> Optional[List[str]]:
+        content = await acomplete(self.llm, prompt, agent="interviewer", method="end_interview",
+                                  priority=Priority.BACKGROUND)
+        return self._parse_recommendations(content)
+
+    def _take_pooled(self, topic: str, user_level: str, track: str,
+                     user_context: Dict) -> Optional[List[InterviewQuestion]]:
+        """Вопросы из пула, которые пользователь еще не видел; None - промах"""
+        if self.question_pool is None:
+            return None
+        pooled = self.question_pool.take(topic, user_level, track, user_context.get("user_id"))
+        return [InterviewQuestion(**q) for q in pooled] if pooled else None
+
+    def _pool_put(self, topic: str, user_level: str, track: str, user_context: Dict,
+                  questions: List[InterviewQuestion]):
+        """Сгенерированный при промахе набор пополняет пул"""
+        if self.question_pool is not None:
+            self.question_pool.put(topic, user_level, track, [q.model_dump() for q in questions],
+                                   user_context.get("user_id"))
+
+    async def _generate_pool_set(self, topic: str, user_level: str, track: str) -> List[Dict]:
+        """Фоновая генерация набора для пула (без кэша ответов: нужны разные наборы)"""
+        rag_context = await run_rag(self._get_rag_context_for_questions, topic, user_level, track, default="")
+        prompt, rag_used = self._build_questions_prompt(topic, user_level, track, rag_context)
+        content = await acomplete(self.llm, prompt, agent="interviewer", method="question_pool",
+                                  validate=lambda c: self._extract_json(c)["questions"],
+                                  priority=Priority.BACKGROUND)
+        questions = self._parse_questions(content, topic, rag_used)
+        if not questions:
+            raise ValueError("В ответе нет вопросов")
+        return [q.model_dump() for q in questions]
+
+    @latency_budget("interviewer", "start_interview")
+    def start_interview(self, topic: str, level: str = "middle",
+                        user_context: Dict = None, session_id: str = None,
+                        mode: str = None) -> InterviewSession:
+        """Начинает новое интервью по теме (mode: live или exam, по умолчанию INTERVIEW_MODE)"""
+        user_context, track, user_level, session_id = self._prepare_interview(
+            topic, level, user_context, session_id
+        )
+
+        questions = self._take_pooled(topic, user_level, track, user_context)
+        if questions:
+            return self._create_session(session_id, topic, user_level, questions, user_context, mode)
+
+        # Получаем контекст из RAG
+        rag_context = self._get_rag_context_for_questions(topic, user_level, track)
+        prompt, rag_used = self._build_questions_prompt(topic, user_level, track, rag_context)
+
+        # Генерируем вопросы (с пулом - без кэша ответов, иначе промах вернет уже виденный набор)
+        try:
+            content = complete(self.llm, prompt, agent="interviewer", method="start_interview",
+                               cache=self.question_pool is None,
+                               validate=lambda c: self._extract_json(c)["questions"],
+                               priority=Priority.QUESTIONS)
+            questions = self._parse_questions(content, topic, rag_used)
+            self._pool_put(topic, user_level, track, user_context, questions)
+        except Exception as e:
+            print(f"❌ Ошибка генерации вопросов: {e}")
+            questions = self._fallback_questions(topic)
+
+        return self._create_session(session_id, topic, user_level, questions, user_context, mode)
+
+    @latency_budget("interviewer", "start_interview")
+    async def astart_interview(self, topic: str, level: str = "middle",
+                               user_context: Dict = None, session_id: str = None,
+                               mode: str = None) -> InterviewSession:
+        """Асинхронная версия start_interview, не блокирует event loop"""
+        user_context, track, user_level, session_id = self._prepare_interview(
+            topic, level, user_context, session_id
+        )
+
+        questions = self._take_pooled(topic, user_level, track, user_context)
+        if questions:
+            return self._create_session(session_id, topic, user_level, questions, user_context, mode)
+
+        rag_context = await run_rag(self._get_rag_context_for_questions, topic, user_level, track, default="")
+        prompt, rag_used = self._build_questions_prompt(topic, user_level, track, rag_context)
+
+        try:
+            content = await acomplete(self.llm, prompt, agent="interviewer", method="start_interview",
+                                      cache=self.question_pool is None,
+                                      validate=lambda c: self._extract_json(c)["questions"],
+                                      priority=Priority.QUESTIONS)
+            questions = self._parse_questions(content, topic, rag_used)
+            self._pool_put(topic, user_level, track, user_context, questions)
+        except Exception as e:
+            print(f"❌ Ошибка генерации вопросов: {e}")
+            questions = self._fallback_questions(topic)
+
+        return self._create_session(session_id, topic, user_level, questions, user_context, mode)
+
     def get_current_question(self, session_id: str) -> Optional[InterviewQuestion]:
         """Получает текущий вопрос из сессии"""
         session = self.active_sessions.get(session_id)
@@ -259,11 +349,11 @@ class InterviewerAgent:
             return session.questions[session.current_question_index]
         return None
 
-    def evaluate_answer(self, session_id: str, answer: str) -> InterviewScore:
-        """Оценивает ответ на текущий вопрос"""
+    def _check_answer_session(self, session_id: str) -> tuple:
+        """Проверяет сессию перед оценкой: (session, error_score)"""
         session = self.active_sessions.get(session_id)
         if not session:
-            return InterviewScore(
+            return None, InterviewScore(
                 score=0,
                 comment="Сессия не найдена",
                 strong_points=[],
@@ -271,105 +361,302 @@ class InterviewerAgent:
             )
 
         if session.current_question_index >= len(session.questions):
-            return InterviewScore(
+            return None, InterviewScore(
                 score=0,
                 comment="Все вопросы пройдены",
                 strong_points=[],
                 weak_points=[]
             )
 
-        current_question = session.questions[session.current_question_index]
-        user_level = session.user_context.get('level', 'middle') if session.user_context else 'middle'
+        return session, None
+
+    def _session_level(self, session: InterviewSession) -> str:
+        """Уровень кандидата из контекста сессии"""
+        return session.user_context.get('level', 'middle') if session.user_context else 'middle'
 
-        # Получаем RAG контекст для оценки
+    def _get_rag_context_for_answer(self, question: InterviewQuestion, user_level: str) -> str:
+        """Получает RAG контекст для оценки ответа"""
         rag_context = ""
-        if self.use_rag and current_question.expected_concepts:
+        if self.use_rag and question.expected_concepts:
             try:
-                query = f"{current_question.topic} {user_level} правильный ответ"
+                query = f"{question.topic} {user_level} правильный ответ"
                 context_chunks = retrieve_context(query, k=2)
                 if context_chunks:
-                    rag_context = "\n".join([f"- {chunk[:200]}" for chunk in context_chunks])
+                    rag_context = assemble_context(context_chunks, token_budget("interviewer", "evaluate_answer"))
             except Exception as e:
                 print(f"⚠️  Ошибка RAG при оценке: {e}")
-
-        # Промпт для оценки
+        return rag_context
+
+    def _build_evaluation_prompt(self, current_question: InterviewQuestion, answer: str,
+                                 user_level: str, rag_context: str) -> str:
+        """Строит промпт для оценки ответа"""
+        params = dict(
+            user_level=user_level,
+            question=current_question.question,
+            concepts=', '.join(current_question.expected_concepts),
+            answer=answer
+        )
         if rag_context:
-            prompt = f"""
-Ты — технический интервьюер.
-
-КОНТЕКСТ ПОЛЬЗОВАТЕЛЯ:
-- Уровень: {user_level}
-
-ИНФОРМАЦИЯ ДЛЯ ОЦЕНКИ:
-{rag_context}
-
-ВОПРОС: {current_question.question}
-ОЖИДАЕМЫЕ КОНЦЕПЦИИ: {', '.join(current_question.expected_concepts)}
+            return PROMPTS.render("interviewer.evaluate_rag", rag_context=rag_context, **params)
+        return PROMPTS.render("interviewer.evaluate", **params)
+
+    def _build_evaluation_request(self, session: InterviewSession, current_question: InterviewQuestion,
+                                  answer: str, user_level: str, rag_context: str) -> tuple:
+        """
+        Запрос на оценку ответа: (prompt, turn)
+
+        В режиме диалога (INTERVIEW_DIALOG) роль и формат ответа уходят
+        системным сообщением, а к окну прошлых реплик добавляется только
+        новый вопрос с ответом. turn - реплика для истории (без RAG контекста),
+        в обычном режиме None.
+        """
+        if not config.INTERVIEW_DIALOG:
+            return self._build_evaluation_prompt(current_question, answer, user_level, rag_context), None
+
+        params = dict(
+            question=current_question.question,
+            concepts=', '.join(current_question.expected_concepts),
+            answer=answer
+        )
+        turn = PROMPTS.render("interviewer.evaluate_turn", **params)
+        message = (PROMPTS.render("interviewer.evaluate_turn_rag", rag_context=rag_context, **params)
+                   if rag_context else turn)
+        system = PROMPTS.render("interviewer.evaluate_system", user_level=user_level)
+        prompt = build_chat(system, session.dialog, message,
+                            config.INTERVIEW_DIALOG_TURNS, config.INTERVIEW_DIALOG_TOKENS)
+        return prompt, turn
+
+    def _parse_score(self, content: str) -> InterviewScore:
+        """Разбирает ответ модели с оценкой"""
+        return parse_model(content, InterviewScore, defaults={
+            "score": 50,
+            "comment": "Ответ принят",
+            "strong_points": [],
+            "weak_points": [],
+            "recommended_resources": []
+        })
+
+    def _record_score(self, session: InterviewSession, score: InterviewScore,
+                      turn: Optional[str] = None) -> InterviewScore:
+        """Сохраняет оценку (и реплики диалога) и переходит к следующему вопросу"""
+        if turn is not None:
+            # В истории только балл и комментарий: старые реплики дешевле
+            reply = json.dumps({"score": score.score, "comment": score.comment}, ensure_ascii=False)
+            dialog = session.dialog + [{"role": "user", "content": turn}, {"role": "assistant", "content": reply}]
+            keep = 2 * config.INTERVIEW_DIALOG_TURNS
+            session.dialog = dialog[-keep:] if keep > 0 else []
+        session.scores.append(score)
+        session.current_question_index += 1
+        self._prefetch(session)
+        return score
+
+    def _evaluation_error_score(self) -> InterviewScore:
+        """Оценка на случай технической ошибки"""
+        return InterviewScore(
+            score=50,
+            comment="Техническая ошибка при оценке",
+            strong_points=["Ответ предоставлен"],
+            weak_points=["Требуется более детальный разбор"],
+            recommended_resources=[]
+        )
 
-ОТВЕТ КАНДИДАТА: {answer}
+    @latency_budget("interviewer", "evaluate_answer")
+    def evaluate_answer(self, session_id: str, answer: str) -> InterviewScore:
+        """Оценивает ответ на текущий вопрос"""
+        session, error_score = self._check_answer_session(session_id)
+        if error_score:
+            return error_score
 
-Оцени ответ кандидата уровня {user_level} по шкале 0-100.
-Учти, что для уровня {user_level} требования соответствующие.
+        current_question = session.questions[session.current_question_index]
+        user_level = self._session_level(session)
 
-Формат строго JSON:
-{{
-  "score": число от 0 до 100,
-  "comment": "детальный фидбек, что правильно, что можно улучшить",
-  "strong_points": ["сильные стороны ответа"],
-  "weak_points": ["что нужно улучшить"],
-  "recommended_resources": ["рекомендации по изучению"]
-}}
-"""
-        else:
-            prompt = f"""
-Ты — технический интервьюер.
+        rag_context = self._get_rag_context_for_answer(current_question, user_level)
+        prompt, turn = self._build_evaluation_request(session, current_question, answer, user_level, rag_context)
 
-КОНТЕКСТ:
-- Уровень кандидата: {user_level}
+        try:
+            content = complete(self.llm, prompt, agent="interviewer", method="evaluate_answer",
+                               validate=self._parse_score, function=SCORE_FUNCTION,
+                               session=session.id if turn is not None else None,
+                               priority=Priority.INTERACTIVE)
+            score = self._parse_score(content)
+            return self._record_score(session, score, turn)
+        except Exception as e:
+            print(f"❌ Ошибка оценки ответа: {e}")
+            return self._evaluation_error_score()
+
+    def _batch_item(self, index: int, item: Dict) -> str:
+        """Элемент пачки оценки"""
+        params = dict(
+            id=index,
+            user_level=item["user_level"],
+            question=item["question"].question,
+            concepts=', '.join(item["question"].expected_concepts),
+            answer=item["answer"]
+        )
+        if item["rag_context"]:
+            return PROMPTS.render("interviewer.evaluate_batch_item_rag", rag_context=item["rag_context"], **params)
+        return PROMPTS.render("interviewer.evaluate_batch_item", **params)
+
+    def _parse_batch_scores(self, content: str, size: int) -> List[Optional[InterviewScore]]:
+        """Разбирает массив оценок; элемент без валидной оценки - None"""
+        return self._scores_by_id(extract_json(content, root="["), size)
+
+    def _scores_by_id(self, items: list, size: int) -> List[Optional[InterviewScore]]:
+        """Оценки по номерам элементов (с 1); элемент без валидной оценки - None"""
+        scores: List[Optional[InterviewScore]] = [None] * size
+        for data in items:
+            try:
+                index = int(data.pop("id")) - 1
+                if 0 <= index < size and scores[index] is None:
+                    scores[index] = InterviewScore.model_validate(
+                        {"strong_points": [], "weak_points": [], "recommended_resources": [], **data}
+                    )
+            except (AttributeError, KeyError, TypeError, ValueError):
+                continue
+        return scores
+
+    async def _grade_batch(self, items: List[Dict]) -> List[Optional[InterviewScore]]:
+        """Оценивает пачку ответов одним вызовом LLM"""
+        prompt = PROMPTS.render("interviewer.evaluate_batch", items="\n\n".join(
+            self._batch_item(i, item) for i, item in enumerate(items, 1)
+        ))
+        with deadline(budget_for("interviewer", "evaluate_answer")):
+            content = await acomplete(self.llm, prompt, agent="interviewer", method="evaluate_batch",
+                                      validate=lambda c: extract_json(c, root="["),
+                                      priority=Priority.INTERACTIVE)
+        return self._parse_batch_scores(content, len(items))
+
+    async def _grade_one(self, item: Dict) -> InterviewScore:
+        """Оценка одного ответа отдельным вызовом (пачка не разобралась)"""
+        prompt = self._build_evaluation_prompt(item["question"], item["answer"], item["user_level"],
+                                               item["rag_context"])
+        with deadline(budget_for("interviewer", "evaluate_answer")):
+            content = await acomplete(self.llm, prompt, agent="interviewer", method="evaluate_answer",
+                                      validate=self._parse_score, function=SCORE_FUNCTION,
+                                      priority=Priority.INTERACTIVE)
+        return self._parse_score(content)
+
+    @latency_budget("interviewer", "evaluate_answer")
+    async def aevaluate_answer(self, session_id: str, answer: str) -> InterviewScore:
+        """Асинхронная версия evaluate_answer"""
+        session, error_score = self._check_answer_session(session_id)
+        if error_score:
+            return error_score
 
-ВОПРОС: {current_question.question}
-ОЖИДАЕМЫЕ КОНЦЕПЦИИ: {', '.join(current_question.expected_concepts)}
+        current_question = session.questions[session.current_question_index]
+        user_level = self._session_level(session)
 
-ОТВЕТ КАНДИДАТА: {answer}
+        rag_context = await run_rag(self._get_rag_context_for_answer, current_question, user_level,
+                                    default="")
 
-Оцени ответ кандидата уровня {user_level} по шкале 0-100.
+        if config.INTERVIEW_BATCH:
+            try:
+                item = {"question": current_question, "answer": answer,
+                        "user_level": user_level, "rag_context": rag_context}
+                score = await bounded(self.grader.submit(item))
+                return self._record_score(session, score)
+            except Exception as e:
+                print(f"❌ Ошибка оценки ответа: {e}")
+                return self._evaluation_error_score()
 
-Формат строго JSON:
-{{
-  "score": число от 0 до 100,
-  "comment": "конструктивный фидбек",
-  "strong_points": ["что хорошо в ответе"],
-  "weak_points": ["что нужно доработать"]
-}}
-"""
+        prompt, turn = self._build_evaluation_request(session, current_question, answer, user_level, rag_context)
 
         try:
-            response = self.llm.chat(prompt)
-            data = self._extract_json(response.choices[0].message.content)
-
-            score = InterviewScore(
-                score=data.get("score", 50),
-                comment=data.get("comment", "Ответ принят"),
-                strong_points=data.get("strong_points", []),
-                weak_points=data.get("weak_points", []),
-                recommended_resources=data.get("recommended_resources", [])
-            )
+            content = await acomplete(self.llm, prompt, agent="interviewer", method="evaluate_answer",
+                                      validate=self._parse_score, function=SCORE_FUNCTION,
+                                      session=session.id if turn is not None else None,
+                                      priority=Priority.INTERACTIVE)
+            score = self._parse_score(content)
+            return self._record_score(session, score, turn)
+        except Exception as e:
+            print(f"❌ Ошибка оценки ответа: {e}")
+            return self._evaluation_error_score()
+
+    def record_answer(self, session_id: str, answer: str) -> bool:
+        """Режим экзамена: сохраняет ответ без оценки и переходит к следующему вопросу"""
+        session = self.active_sessions.get(session_id)
+        if not session or session.current_question_index >= len(session.questions):
+            return False
+
+        session.answers.append(answer)
+        session.current_question_index += 1
+        self._prefetch(session)
+        return True
+
+    def _build_exam_prompt(self, session: InterviewSession) -> str:
+        """Промпт проверки всех ответов экзамена"""
+        items = "\n\n".join(
+            PROMPTS.render("interviewer.exam_item", id=i, question=question.question,
+                           concepts=', '.join(question.expected_concepts), answer=answer)
+            for i, (question, answer) in enumerate(zip(session.questions, session.answers), 1)
+        )
+        return PROMPTS.render("interviewer.exam", user_level=self._session_level(session),
+                              topic=session.topic, items=items)
+
+    def _finish_exam(self, session: InterviewSession, content: Optional[str]) -> Dict:
+        """
+        Раскладывает проверку экзамена по сессии и возвращает итог как end_interview
+
+        Вопрос без оценки в ответе модели получает оценку технической ошибки,
+        без рекомендаций - рекомендации по умолчанию.
+        """
+        scores: List[Optional[InterviewScore]] = [None] * len(session.answers)
+        overall, recommendations = "", None
+        if content is not None:
+            try:
+                data = self._extract_json(content)
+                scores = self._scores_by_id(data.get("scores") or [], len(session.answers))
+                overall = data.get("summary") or ""
+                recommendations = data.get("recommendations")
+            except ValueError as e:
+                print(f"⚠️  Не удалось разобрать проверку экзамена: {e}")
+
+        session.scores = [score or self._evaluation_error_score() for score in scores]
+        summary = self.get_interview_summary(session.id)
+        summary["scores"] = session.scores
+        if overall:
+            summary["overall"] = overall
+        if isinstance(recommendations, list) and recommendations:
+            summary["recommendations"] = [str(r) for r in recommendations[:3]]
+        elif session.scores:
+            summary["recommendations"] = self._default_recommendations()
+
+        self._close_session(session.id)
+        return summary
+
+    @latency_budget("interviewer", "grade_exam")
+    def grade_exam(self, session_id: str) -> Dict:
+        """Режим экзамена: оценки, итог и рекомендации одним вызовом LLM"""
+        session = self.active_sessions.get(session_id)
+        if not session:
+            return {"error": "Сессия не найдена"}
 
-            # Сохраняем и переходим дальше
-            session.scores.append(score)
-            session.current_question_index += 1
+        content = None
+        if session.answers:
+            try:
+                content = complete(self.llm, self._build_exam_prompt(session), agent="interviewer",
+                                   method="grade_exam", validate=lambda c: self._extract_json(c)["scores"],
+                                   priority=Priority.INTERACTIVE)
+            except Exception as e:
+                print(f"❌ Ошибка проверки экзамена: {e}")
+        return self._finish_exam(session, content)
 
-            return score
+    @latency_budget("interviewer", "grade_exam")
+    async def agrade_exam(self, session_id: str) -> Dict:
+        """Асинхронная версия grade_exam"""
+        session = self.active_sessions.get(session_id)
+        if not session:
+            return {"error": "Сессия не найдена"}
 
-        except Exception as e:
-            print(f"❌ Ошибка оценки ответа: {e}")
-            return InterviewScore(
-                score=50,
-                comment="Техническая ошибка при оценке",
-                strong_points=["Ответ предоставлен"],
-                weak_points=["Требуется более детальный разбор"],
-                recommended_resources=[]
-            )
+        content = None
+        if session.answers:
+            try:
+                content = await acomplete(self.llm, self._build_exam_prompt(session), agent="interviewer",
+                                          method="grade_exam", validate=lambda c: self._extract_json(c)["scores"],
+                                          priority=Priority.INTERACTIVE)
+            except Exception as e:
+                print(f"❌ Ошибка проверки экзамена: {e}")
+        return self._finish_exam(session, content)
 
     def get_interview_summary(self, session_id: str) -> Dict:
         """Получает итоговую статистику по интервью"""
@@ -422,48 +709,112 @@ class InterviewerAgent:
             "started_at": session.started_at
         }
 
-    def get_hints(self, session_id: str) -> List[str]:
-        """Получает подсказки для текущего вопроса"""
+    def _prepare_hints(self, session_id: str) -> tuple:
+        """Готовит генерацию подсказок: (question, prompt, ready_hints)"""
         session = self.active_sessions.get(session_id)
         if not session:
-            return ["Сессия не найдена"]
+            return None, None, ["Сессия не найдена"]
 
         current_question = self.get_current_question(session_id)
         if not current_question:
-            return ["Интервью завершено"]
+            return None, None, ["Интервью завершено"]
 
         # Если есть готовые подсказки, возвращаем их
         if current_question.hints:
-            return current_question.hints
+            return current_question, None, current_question.hints
 
         # Генерируем на лету
-        prompt = f"""
-Вопрос для интервью: {current_question.question}
-Тема: {current_question.topic}
-Уровень кандидата: {session.level}
+        prompt = PROMPTS.render("interviewer.hints", question=current_question.question,
+                                topic=current_question.topic, level=session.level)
+        return current_question, prompt, None
 
-Дай 2 подсказки, которые помогут кандидату уровня {session.level} ответить на вопрос.
-Подсказки должны быть конкретными и полезными.
+    def _extract_hints(self, content: str) -> List[str]:
+        """Достаёт JSON-список подсказок из ответа"""
+        return extract_json(content, root="[")
+
+    def _parse_hints(self, question: InterviewQuestion, content: str) -> Optional[List[str]]:
+        """Извлекает список подсказок и запоминает их в вопросе"""
+        try:
+            hints = self._extract_hints(content)
+        except ValueError:
+            return None
+        question.hints = hints[:2]
+        return hints[:2]
 
-Формат: ["подсказка 1", "подсказка 2"]
-"""
+    def _default_hints(self) -> List[str]:
+        """Подсказки по умолчанию"""
+        return ["Подумайте о ключевых концепциях", "Приведите практический пример"]
+
+    @latency_budget("interviewer", "get_hints")
+    def get_hints(self, session_id: str) -> List[str]:
+        """Получает подсказки для текущего вопроса"""
+        question, prompt, ready_hints = self._prepare_hints(session_id)
+        if ready_hints is not None:
+            return ready_hints
 
         try:
-            response = self.llm.chat(prompt)
-            content = response.choices[0].message.content
-
-            # Извлекаем список
-            import re
-            list_match = re.search(r'\[.*\]', content, re.DOTALL)
-            if list_match:
-                hints = json.loads(list_match.group())
-                current_question.hints = hints[:2]
-                return hints[:2]
+            content = complete(self.llm, prompt, agent="interviewer", method="get_hints", cache=True,
+                               validate=self._extract_hints,
+                               priority=Priority.INTERACTIVE)
+            hints = self._parse_hints(question, content)
+            if hints:
+                return hints
         except:
             pass
 
-        return ["Подумайте о ключевых концепциях", "Приведите практический пример"]
+        return self._default_hints()
+
+    @latency_budget("interviewer", "get_hints")
+    async def aget_hints(self, session_id: str) -> List[str]:
+        """Асинхронная версия get_hints"""
+        question, prompt, ready_hints = self._prepare_hints(session_id)
+        if ready_hints is not None:
+            return ready_hints
+
+        # Упреждающий запрос еще идет - дожидаемся его вместо нового вызова
+        index = self.active_sessions[session_id].current_question_index
+        hints = await self.prefetcher.take((session_id, "hints", index))
+        if hints:
+            return hints
+
+        try:
+            content = await acomplete(self.llm, prompt, agent="interviewer", method="get_hints", cache=True,
+                                      validate=self._extract_hints,
+                                      priority=Priority.INTERACTIVE)
+            hints = self._parse_hints(question, content)
+            if hints:
+                return hints
+        except:
+            pass
+
+        return self._default_hints()
+
+    def _build_recommendations_prompt(self, weak_points: List[str]) -> str:
+        """Промпт для рекомендаций по итогам интервью"""
+        return PROMPTS.render("interviewer.recommendations", weak_points=', '.join(weak_points[:3]))
+
+    def _parse_recommendations(self, content: str) -> Optional[List[str]]:
+        """Извлекает список рекомендаций из ответа"""
+        try:
+            return extract_json(content, root="[")
+        except JSONExtractError:
+            return None
 
+    def _default_recommendations(self) -> List[str]:
+        """Рекомендации по умолчанию"""
+        return [
+            "Практиковаться на LeetCode/HackerRank",
+            "Изучать документацию и best practices",
+            "Проходить больше mock интервью"
+        ]
+
+    def _close_session(self, session_id: str):
+        """Удаляет сессию интервью и отменяет ее упреждающие запросы"""
+        self.prefetcher.cancel(session_id)
+        if session_id in self.active_sessions:
+            del self.active_sessions[session_id]
+
+    @latency_budget("interviewer", "end_interview")
     def end_interview(self, session_id: str) -> Dict:
         """Завершает интервью"""
         summary = self.get_interview_summary(session_id)
@@ -472,29 +823,41 @@ class InterviewerAgent:
             # Генерируем рекомендации
             weak_points = summary.get("weak_points", [])
             if weak_points:
-                prompt = f"""
-На основе слабых сторон: {', '.join(weak_points[:3])}
-Дай 3 конкретные рекомендации для улучшения.
-
-Формат: ["рекомендация 1", "рекомендация 2", "рекомендация 3"]
-"""
+                prompt = self._build_recommendations_prompt(weak_points)
                 try:
-                    response = self.llm.chat(prompt)
-                    content = response.choices[0].message.content
+                    content = complete(self.llm, prompt, agent="interviewer", method="end_interview",
+                                       priority=Priority.BATCH)
+                    recommendations = self._parse_recommendations(content)
+                    if recommendations:
+                        summary["recommendations"] = recommendations
+                except:
+                    summary["recommendations"] = self._default_recommendations()
 
-                    import re
-                    list_match = re.search(r'\[.*\]', content, re.DOTALL)
-                    if list_match:
-                        summary["recommendations"] = json.loads(list_match.group())
+            self._close_session(session_id)
+
+        return summary
+
+    @latency_budget("interviewer", "end_interview")
+    async def aend_interview(self, session_id: str) -> Dict:
+        """Асинхронная версия end_interview"""
+        summary = self.get_interview_summary(session_id)
+
+        if "error" not in summary:
+            weak_points = summary.get("weak_points", [])
+            prefetched = await self.prefetcher.take((session_id, "recommendations")) if weak_points else None
+            if prefetched:
+                summary["recommendations"] = prefetched
+            elif weak_points:
+                prompt = self._build_recommendations_prompt(weak_points)
+                try:
+                    content = await acomplete(self.llm, prompt, agent="interviewer", method="end_interview",
+                                              priority=Priority.BATCH)
+                    recommendations = self._parse_recommendations(content)
+                    if recommendations:
+                        summary["recommendations"] = recommendations
                 except:
-                    summary["recommendations"] = [
-                        "Практиковаться на LeetCode/HackerRank",
-                        "Изучать документацию и best practices",
-                        "Проходить больше mock интервью"
-                    ]
+                    summary["recommendations"] = self._default_recommendations()
 
-            # Удаляем сессию
-            if session_id in self.active_sessions:
-                del self.active_sessions[session_id]
+            self._close_session(session_id)
 
-        return summary
\ No newline at end of file
+        return summary
@@ -1,17 +1,27 @@
 # agents/planner_agent.py
+import html
 import json
 import sys
 from pathlib import Path
 from pydantic import BaseModel
-from gigachat import GigaChat
 from dotenv import load_dotenv
 import os
-from typing import List, Dict, Optional
+from typing import Awaitable, Callable, List, Dict, Optional
 from datetime import datetime, timedelta
 
 # Добавляем путь для импорта RAG
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
+from llm.registry import get_gigachat
+from llm.gateway import complete, acomplete
+from llm.scheduler import Priority
+from llm.deadline import latency_budget, run_rag
+from llm.json_parser import extract_json
+from llm.structured import function_for
+from rag.context import assemble_context, token_budget
+from prompts.templates import PROMPTS
+from llm.partial_json import string_fields
+
 # Импортируем RAG
 try:
     from rag.retriever import retrieve_context, search_similar
@@ -26,7 +36,7 @@ except ImportError:
         return []
 
 
-    def search_similar(query: str, k: int = 5) -> List[Dict]:
+    def search_similar(query: str, k: int = 5, **kwargs) -> List[Dict]:
         return []
 
 load_dotenv()
@@ -55,84 +65,26 @@ class PlanResult(BaseModel):
     rag_context_used: bool = False
 
 
+# Схема для структурированного ответа (LLM_STRUCTURED_OUTPUT)
+PLAN_FUNCTION = function_for(PlanResult, "submit_plan", "План подготовки к собеседованиям по неделям", fields={
+    "plan": "Цели по неделям",
+    "summary": "Обоснование плана",
+})
+
+
 # ===============================
 #  Основной класс Planner с RAG
 # ===============================
 class PlannerAgent:
     def __init__(self, use_rag: bool = True):
-        self.llm = GigaChat(
-            credentials=os.getenv("GIGACHAT_CLIENT_SECRET"),
-            verify_ssl_certs=False
-        )
+        # Общий на процесс клиент: один пул соединений и один токен на модель
+        self.llm = get_gigachat()
 
         self.use_rag = use_rag and RAG_AVAILABLE
 
-        # Промпты
-        self.planning_prompt_without_rag = """
-        Ты — AI-планировщик для подготовки к техническим собеседованиям.
-
-        Создай детальный план обучения на {weeks} недель для пользователя с описанием: "{user_text}"
-        Уровень: {level}
-        Направление: {track}
-
-        Формат ответа строго JSON:
-        {{
-          "plan": [
-            {{
-              "week": 1,
-              "title": "Название недели",
-              "description": "Описание целей недели",
-              "topics": ["тема1", "тема2"],
-              "tasks": ["задача1", "задача2"],
-              "resources": ["ресурс1", "ресурс2"],
-              "estimated_hours": 10,
-              "success_criteria": ["критерий1", "критерий2"]
-            }}
-          ],
-          "summary": "Краткое описание плана",
-          "total_weeks": {weeks},
-          "total_hours": 40,
-          "focus_areas": ["основная область 1", "основная область 2"]
-        }}
-        """
-
-        self.planning_prompt_with_rag = """
-        Ты — AI-планировщик с доступом к базе знаний о подготовке к собеседованиям.
-
-        КОНТЕКСТ ИЗ БАЗЫ ЗНАНИЙ (материалы, ресурсы, советы):
-        {rag_context}
-
-        Создай персонализированный план обучения на {weeks} недель.
-
-        Информация о пользователе:
-        - Описание: {user_text}
-        - Уровень: {level}
-        - Направление: {track}
-        - Цели: {goals}
-
-        Используй контекст из базы знаний для подбора актуальных ресурсов и тем.
-        План должен быть реалистичным и сфокусированным на слабых местах.
-
-        Формат ответа строго JSON:
-        {{
-          "plan": [
-            {{
-              "week": номер недели,
-              "title": "Название недели",
-              "description": "Детальное описание целей",
-              "topics": ["конкретные темы для изучения"],
-              "tasks": ["практические задачи и упражнения"],
-              "resources": ["ссылки на материалы из контекста или известные ресурсы"],
-              "estimated_hours": число часов,
-              "success_criteria": ["измеримые критерии успеха"]
-            }}
-          ],
-          "summary": "Детальное обоснование плана",
-          "total_weeks": {weeks},
-          "total_hours": общее количество часов,
-          "focus_areas": ["ключевые области для фокуса"]
-        }}
-        """
+        # Промпты из общего реестра (скомпилированы один раз)
+        self.planning_prompt_without_rag = PROMPTS.get("planner.plan")
+        self.planning_prompt_with_rag = PROMPTS.get("planner.plan_rag")
 
     def _get_rag_context_for_planning(self, user_text: str, level: str, track: str) -> Dict[str, str]:
         """Получает контекст из RAG для планирования"""
@@ -146,20 +98,21 @@ class PlannerAgent:
 
             # Поиск конкретных ресурсов
             resources_query = f"{track} книги курсы статьи"
-            resources_results = search_similar(resources_query, k=3)
+            resources_results = search_similar(resources_query, k=3, mmr=True)
 
-            resources_list = []
-            for result in resources_results:
-                text = result.get('text', '')
-                if "ресурс" in text.lower() or "курс" in text.lower() or "книга" in text.lower():
-                    resources_list.append(text[:150] + "...")
+            resources_list = [
+                result for result in resources_results
+                if any(word in result.get('text', '').lower() for word in ("ресурс", "курс", "книга"))
+            ]
+            # Ресурсы - в своем бюджете, самые близкие к запросу первыми
+            resources = assemble_context([result['text'] for result in resources_list],
+                                         token_budget("planner", "resources"), template="{chunk}",
+                                         scores=[result['similarity'] for result in resources_list])
 
             return {
-                "rag_context": "\n".join([
-                    f"📚 Материал {i + 1}: {chunk[:250]}..."
-                    for i, chunk in enumerate(context_chunks)
-                ]),
-                "resources": "\n".join(resources_list[:3]) if resources_list else "Нет специфических ресурсов"
+                "rag_context": assemble_context(context_chunks, token_budget("planner", "make_plan"),
+                                                template="📚 Материал {i}: {chunk}"),
+                "resources": resources or "Нет специфических ресурсов"
             }
 
         except Exception as e:
@@ -168,40 +121,11 @@ class PlannerAgent:
 
     def _extract_json(self, text: str) -> dict:
         """Безопасно извлекает JSON из ответа"""
-        # Очистка от Markdown
-        import re
-
-        if text.startswith("```json"):
-            text = text[7:].strip()
-        elif text.startswith("```"):
-            text = text[3:].strip()
-
-        if text.endswith("```"):
-            text = text[:-3].strip()
-
-        # Поиск JSON
-        json_match = re.search(r'\{.*\}', text, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group())
-            except:
-                pass
-
-        # Попытка распарсить весь текст
-        try:
-            return json.loads(text)
-        except:
-            raise ValueError("Не удалось извлечь JSON")
-
-    def make_plan(self, user_text: str, level: str = "junior",
-                  track: str = "backend", weeks: int = 4,
-                  goals: str = "") -> PlanResult:
-        """Создает план обучения"""
-
-        # Получаем контекст из RAG
-        rag_context = self._get_rag_context_for_planning(user_text, level, track)
+        return extract_json(text)
 
-        # Выбираем промпт
+    def _build_plan_prompt(self, user_text: str, level: str, track: str, weeks: int,
+                           goals: str, rag_context: Dict[str, str]) -> tuple:
+        """Выбирает и заполняет промпт, возвращает (prompt, rag_used)"""
         if self.use_rag and rag_context["rag_context"]:
             prompt = self.planning_prompt_with_rag.format(
                 user_text=user_text,
@@ -209,63 +133,115 @@ class PlannerAgent:
                 track=track,
                 weeks=weeks,
                 goals=goals,
-                rag_context=rag_context["rag_context"]
+                rag_context=rag_context["rag_context"],
+                resources=rag_context["resources"]
             )
-            rag_used = True
-        else:
-            prompt = self.planning_prompt_without_rag.format(
-                user_text=user_text,
-                level=level,
-                track=track,
-                weeks=weeks
-            )
-            rag_used = False
+            return prompt, True
+
+        prompt = self.planning_prompt_without_rag.format(
+            user_text=user_text,
+            level=level,
+            track=track,
+            weeks=weeks
+        )
+        return prompt, False
+
+    def _parse_plan(self, content: str, track: str, weeks: int, rag_used: bool) -> PlanResult:
+        """Разбирает ответ модели в PlanResult"""
+        data = self._extract_json(content)
+
+        # Создаем объекты LearningGoal
+        plan_items = []
+        for item_data in data.get("plan", []):
+            plan_items.append(LearningGoal(
+                week=item_data.get("week", 1),
+                title=item_data.get("title", f"Неделя {item_data.get('week', 1)}"),
+                description=item_data.get("description", ""),
+                topics=item_data.get("topics", []),
+                tasks=item_data.get("tasks", []),
+                resources=item_data.get("resources", []),
+                estimated_hours=item_data.get("estimated_hours", 10),
+                success_criteria=item_data.get("success_criteria", [])
+            ))
+
+        # Сортируем по неделям
+        plan_items.sort(key=lambda x: x.week)
+
+        return PlanResult(
+            plan=plan_items,
+            summary=data.get("summary", "План обучения создан"),
+            total_weeks=data.get("total_weeks", weeks),
+            total_hours=data.get("total_hours", weeks * 10),
+            focus_areas=data.get("focus_areas", [track, "алгоритмы", "системный дизайн"]),
+            rag_context_used=rag_used
+        )
+
+    def _fallback_plan_result(self, level: str, track: str, weeks: int) -> PlanResult:
+        """Базовый PlanResult на случай ошибки"""
+        fallback_plan = self._create_fallback_plan(level, track, weeks)
+
+        return PlanResult(
+            plan=fallback_plan,
+            summary=f"Базовый план для {track} разработчика уровня {level}",
+            total_weeks=weeks,
+            total_hours=weeks * 10,
+            focus_areas=[track, "базовые концепции", "практика"],
+            rag_context_used=False
+        )
+
+    @latency_budget("planner", "make_plan")
+    def make_plan(self, user_text: str, level: str = "junior",
+                  track: str = "backend", weeks: int = 4,
+                  goals: str = "") -> PlanResult:
+        """Создает план обучения"""
+
+        # Получаем контекст из RAG
+        rag_context = self._get_rag_context_for_planning(user_text, level, track)
+        prompt, rag_used = self._build_plan_prompt(user_text, level, track, weeks, goals, rag_context)
 
         try:
             # Генерируем план
-            response = self.llm.chat(prompt)
-            data = self._extract_json(response.choices[0].message.content)
-
-            # Создаем объекты LearningGoal
-            plan_items = []
-            for item_data in data.get("plan", []):
-                plan_items.append(LearningGoal(
-                    week=item_data.get("week", 1),
-                    title=item_data.get("title", f"Неделя {item_data.get('week', 1)}"),
-                    description=item_data.get("description", ""),
-                    topics=item_data.get("topics", []),
-                    tasks=item_data.get("tasks", []),
-                    resources=item_data.get("resources", []),
-                    estimated_hours=item_data.get("estimated_hours", 10),
-                    success_criteria=item_data.get("success_criteria", [])
-                ))
-
-            # Сортируем по неделям
-            plan_items.sort(key=lambda x: x.week)
-
-            return PlanResult(
-                plan=plan_items,
-                summary=data.get("summary", "План обучения создан"),
-                total_weeks=data.get("total_weeks", weeks),
-                total_hours=data.get("total_hours", weeks * 10),
-                focus_areas=data.get("focus_areas", [track, "алгоритмы", "системный дизайн"]),
-                rag_context_used=rag_used
-            )
-
+            content = complete(self.llm, prompt, agent="planner", method="make_plan", cache=True,
+                               validate=lambda c: self._extract_json(c)["plan"], function=PLAN_FUNCTION,
+                               priority=Priority.BATCH)
+            return self._parse_plan(content, track, weeks, rag_used)
         except Exception as e:
             print(f"❌ Ошибка создания плана: {e}")
+            return self._fallback_plan_result(level, track, weeks)
+
+    def _preview_plan(self, partial: str) -> str:
+        """HTML с уже сгенерированными неделями плана (пока идет генерация)"""
+        lines = ["🔄 <b>Составляю план обучения...</b>", ""]
+        for week, title in enumerate(string_fields(partial, "title", allow_partial=True), 1):
+            lines.append(f"📅 <b>Неделя {week}:</b> {html.escape(title)}")
+        return "\n".join(lines)
+
+    @latency_budget("planner", "make_plan")
+    async def amake_plan(self, user_text: str, level: str = "junior",
+                         track: str = "backend", weeks: int = 4,
+                         goals: str = "",
+                         on_progress: Optional[Callable[[str], Awaitable[None]]] = None) -> PlanResult:
+        """
+        Асинхронная версия make_plan, не блокирует event loop
 
-            # Fallback план
-            fallback_plan = self._create_fallback_plan(level, track, weeks)
+        on_progress получает HTML-превью плана по мере генерации.
+        """
+        async def progress(partial: str):
+            await on_progress(self._preview_plan(partial))
 
-            return PlanResult(
-                plan=fallback_plan,
-                summary=f"Базовый план для {track} разработчика уровня {level}",
-                total_weeks=weeks,
-                total_hours=weeks * 10,
-                focus_areas=[track, "базовые концепции", "практика"],
-                rag_context_used=False
-            )
+        rag_context = await run_rag(self._get_rag_context_for_planning, user_text, level, track,
+                                    default={"rag_context": "", "resources": ""})
+        prompt, rag_used = self._build_plan_prompt(user_text, level, track, weeks, goals, rag_context)
+
+        try:
+            content = await acomplete(self.llm, prompt, agent="planner", method="make_plan", cache=True,
+                                      validate=lambda c: self._extract_json(c)["plan"], function=PLAN_FUNCTION,
+                                      priority=Priority.BATCH,
+                                      on_progress=progress if on_progress else None)
+            return self._parse_plan(content, track, weeks, rag_used)
+        except Exception as e:
+            print(f"❌ Ошибка создания плана: {e}")
+            return self._fallback_plan_result(level, track, weeks)
 
     def _create_fallback_plan(self, level: str, track: str, weeks: int) -> List[LearningGoal]:
         """Создает базовый план на случай ошибки"""
@@ -315,36 +291,50 @@ class PlannerAgent:
 
         return plans
 
+    def _build_adjust_prompt(self, original_plan: PlanResult, feedback: str) -> str:
+        """Промпт для корректировки плана"""
+        plan_json = json.dumps([goal.dict() for goal in original_plan.plan], indent=2, ensure_ascii=False)
+        return PROMPTS.render("planner.adjust", plan_json=plan_json, feedback=feedback)
+
+    def _parse_adjusted_plan(self, content: str, original_plan: PlanResult) -> PlanResult:
+        """Разбирает скорректированный план"""
+        data = self._extract_json(content)
+
+        plan_items = []
+        for item_data in data.get("plan", []):
+            plan_items.append(LearningGoal(**item_data))
+
+        return PlanResult(
+            plan=plan_items,
+            summary=data.get("summary", "Скорректированный план"),
+            total_weeks=data.get("total_weeks", original_plan.total_weeks),
+            total_hours=data.get("total_hours", original_plan.total_hours),
+            focus_areas=data.get("focus_areas", original_plan.focus_areas),
+            rag_context_used=original_plan.rag_context_used
+        )
+
+    @latency_budget("planner", "adjust_plan")
     def adjust_plan(self, original_plan: PlanResult, feedback: str) -> PlanResult:
         """Корректирует план на основе фидбека"""
-        prompt = f"""
-        Исходный план обучения:
-        {json.dumps([goal.dict() for goal in original_plan.plan], indent=2, ensure_ascii=False)}
-
-        Фидбек пользователя: {feedback}
+        prompt = self._build_adjust_prompt(original_plan, feedback)
 
-        Скорректируй план с учетом фидбека. Сохрани общую структуру.
+        try:
+            content = complete(self.llm, prompt, agent="planner", method="adjust_plan",
+                               priority=Priority.BATCH)
+            return self._parse_adjusted_plan(content, original_plan)
+        except Exception as e:
+            print(f"❌ Ошибка корректировки плана: {e}")
+            return original_plan
 
-        Формат ответа такой же JSON как в исходном плане.
-        """
+    @latency_budget("planner", "adjust_plan")
+    async def aadjust_plan(self, original_plan: PlanResult, feedback: str) -> PlanResult:
+        """Асинхронная версия adjust_plan"""
+        prompt = self._build_adjust_prompt(original_plan, feedback)
 
         try:
-            response = self.llm.chat(prompt)
-            data = self._extract_json(response.choices[0].message.content)
-
-            plan_items = []
-            for item_data in data.get("plan", []):
-                plan_items.append(LearningGoal(**item_data))
-
-            return PlanResult(
-                plan=plan_items,
-                summary=data.get("summary", "Скорректированный план"),
-                total_weeks=data.get("total_weeks", original_plan.total_weeks),
-                total_hours=data.get("total_hours", original_plan.total_hours),
-                focus_areas=data.get("focus_areas", original_plan.focus_areas),
-                rag_context_used=original_plan.rag_context_used
-            )
-
+            content = await acomplete(self.llm, prompt, agent="planner", method="adjust_plan",
+                                      priority=Priority.BATCH)
+            return self._parse_adjusted_plan(content, original_plan)
         except Exception as e:
             print(f"❌ Ошибка корректировки плана: {e}")
             return original_plan
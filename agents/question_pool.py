@@ -0,0 +1,179 @@
+# agents/question_pool.py
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[str, str, str]
+QuestionSet = List[Dict[str, Any]]
+
+
+def pool_key(topic: str, level: str, track: Optional[str]) -> PoolKey:
+    """Ключ пула: (тема, уровень, направление) без учета регистра"""
+    return topic.strip().lower(), level.strip().lower(), (track or "general").strip().lower()
+
+
+def set_id_of(questions: QuestionSet) -> str:
+    """Идентификатор набора по тексту вопросов: одинаковые наборы не храним дважды"""
+    raw = json.dumps([q.get("question", "") for q in questions], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class QuestionPool:
+    """
+    Заранее сгенерированные наборы вопросов интервью
+
+    Для каждой связки (тема, уровень, направление) держим до target наборов.
+    take отдает набор, который пользователь еще не видел; набор уходит
+    из пула после max_serves выдач. Когда свободных наборов меньше low_water,
+    пул пополняется в фоне (generate - вызов LLM с фоновым приоритетом).
+    """
+
+    def __init__(self, generate: Callable[[str, str, str], Awaitable[QuestionSet]],
+                 target: int = 4, low_water: int = 2, max_serves: int = 20,
+                 max_users: int = 10000, max_attempts: int = 3):
+        self.generate = generate
+        self.target = max(1, target)
+        self.low_water = min(low_water, self.target)
+        self.max_serves = max(1, max_serves)
+        self.max_users = max_users
+        self.max_attempts = max_attempts
+
+        self._sets: Dict[PoolKey, "OrderedDict[str, Dict[str, Any]]"] = {}
+        self._served: "OrderedDict[str, Set[str]]" = OrderedDict()
+        self._refilling: Set[PoolKey] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "generated": 0, "duplicates": 0, "failures": 0}
+
+    # ---------- выдача ----------
+
+    def take(self, topic: str, level: str, track: Optional[str] = None,
+             user_id: Optional[str] = None) -> Optional[QuestionSet]:
+        """Набор вопросов, который пользователь еще не получал, или None (промах)"""
+        key = pool_key(topic, level, track)
+        with self._lock:
+            sets = self._sets.setdefault(key, OrderedDict())
+            seen = self._served.get(str(user_id), set()) if user_id is not None else set()
+            set_id = next((sid for sid in sets if sid not in seen), None)
+
+            if set_id is None:
+                self.stats["misses"] += 1
+                questions = None
+            else:
+                self.stats["hits"] += 1
+                entry = sets[set_id]
+                entry["serves"] += 1
+                questions = entry["questions"]
+                if entry["serves"] >= self.max_serves:
+                    del sets[set_id]
+                else:
+                    sets.move_to_end(set_id)  # нагрузку размазываем по всем наборам
+                self._mark_served(user_id, set_id)
+            low = len(sets) < self.low_water
+
+        if low:
+            self.schedule_refill(topic, level, track)
+        return [dict(q) for q in questions] if questions is not None else None
+
+    def put(self, topic: str, level: str, track: Optional[str], questions: QuestionSet,
+            user_id: Optional[str] = None) -> bool:
+        """
+        Кладет набор в пул (например, сгенерированный при промахе)
+
+        Если передан user_id, набор сразу считается выданным этому пользователю.
+        Returns:
+            False, если такой набор уже есть или пул полон
+        """
+        if not questions:
+            return False
+        key = pool_key(topic, level, track)
+        set_id = set_id_of(questions)
+        with self._lock:
+            self._mark_served(user_id, set_id)
+            sets = self._sets.setdefault(key, OrderedDict())
+            if set_id in sets:
+                self.stats["duplicates"] += 1
+                return False
+            if len(sets) >= self.target:
+                return False
+            sets[set_id] = {"questions": [dict(q) for q in questions], "serves": 1 if user_id is not None else 0}
+            return True
+
+    def _mark_served(self, user_id: Optional[str], set_id: str):
+        if user_id is None:
+            return
+        user_id = str(user_id)
+        self._served.setdefault(user_id, set()).add(set_id)
+        self._served.move_to_end(user_id)
+        while len(self._served) > self.max_users:
+            self._served.popitem(last=False)
+
+    def available(self, topic: str, level: str, track: Optional[str] = None) -> int:
+        with self._lock:
+            return len(self._sets.get(pool_key(topic, level, track), ()))
+
+    # ---------- пополнение ----------
+
+    def schedule_refill(self, topic: str, level: str, track: Optional[str] = None):
+        """Запускает фоновое пополнение; вне event loop (синхронный путь) ничего не делает"""
+        key = pool_key(topic, level, track)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        with self._lock:
+            if key in self._refilling:
+                return
+            self._refilling.add(key)
+        task = loop.create_task(self._refill(key, topic, level, track or "general"))
+        self._tasks.add(task)  # держим ссылку, иначе задачу может собрать GC
+        task.add_done_callback(self._tasks.discard)
+
+    async def refill(self, topic: str, level: str, track: Optional[str] = None):
+        """Пополняет пул до target наборов"""
+        key = pool_key(topic, level, track)
+        with self._lock:
+            if key in self._refilling:
+                return
+            self._refilling.add(key)
+        await self._refill(key, topic, level, track or "general")
+
+    async def _refill(self, key: PoolKey, topic: str, level: str, track: str):
+        attempts = 0
+        try:
+            while self.available(topic, level, track) < self.target and attempts < self.max_attempts:
+                attempts += 1
+                try:
+                    questions = await self.generate(topic, level, track)
+                except Exception as e:
+                    self.stats["failures"] += 1
+                    logger.warning(f"⚠️  Не удалось пополнить пул вопросов {key}: {e}")
+                    continue
+                if self.put(topic, level, track, questions):
+                    self.stats["generated"] += 1
+                    attempts = 0
+        finally:
+            with self._lock:
+                self._refilling.discard(key)
+
+    async def warm(self, combos: Iterable[Tuple[str, str, str]]):
+        """Заполняет пулы популярных связок при старте бота"""
+        for topic, level, track in combos:
+            await self.refill(topic, level, track)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": self.stats["hits"] / requests if requests else 0.0,
+                "pools": len(self._sets),
+                "sets": sum(len(s) for s in self._sets.values()),
+                "refilling": len(self._refilling),
+            }
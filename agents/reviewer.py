@@ -1,20 +1,29 @@
 # agents/reviewer_agent.py
-import json
+import html
 import sys
 from pathlib import Path
 from pydantic import BaseModel
-from gigachat import GigaChat
 from dotenv import load_dotenv
 import os
-from typing import List, Optional, Dict
-import re
+from typing import Awaitable, Callable, List, Optional, Dict
 
 # Добавляем путь для импорта RAG
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
+from llm.registry import get_gigachat
+from llm.gateway import complete, acomplete
+from llm.scheduler import Priority
+from llm.deadline import latency_budget, run_rag
+from llm.json_parser import extract_json
+from llm.structured import function_for
+from llm.tokens import count_tokens
+from rag.context import assemble_context, token_budget
+from prompts.templates import PROMPTS
+from llm.partial_json import string_fields
+
 # Импортируем RAG
 try:
-    from rag.retriever import retrieve_context, search_similar
+    from rag.retriever import retrieve_many
 
     RAG_AVAILABLE = True
 except ImportError:
@@ -22,12 +31,8 @@ except ImportError:
     RAG_AVAILABLE = False
 
 
-    def retrieve_context(query: str, k: int = 4) -> List[str]:
-        return []
-
-
-    def search_similar(query: str, k: int = 5) -> List[Dict]:
-        return []
+    def retrieve_many(queries: List[str], k=3, filters=None) -> List[List[str]]:
+        return [[] for _ in queries]
 
 load_dotenv()
 
@@ -55,89 +60,40 @@ class ReviewResult(BaseModel):
     rag_context_used: bool = False
 
 
+# Схема для структурированного ответа (LLM_STRUCTURED_OUTPUT)
+REVIEW_FUNCTION = function_for(ReviewResult, "submit_review", "Результат code review", fields={
+    "summary": "Общая оценка кода",
+    "score": "Оценка от 0 до 100",
+    "follow_up": "Уточняющий вопрос",
+})
+
+
 # ===============================
 #  Основной класс Reviewer с RAG
 # ===============================
 class ReviewerAgent:
+    QUICK_FEEDBACK_FALLBACK = "Код выглядит работоспособным. Рекомендую добавить комментарии и обработку ошибок."
+
+    NO_CODE_MESSAGE = """
+                ❌ **Код не найден или слишком короткий**
+
+                Пожалуйста, отправьте код в формате:
+                ```
+                ваш код здесь
+                ```
+
+                Или опишите задачу и приложите код в том же сообщении.
+                """
+
     def __init__(self, use_rag: bool = True):
-        self.llm = GigaChat(
-            credentials=os.getenv("GIGACHAT_CLIENT_SECRET"),
-            verify_ssl_certs=False
-        )
+        # Общий на процесс клиент: один пул соединений и один токен на модель
+        self.llm = get_gigachat()
 
         self.use_rag = use_rag and RAG_AVAILABLE
 
-        # Промпты
-        self.review_prompt_without_rag = """
-        Ты — Senior Code Reviewer. Проведи строгое ревью кода.
-
-        Язык: {language}
-        Контекст задачи: {context}
-
-        Код:
-        {code}
-
-        Проанализируй по критериям:
-        1. Корректность и баги
-        2. Производительность и оптимизация
-        3. Читаемость и стиль
-        4. Архитектура и дизайн
-        5. Безопасность (если применимо)
-
-        Формат ответа строго JSON:
-        {{
-          "summary": "общая оценка кода",
-          "issues": [
-            {{
-              "type": "bug|style|performance|security|architecture|best_practice",
-              "line": номер строки или null,
-              "description": "описание проблемы",
-              "recommendation": "как исправить",
-              "severity": "low|medium|high|critical"
-            }}
-          ],
-          "score": 0-100,
-          "follow_up": "уточняющий вопрос",
-          "strengths": ["сильная сторона 1", "сильная сторона 2"],
-          "improvements": ["общее улучшение 1", "общее улучшение 2"]
-        }}
-        """
-
-        self.review_prompt_with_rag = """
-        Ты — Senior Code Reviewer с доступом к базе знаний о лучших практиках.
-
-        КОНТЕКСТ ИЗ БАЗЫ ЗНАНИЙ (лучшие практики, антипаттерны, примеры):
-        {rag_context}
-
-        Язык: {language}
-        Контекст задачи: {context}
-
-        Код для ревью:
-        {code}
-
-        Проведи детальный анализ кода с использованием контекста из базы знаний.
-        Ищи не только ошибки, но и возможности для улучшения в соответствии с best practices.
-
-        Формат ответа строго JSON:
-        {{
-          "summary": "детальная оценка с ссылками на best practices",
-          "issues": [
-            {{
-              "type": "тип проблемы",
-              "line": номер строки,
-              "description": "детальное описание с объяснением почему это проблема",
-              "recommendation": "конкретное исправление с примером",
-              "severity": "low|medium|high|critical",
-              "code_snippet": "фрагмент проблемного кода"
-            }}
-          ],
-          "score": 0-100,
-          "follow_up": "вопрос для углубленного анализа",
-          "strengths": ["что хорошо сделано"],
-          "improvements": ["общие рекомендации по архитектуре"],
-          "similar_solutions": ["похожие подходы или паттерны"]
-        }}
-        """
+        # Промпты из общего реестра (скомпилированы один раз)
+        self.review_prompt_without_rag = PROMPTS.get("reviewer.review")
+        self.review_prompt_with_rag = PROMPTS.get("reviewer.review_rag")
 
     def _get_rag_context_for_review(self, code: str, language: str, context: str) -> Dict[str, str]:
         """Получает контекст из RAG для code review"""
@@ -146,44 +102,41 @@ class ReviewerAgent:
 
         try:
             # Извлекаем ключевые слова из кода и контекста
-            keywords = self._extract_keywords_from_code(code, language)
-
-            # Ищем лучшие практики по языку
-            query = f"{language} best practices code review patterns"
-            context_chunks = retrieve_context(query, k=4)
+            keywords = self._extract_keywords_from_code(code, language)[:3]
 
-            # Ищем похожие решения
-            similar_solutions = []
-            if keywords:
-                for keyword in keywords[:3]:
-                    similar = search_similar(f"{keyword} {language} решение", k=1)
-                    for result in similar:
-                        similar_solutions.append(result.get('text', '')[:200] + "...")
-
-            # Ищем антипаттерны
-            anti_patterns_query = f"{language} anti-patterns common mistakes"
-            anti_patterns = retrieve_context(anti_patterns_query, k=2)
+            # Лучшие практики, антипаттерны и похожие решения - одним поиском
+            queries = [f"{language} best practices code review patterns",
+                       f"{language} anti-patterns common mistakes"]
+            queries += [f"{keyword} {language} решение" for keyword in keywords]
+            context_chunks, anti_patterns, *similar = retrieve_many(queries, k=[4, 2] + [1] * len(keywords))
 
             combined_context = []
 
-            if context_chunks:
+            # Две трети бюджета - практикам, остаток - ошибкам; повторы между секциями выкидываем
+            budget = token_budget("reviewer", "review")
+            seen = set()
+            practices = assemble_context(context_chunks, budget * 2 // 3, template="{i}. {chunk}", seen=seen)
+            if practices:
                 combined_context.append("📚 **Лучшие практики:**")
-                for i, chunk in enumerate(context_chunks):
-                    combined_context.append(f"{i + 1}. {chunk[:250]}...")
+                combined_context.append(practices)
 
-            if anti_patterns:
+            mistakes = assemble_context(anti_patterns, budget - count_tokens(practices),
+                                        template="{i}. {chunk}", seen=seen)
+            if mistakes:
                 combined_context.append("\n⚠️  **Распространенные ошибки:**")
-                for i, chunk in enumerate(anti_patterns):
-                    combined_context.append(f"{i + 1}. {chunk[:250]}...")
+                combined_context.append(mistakes)
 
+            # Похожие решения - в своем бюджете, без повторов практик и ошибок
+            similar_solutions = assemble_context([text for found in similar for text in found][:2],
+                                                 token_budget("reviewer", "similar"),
+                                                 template="{i}. {chunk}", seen=seen)
             if similar_solutions:
                 combined_context.append("\n🔍 **Похожие решения:**")
-                for i, solution in enumerate(similar_solutions[:2]):
-                    combined_context.append(f"{i + 1}. {solution}")
+                combined_context.append(similar_solutions)
 
             return {
                 "rag_context": "\n".join(combined_context) if combined_context else "Нет релевантного контекста",
-                "similar_patterns": "\n".join(similar_solutions) if similar_solutions else ""
+                "similar_patterns": similar_solutions
             }
 
         except Exception as e:
@@ -238,36 +191,11 @@ class ReviewerAgent:
 
     def _extract_json(self, text: str) -> dict:
         """Извлекает JSON из ответа"""
-        # Очистка
-        if text.startswith("```json"):
-            text = text[7:].strip()
-        elif text.startswith("```"):
-            text = text[3:].strip()
-
-        if text.endswith("```"):
-            text = text[:-3].strip()
-
-        # Поиск JSON
-        json_match = re.search(r'\{.*\}', text, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group())
-            except:
-                pass
-
-        # Попытка распарсить весь текст
-        try:
-            return json.loads(text)
-        except:
-            raise ValueError("Не удалось извлечь JSON")
-
-    def review(self, code: str, context: str = "", language: str = "python") -> ReviewResult:
-        """Проводит code review"""
+        return extract_json(text)
 
-        # Получаем контекст из RAG
-        rag_context = self._get_rag_context_for_review(code, language, context)
-
-        # Выбираем промпт
+    def _build_review_prompt(self, code: str, context: str, language: str,
+                             rag_context: Dict[str, str]) -> tuple:
+        """Выбирает и заполняет промпт, возвращает (prompt, rag_used)"""
         if self.use_rag and rag_context["rag_context"] and "Лучшие практики" in rag_context["rag_context"]:
             prompt = self.review_prompt_with_rag.format(
                 code=code,
@@ -275,55 +203,105 @@ class ReviewerAgent:
                 language=language,
                 rag_context=rag_context["rag_context"]
             )
-            rag_used = True
-        else:
-            prompt = self.review_prompt_without_rag.format(
-                code=code,
-                context=context,
-                language=language
-            )
-            rag_used = False
+            return prompt, True
 
-        try:
-            response = self.llm.chat(prompt)
-            data = self._extract_json(response.choices[0].message.content)
-
-            # Создаем объекты Issue
-            issues = []
-            for issue_data in data.get("issues", []):
-                issues.append(Issue(
-                    type=issue_data.get("type", "style"),
-                    line=issue_data.get("line"),
-                    description=issue_data.get("description", ""),
-                    recommendation=issue_data.get("recommendation", ""),
-                    severity=issue_data.get("severity", "medium"),
-                    code_snippet=issue_data.get("code_snippet")
-                ))
-
-            return ReviewResult(
-                summary=data.get("summary", "Review completed"),
-                issues=issues,
-                score=data.get("score", 50),
-                follow_up=data.get("follow_up", "Any specific concerns?"),
-                strengths=data.get("strengths", []),
-                improvements=data.get("improvements", []),
-                similar_solutions=data.get("similar_solutions", []),
-                rag_context_used=rag_used
-            )
+        prompt = self.review_prompt_without_rag.format(
+            code=code,
+            context=context,
+            language=language
+        )
+        return prompt, False
+
+    def _parse_review(self, content: str, rag_used: bool) -> ReviewResult:
+        """Разбирает ответ модели в ReviewResult"""
+        data = self._extract_json(content)
+
+        # Создаем объекты Issue
+        issues = []
+        for issue_data in data.get("issues", []):
+            issues.append(Issue(
+                type=issue_data.get("type", "style"),
+                line=issue_data.get("line"),
+                description=issue_data.get("description", ""),
+                recommendation=issue_data.get("recommendation", ""),
+                severity=issue_data.get("severity", "medium"),
+                code_snippet=issue_data.get("code_snippet")
+            ))
+
+        return ReviewResult(
+            summary=data.get("summary", "Review completed"),
+            issues=issues,
+            score=data.get("score", 50),
+            follow_up=data.get("follow_up", "Any specific concerns?"),
+            strengths=data.get("strengths", []),
+            improvements=data.get("improvements", []),
+            similar_solutions=data.get("similar_solutions", []),
+            rag_context_used=rag_used
+        )
+
+    def _fallback_review(self) -> ReviewResult:
+        """Basic fallback analysis"""
+        return ReviewResult(
+            summary="Basic code analysis completed",
+            issues=[],
+            score=50,
+            follow_up="Could you provide more context about this code?",
+            strengths=["Code structure is readable"],
+            improvements=["Add more comments", "Consider error handling"],
+            rag_context_used=False
+        )
 
+    @latency_budget("reviewer", "review")
+    def review(self, code: str, context: str = "", language: str = "python") -> ReviewResult:
+        """Проводит code review"""
+
+        # Получаем контекст из RAG
+        rag_context = self._get_rag_context_for_review(code, language, context)
+        prompt, rag_used = self._build_review_prompt(code, context, language, rag_context)
+
+        try:
+            content = complete(self.llm, prompt, agent="reviewer", method="review",
+                               validate=lambda c: self._parse_review(c, False), function=REVIEW_FUNCTION,
+                               priority=Priority.BATCH)
+            return self._parse_review(content, rag_used)
         except Exception as e:
             print(f"❌ Ошибка code review: {e}")
+            return self._fallback_review()
+
+    def _preview_review(self, partial: str) -> str:
+        """HTML с уже найденными замечаниями (пока идет генерация)"""
+        lines = ["🔎 <b>Анализирую код...</b>", ""]
+        summary = string_fields(partial, "summary", allow_partial=True)
+        if summary:
+            lines.append(f"📝 {html.escape(summary[0])}")
+        for description in string_fields(partial, "description"):
+            lines.append(f"⚠️ {html.escape(description)}")
+        return "\n".join(lines)
+
+    @latency_budget("reviewer", "review")
+    async def areview(self, code: str, context: str = "", language: str = "python",
+                      on_progress: Optional[Callable[[str], Awaitable[None]]] = None) -> ReviewResult:
+        """
+        Асинхронная версия review, не блокирует event loop
 
-            # Basic fallback analysis
-            return ReviewResult(
-                summary="Basic code analysis completed",
-                issues=[],
-                score=50,
-                follow_up="Could you provide more context about this code?",
-                strengths=["Code structure is readable"],
-                improvements=["Add more comments", "Consider error handling"],
-                rag_context_used=False
-            )
+        on_progress получает HTML-превью ревью по мере генерации.
+        """
+        async def progress(partial: str):
+            await on_progress(self._preview_review(partial))
+
+        rag_context = await run_rag(self._get_rag_context_for_review, code, language, context,
+                                    default={"rag_context": "", "similar_patterns": ""})
+        prompt, rag_used = self._build_review_prompt(code, context, language, rag_context)
+
+        try:
+            content = await acomplete(self.llm, prompt, agent="reviewer", method="review",
+                                      validate=lambda c: self._parse_review(c, False), function=REVIEW_FUNCTION,
+                                      priority=Priority.BATCH,
+                                      on_progress=progress if on_progress else None)
+            return self._parse_review(content, rag_used)
+        except Exception as e:
+            print(f"❌ Ошибка code review: {e}")
+            return self._fallback_review()
 
     def extract_code_from_message(self, message: str) -> dict:
         """Извлекает код из сообщения пользователя"""
@@ -466,16 +444,7 @@ class ReviewerAgent:
             extracted = self.extract_code_from_message(message)
 
             if not extracted["code"] or len(extracted["code"].strip()) < 10:
-                return """
-                ❌ **Код не найден или слишком короткий**
-
-                Пожалуйста, отправьте код в формате:
-                ```
-                ваш код здесь
-                ```
-
-                Или опишите задачу и приложите код в том же сообщении.
-                """
+                return self.NO_CODE_MESSAGE
 
             # Проводим ревью
             review_result = self.review(
@@ -491,19 +460,50 @@ class ReviewerAgent:
             print(f"❌ Ошибка в process_message: {e}")
             return "❌ Произошла ошибка при анализе кода. Пожалуйста, проверьте формат и попробуйте еще раз."
 
+    async def aprocess_message(self, message: str,
+                               on_progress: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+        """Асинхронная версия process_message (on_progress - превью ревью, см. areview)"""
+        try:
+            extracted = self.extract_code_from_message(message)
+
+            if not extracted["code"] or len(extracted["code"].strip()) < 10:
+                return self.NO_CODE_MESSAGE
+
+            review_result = await self.areview(
+                code=extracted["code"],
+                context=extracted["context"],
+                language=extracted["language"],
+                on_progress=on_progress
+            )
+
+            return self.format_review_response(review_result)
+
+        except Exception as e:
+            print(f"❌ Ошибка в process_message: {e}")
+            return "❌ Произошла ошибка при анализе кода. Пожалуйста, проверьте формат и попробуйте еще раз."
+
+    def _build_quick_feedback_prompt(self, code: str, language: str) -> str:
+        """Промпт для быстрой обратной связи"""
+        return PROMPTS.render("reviewer.quick_feedback", language=language, code=code[:500])
+
+    @latency_budget("reviewer", "get_quick_feedback")
     def get_quick_feedback(self, code: str, language: str = "python") -> str:
         """Быстрая обратная связь по коду (без детального анализа)"""
-        prompt = f"""
-        Дай быструю обратную связь по коду (максимум 3 предложения):
+        prompt = self._build_quick_feedback_prompt(code, language)
 
-        Язык: {language}
-        Код: {code[:500]}...
+        try:
+            return complete(self.llm, prompt, agent="reviewer", method="get_quick_feedback", cache=True,
+                            priority=Priority.INTERACTIVE)
+        except:
+            return self.QUICK_FEEDBACK_FALLBACK
 
-        Ответь одним абзацем.
-        """
+    @latency_budget("reviewer", "get_quick_feedback")
+    async def aget_quick_feedback(self, code: str, language: str = "python") -> str:
+        """Асинхронная версия get_quick_feedback"""
+        prompt = self._build_quick_feedback_prompt(code, language)
 
         try:
-            response = self.llm.chat(prompt)
-            return response.choices[0].message.content
+            return await acomplete(self.llm, prompt, agent="reviewer", method="get_quick_feedback", cache=True,
+                                   priority=Priority.INTERACTIVE)
         except:
-            return "Код выглядит работоспособным. Рекомендую добавить комментарии и обработку ошибок."
\ No newline at end of file
+            return self.QUICK_FEEDBACK_FALLBACK
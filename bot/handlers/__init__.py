@@ -1,4 +1,5 @@
 # bot/handlers/__init__.py
+import html
 import logging
 from aiogram import Router, Dispatcher, types, F
 from aiogram.filters import Command, StateFilter
@@ -7,6 +8,7 @@ from aiogram.enums import ParseMode
 from aiogram.utils.keyboard import ReplyKeyboardBuilder
 
 from ..states import UserStates
+from ..streaming import StreamingMessage
 from .general import router as general_router
 
 # ДОБАВИТЬ после импортов:
@@ -184,8 +186,8 @@ async def process_plan_time(
         await state.clear()
         return
 
-    # Сообщаем о начале создания плана
-    await message.answer(
+    # Сообщаем о начале создания плана (это сообщение потом дописывается по мере генерации)
+    status_message = await message.answer(
         f"🔄 <b>Создаю персонализированный план...</b>\n\n"
         f"📚 <b>Тема:</b> {topic}\n"
         f"📊 <b>Уровень:</b> {level}\n"
@@ -194,6 +196,7 @@ async def process_plan_time(
         parse_mode=ParseMode.HTML,
         reply_markup=types.ReplyKeyboardRemove()
     )
+    stream = StreamingMessage(status_message)
 
     try:
         # Получаем уровень в формате для planner (junior/middle/senior)
@@ -217,7 +220,17 @@ async def process_plan_time(
 
         # Создаем план через PlannerAgent
         # Проверяем какой метод есть у planner
-        if hasattr(planner, 'make_plan'):
+        if hasattr(planner, 'amake_plan'):
+            # Асинхронная генерация не блокирует event loop, недели показываем по мере готовности
+            plan_result = await planner.amake_plan(
+                user_text=topic,
+                level=level_for_planner,
+                track="general",  # общее направление
+                weeks=weeks,
+                goals=f"Изучить {topic} за {weeks} недель",
+                on_progress=stream.update
+            )
+        elif hasattr(planner, 'make_plan'):
             # Если метод называется make_plan
             plan_result = planner.make_plan(
                 user_text=topic,
@@ -265,6 +278,14 @@ async def process_plan_time(
 <b>Хотите сохранить этот план?</b>
 """
 
+            # Итоговый список недель - вместо превью
+            weeks_lines = [
+                f"📅 <b>Неделя {item.get('week', i)}:</b> {html.escape(str(item.get('title', '')))}"
+                for i, item in enumerate(plan_data.get('plan', []), 1)
+            ]
+            await stream.finish("📋 <b>План по неделям:</b>\n\n" + "\n".join(weeks_lines) if weeks_lines
+                                else "✅ <b>План обучения создан!</b>")
+
             # Сохраняем план в состоянии
             await state.update_data(
                 plan_content=str(plan_result),
@@ -290,6 +311,7 @@ async def process_plan_time(
 
 <b>Хотите сохранить этот план?</b>
 """
+            await stream.finish("✅ <b>План обучения создан!</b>")
 
             await state.update_data(
                 plan_content=response,
@@ -317,6 +339,9 @@ async def process_plan_time(
         import traceback
         traceback.print_exc()
 
+        # Недописанное превью заменяем, чтобы оно не осталось обрезанным
+        await stream.finish("⚠️ <b>Не удалось сгенерировать план</b> - показываю базовый")
+
         # Fallback ответ
         response = f"""
 ✅ <b>План по изучению {topic}</b>
@@ -84,6 +84,13 @@ async def process_skills_description(
         # Проверяем какие методы есть у твоего AssessorAgent
         if hasattr(assessor, 'create_assessment'):
             assessment = assessor.create_assessment(user_text, level, track)
+        elif hasattr(assessor, 'aassess'):
+            # Асинхронная оценка не блокирует остальные чаты
+            assessment = await assessor.aassess(
+                answer=user_text,
+                topics=["программирование", track, "алгоритмы"],
+                user_context={'level': level, 'track': track}
+            )
         elif hasattr(assessor, 'assess'):
             # Если метод называется assess
             assessment = assessor.assess(
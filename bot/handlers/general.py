@@ -85,23 +85,26 @@ async def handle_assessment(message: Message, user_text: str, context: dict, rou
         track = context.get('track', 'backend')
 
         try:
-            # Создаем оценку
-            assessment = assessor.create_assessment(user_text, level, track)
+            # Создаем оценку без блокировки event loop
+            assessment = await assessor.aassess(
+                answer=user_text,
+                topics=["программирование", track, "алгоритмы"],
+                user_context={'level': level, 'track': track}
+            )
 
             # Форматируем ответ
             response = f"📊 Оценка ваших навыков:\n\n"
-            response += f"🎯 Уровень: {assessment.level}\n"
-            response += f"📈 Уверенность: {assessment.confidence * 100:.0f}%\n\n"
-
-            if assessment.recommendations:
-                response += "📝 Рекомендации:\n"
-                for i, rec in enumerate(assessment.recommendations[:3], 1):
-                    response += f"{i}. {rec}\n"
-
-            if assessment.next_steps:
-                response += "\n⏱️ Следующие шаги:\n"
-                for i, step in enumerate(assessment.next_steps[:3], 1):
-                    response += f"{i}. {step}\n"
+            readiness = assessment.scores.get('interview_readiness')
+            if readiness is not None:
+                response += f"🎯 Готовность к собеседованию: {readiness}/100\n\n"
+
+            if assessment.weak_topics:
+                response += "📝 Области для улучшения:\n"
+                for i, topic in enumerate(assessment.weak_topics[:3], 1):
+                    response += f"{i}. {topic}\n"
+
+            if assessment.follow_up:
+                response += f"\n⏱️ Следующий шаг: {assessment.follow_up}\n"
 
             await message.answer(response)
 
@@ -5,6 +5,8 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message, ReplyKeyboardRemove
 
+from llm import config
+
 router = Router()
 
 
@@ -23,6 +25,10 @@ async def cmd_interview(
 
     user, db = get_or_create_user(message)
 
+    # /interview exam - ответы без промежуточных оценок, одна проверка в конце
+    args = (message.text or "").split()[1:]
+    mode = "exam" if "exam" in args else "live" if "live" in args else config.INTERVIEW_MODE
+
     # Создаем сессию
     session = SessionRepository.create_session(
         db=db,
@@ -37,9 +43,10 @@ async def cmd_interview(
 
     # Сохраняем в состоянии
     await state.update_data(
-        interview_session_id=session.id,
+        interview_session_id=str(session.id),
         current_question=0,
-        total_questions=3
+        total_questions=3,
+        interview_mode=mode
     )
 
     # Генерируем вопросы
@@ -48,10 +55,13 @@ async def cmd_interview(
 
     try:
         # Генерация вопросов через агента
-        interview_session = agents["interviewer"].start_interview(
+        interview_session = await agents["interviewer"].astart_interview(
             user.current_track,
             user.current_level,
-            session.id
+            user_context={"user_id": message.from_user.id, "level": user.current_level,
+                          "track": user.current_track},
+            session_id=str(session.id),
+            mode=mode
         )
 
         if interview_session and interview_session.questions:
@@ -105,11 +115,15 @@ async def process_interview_answer(
 
     user, db = get_or_create_user(message)
 
+    if data.get('interview_mode') == "exam":
+        await process_exam_answer(message, state, agents, session_id, current_idx, questions)
+        return
+
     # Оцениваем ответ
     await message.answer("📊 Оцениваю ответ...")
 
     try:
-        score_result = agents["interviewer"].evaluate_answer(session_id, message.text)
+        score_result = await agents["interviewer"].aevaluate_answer(session_id, message.text)
 
         # Ответ
         feedback = f"""
@@ -137,7 +151,7 @@ async def process_interview_answer(
 
         else:
             # Завершаем интервью
-            summary = agents["interviewer"].end_interview(session_id)
+            summary = await agents["interviewer"].aend_interview(session_id)
 
             final_response = f"""
 🎉 *Собеседование завершено!*
@@ -163,6 +177,61 @@ async def process_interview_answer(
         await state.clear()
 
 
+async def process_exam_answer(
+        message: Message,
+        state: FSMContext,
+        agents: dict,
+        session_id: str,
+        current_idx: int,
+        questions: list
+):
+    """Режим экзамена: ответ сохраняется без оценки, все ответы проверяются после последнего"""
+    interviewer = agents["interviewer"]
+
+    try:
+        if not interviewer.record_answer(session_id, message.text):
+            # Сессия пропала (перезапуск бота) - ответ сохранить некуда
+            await message.answer("❌ Сессия экзамена не найдена. Начните заново: /interview exam",
+                                 reply_markup=ReplyKeyboardRemove())
+            await state.clear()
+            return
+        current_idx += 1
+
+        if current_idx < len(questions):
+            await message.answer(
+                f"📝 *Вопрос {current_idx + 1} из {len(questions)}*\n\n"
+                f"❓ *{questions[current_idx].get('question', 'Продолжим?')}*",
+                parse_mode="Markdown"
+            )
+            await state.update_data(current_question=current_idx)
+            return
+
+        await message.answer("📊 Проверяю все ответы...")
+        summary = await interviewer.agrade_exam(session_id)
+
+        scores = "\n".join(
+            f"{i}. {score.score}/100 — {score.comment}" for i, score in enumerate(summary.get('scores', []), 1)
+        )
+        recommendations = "\n".join(f"• {r}" for r in summary.get('recommendations', []))
+
+        await message.answer(
+            f"🎉 *Собеседование завершено!*\n\n"
+            f"📊 *Оценки:*\n{scores}\n\n"
+            f"• Средний балл: {summary.get('average_score', 0)}/100\n"
+            f"• Уровень: {summary.get('performance', 'Нормально')}\n\n"
+            + (f"📝 {summary['overall']}\n\n" if summary.get('overall') else "")
+            + (f"📚 *Рекомендации:*\n{recommendations}" if recommendations else ""),
+            parse_mode="Markdown"
+        )
+        await message.answer("Используйте /plan, /assess или /interview", reply_markup=ReplyKeyboardRemove())
+        await state.clear()
+
+    except Exception as e:
+        await message.answer("❌ Ошибка оценки")
+        print(f"Ошибка: {e}")
+        await state.clear()
+
+
 def register_interview_handlers(dp: Router, agents: dict, use_rag: bool, get_or_create_user):
     """Регистрация хэндлеров собеседования"""
     dp.message.register(
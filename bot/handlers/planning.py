@@ -7,8 +7,11 @@ from aiogram.types import Message, ReplyKeyboardRemove
 from aiogram.utils.keyboard import ReplyKeyboardBuilder
 from aiogram.enums import ParseMode
 
+import html
 import logging
 
+from bot.streaming import StreamingMessage
+
 logger = logging.getLogger(__name__)
 
 router = Router()
@@ -128,8 +131,8 @@ async def process_plan_time(
     user_goal = data.get('user_goal', 'Тема не указана')
     user_level = data.get('user_level', 'Средний')
 
-    # Показываем, что начинаем создавать план
-    await message.answer(
+    # Показываем, что начинаем создавать план (сообщение дописывается по мере генерации)
+    status_message = await message.answer(
         f"🔄 <b>Создаю план обучения...</b>\n\n"
         f"📚 <b>Тема:</b> {user_goal}\n"
         f"📊 <b>Уровень:</b> {user_level}\n"
@@ -138,6 +141,7 @@ async def process_plan_time(
         parse_mode=ParseMode.HTML,
         reply_markup=ReplyKeyboardRemove()
     )
+    stream = StreamingMessage(status_message)
 
     try:
         # Получаем Planner агента
@@ -163,7 +167,15 @@ async def process_plan_time(
         plan_result = None
 
         # Проверяем разные методы вызова
-        if hasattr(planner_agent, 'make_plan'):
+        if hasattr(planner_agent, 'amake_plan'):
+            plan_result = await planner_agent.amake_plan(
+                user_text=user_goal,
+                track=plan_context['track'],
+                weeks=plan_context['weeks'],
+                goals=plan_context['goals'],
+                on_progress=stream.update
+            )
+        elif hasattr(planner_agent, 'make_plan'):
             plan_result = planner_agent.make_plan(plan_context)
         elif hasattr(planner_agent, 'create_plan'):
             plan_result = planner_agent.create_plan(plan_context)
@@ -194,6 +206,14 @@ async def process_plan_time(
             plan_time=time_text
         )
 
+        # Итоговый список недель - вместо превью
+        weeks_lines = [
+            f"📅 <b>Неделя {item.get('week', i)}:</b> {html.escape(str(item.get('title', '')))}"
+            for i, item in enumerate(plan_data.get('plan', []), 1)
+        ]
+        await stream.finish("📋 <b>План по неделям:</b>\n\n" + "\n".join(weeks_lines) if weeks_lines
+                            else "✅ <b>План обучения создан!</b>")
+
         # Форматируем ответ
         response = format_plan_response(plan_data, user_goal, user_level, time_text)
 
@@ -224,6 +244,9 @@ async def process_plan_time(
             plan_time=time_text
         )
 
+        # Недописанное превью заменяем, чтобы оно не осталось обрезанным
+        await stream.finish("⚠️ <b>Не удалось сгенерировать план</b> - показываю базовый")
+
         response = format_plan_response(fallback_plan, user_goal, "Средний", time_text)
 
         builder = ReplyKeyboardBuilder()
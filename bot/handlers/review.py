@@ -6,6 +6,8 @@ from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from aiogram.utils.keyboard import ReplyKeyboardBuilder
 
+from bot.streaming import StreamingMessage
+
 router = Router()
 
 
@@ -63,20 +65,23 @@ async def process_code_review(
         )
 
         # Анализируем код
-        await message.answer("🔎 Анализирую код...")
+        status_message = await message.answer("🔎 Анализирую код...")
+        stream = StreamingMessage(status_message)
 
         try:
-            # Используем агента для анализа
-            review_result = agents["reviewer"].process_message(message.text)
+            # Используем агента для анализа, замечания показываем по мере генерации
+            review_result = await agents["reviewer"].aprocess_message(message.text, on_progress=stream.update)
 
             # Отправляем результат
             if len(review_result) > 4000:
-                # Разбиваем на части если длинно
+                # Разбиваем на части если длинно; превью заменяем пометкой
+                await stream.finish("🔎 Анализ готов, результат ниже ⬇️", parse_mode=None)
                 parts = [review_result[i:i + 4000] for i in range(0, len(review_result), 4000)]
                 for i, part in enumerate(parts, 1):
                     await message.answer(f"*Часть {i}:*\n\n{part}", parse_mode="Markdown")
             else:
-                await message.answer(review_result, parse_mode="Markdown")
+                # Итог заменяет превью в том же сообщении
+                await stream.finish(review_result, parse_mode="Markdown")
 
             # Сохраняем результат в БД
             review_data = {
@@ -107,9 +112,11 @@ async def process_code_review(
 
         except Exception as e:
             print(f"Ошибка code review: {e}")
-            await message.answer(
+            # Ошибка заменяет недописанное превью
+            await stream.finish(
                 "❌ Не удалось проанализировать код.\n"
-                "Проверьте формат и попробуйте снова."
+                "Проверьте формат и попробуйте снова.",
+                parse_mode=None
             )
             await state.clear()
 
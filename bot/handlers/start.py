@@ -1,4 +1,6 @@
 # bot/handlers/start.py
+import html
+
 from aiogram import types, Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
@@ -105,19 +107,21 @@ async def process_experience(message: types.Message, state: FSMContext, agents:
     if agents and "assessor" in agents and agents["assessor"]:
         try:
             assessor = agents["assessor"]
-            # Создаем оценку
-            assessment = assessor.create_assessment(experience, level, track)
-
-            if hasattr(assessment, 'level'):
-                response += f"📊 <b>Оценка:</b> {assessment.level}\n"
-            if hasattr(assessment, 'confidence'):
-                confidence = assessment.confidence * 100
-                response += f"📈 <b>Уверенность:</b> {confidence:.0f}%\n"
-
-            if hasattr(assessment, 'recommendations') and assessment.recommendations:
-                response += f"\n📝 <b>Рекомендации:</b>\n"
-                for i, rec in enumerate(assessment.recommendations[:2], 1):
-                    response += f"{i}. {rec}\n"
+            # Создаем оценку без блокировки event loop
+            assessment = await assessor.aassess(
+                answer=experience,
+                topics=["программирование", track],
+                user_context={'level': level, 'track': track}
+            )
+
+            readiness = assessment.scores.get('interview_readiness')
+            if readiness is not None:
+                response += f"🎯 <b>Готовность к собеседованию:</b> {readiness}/100\n"
+
+            if assessment.weak_topics:
+                response += f"\n📝 <b>Области для улучшения:</b>\n"
+                for i, topic in enumerate(assessment.weak_topics[:2], 1):
+                    response += f"{i}. {html.escape(str(topic))}\n"
 
         except Exception as e:
             print(f"Ошибка оценки: {e}")
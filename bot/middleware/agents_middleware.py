@@ -19,6 +19,10 @@ class AgentsMiddleware(BaseMiddleware):
         self.agents = agents
         self.use_rag = use_rag
 
+        # Используем уже созданный координатор, а не отдельный экземпляр
+        if agents.get("coordinator") is not None:
+            set_coordinator(agents["coordinator"])
+
     async def __call__(
             self,
             handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
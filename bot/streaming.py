@@ -0,0 +1,118 @@
+# bot/streaming.py
+import re
+import time
+import asyncio
+import logging
+from typing import List, Optional
+
+from aiogram import types
+from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Лимит длины сообщения Telegram
+MAX_MESSAGE_LENGTH = 4096
+
+# Теги, которые понимает Telegram в режиме HTML
+_TAG_RE = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9-]*)[^>]*?(/?)>")
+
+
+def balance_html(text: str, limit: int = MAX_MESSAGE_LENGTH) -> str:
+    """
+    Делает обрезанный HTML корректным для Telegram
+
+    Убирает недописанный тег или сущность в конце и закрывает
+    все открытые теги. Текст длиннее limit обрезается с многоточием
+    (оно ставится после чистки, чтобы не склеиться с обрывком тега).
+    """
+    reserve = min(100, limit // 2)  # запас на закрывающие теги и многоточие
+    truncated = len(text) > limit - reserve
+    if truncated:
+        text = text[:limit - reserve]
+
+    # Недописанный тег: "<b" или "</co"
+    last_open = text.rfind("<")
+    if last_open > text.rfind(">"):
+        text = text[:last_open]
+
+    # Недописанная сущность: "&am"
+    text = re.sub(r"&[#a-zA-Z0-9]*$", "", text)
+    if truncated:
+        text += "…"
+
+    stack: List[str] = []
+    for closing, tag, self_closing in _TAG_RE.findall(text):
+        tag = tag.lower()
+        if self_closing:
+            continue
+        if not closing:
+            stack.append(tag)
+        elif tag in stack:
+            # Закрываем все, что открыто внутри (Telegram не прощает перекрытий)
+            while stack and stack.pop() != tag:
+                pass
+
+    return text + "".join(f"</{tag}>" for tag in reversed(stack))
+
+
+class StreamingMessage:
+    """
+    Одно сообщение Telegram, которое дописывается по мере генерации
+
+    Правки не чаще min_interval секунд: Telegram ограничивает частоту
+    редактирования. Промежуточный текст всегда приводится к корректному HTML.
+    """
+
+    def __init__(self, message: types.Message, min_interval: float = 1.0):
+        self.message = message
+        self.min_interval = min_interval
+        self._last_edit = 0.0
+        self._last_text: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    async def _edit(self, text: str, parse_mode: Optional[str] = ParseMode.HTML) -> bool:
+        if text == self._last_text:
+            return True
+        try:
+            await self.message.edit_text(text, parse_mode=parse_mode)
+        except TelegramRetryAfter as e:
+            # Промежуточную правку просто пропускаем - следующая ее заменит
+            self._last_edit = time.monotonic() + e.retry_after
+            return False
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                logger.warning(f"⚠️  Не удалось обновить сообщение: {e}")
+                return False
+        except TelegramAPIError as e:
+            # Правка - лучшее из возможного: сетевая или серверная ошибка не роняет ответ
+            logger.warning(f"⚠️  Не удалось обновить сообщение: {e}")
+            return False
+        self._last_text = text
+        self._last_edit = time.monotonic()
+        return True
+
+    async def update(self, text: str):
+        """Промежуточный текст (HTML): правка, если прошло достаточно времени"""
+        if time.monotonic() - self._last_edit < self.min_interval or self._lock.locked():
+            return
+        async with self._lock:
+            await self._edit(balance_html(text))
+
+    async def finish(self, text: str, parse_mode: Optional[str] = ParseMode.HTML, reply_markup=None):
+        """
+        Итоговый текст: заменяет промежуточный
+
+        Если итог не помещается в одно сообщение или правка не удалась,
+        отправляет его новыми сообщениями.
+        """
+        async with self._lock:
+            if len(text) <= MAX_MESSAGE_LENGTH and reply_markup is None:
+                if await self._edit(text, parse_mode=parse_mode):
+                    return
+
+            # Клавиатуру ответа нельзя добавить правкой - отправляем новым сообщением
+            for start in range(0, len(text), MAX_MESSAGE_LENGTH):
+                part = text[start:start + MAX_MESSAGE_LENGTH]
+                markup = reply_markup if start + MAX_MESSAGE_LENGTH >= len(text) else None
+                await self.message.answer(part, parse_mode=parse_mode, reply_markup=markup)
@@ -0,0 +1,2 @@
+# llm/__init__.py
+# Общий слой работы с GigaChat для всех агентов
@@ -0,0 +1,100 @@
+# llm/batching.py
+import asyncio
+import contextvars
+import logging
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Склейка запросов разных пользователей в один вызов LLM
+
+    Элементы копятся до max_batch штук или window секунд с первого, затем
+    handler обрабатывает пачку одним вызовом и возвращает результаты в том
+    же порядке (None - элемент не разобран). Для неразобранных элементов и
+    при ошибке всей пачки вызывается fallback по одному элементу.
+    Одиночный элемент сразу идет в fallback: пачка из одного не дешевле.
+    """
+
+    def __init__(self, handler: Callable[[List[T]], Awaitable[Sequence[Optional[R]]]],
+                 fallback: Callable[[T], Awaitable[R]], max_batch: int = 8, window: float = 0.2):
+        self.handler = handler
+        self.fallback = fallback
+        self.max_batch = max(1, max_batch)
+        self.window = window
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self.stats = {"items": 0, "batches": 0, "batched_items": 0, "fallbacks": 0, "batch_failures": 0}
+
+    async def submit(self, item: T) -> R:
+        """Ставит элемент в пачку и ждет его результат"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        self.stats["items"] += 1
+
+        if len(self._pending) >= self.max_batch:
+            self._spawn(self._flush())
+        elif self._timer is None:
+            self._timer = self._spawn(self._flush_later())
+        return await future
+
+    def _spawn(self, coro) -> asyncio.Task:
+        # Пачка общая: бюджет времени первого пользователя на нее не переносим
+        return contextvars.Context().run(asyncio.ensure_future, coro)
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        await self._flush()
+
+    async def _flush(self):
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if self._pending:
+            self._timer = self._spawn(self._flush_later())
+        if not batch:
+            return
+
+        items = [item for item, _ in batch]
+        results: Sequence[Optional[R]] = [None] * len(items)
+        if len(items) > 1:
+            try:
+                batch_results = await self.handler(items)
+                if len(batch_results) != len(items):
+                    raise ValueError(f"{len(batch_results)} результатов на {len(items)} элементов")
+                results = batch_results
+                self.stats["batches"] += 1
+                self.stats["batched_items"] += sum(r is not None for r in results)
+            except Exception as e:
+                self.stats["batch_failures"] += 1
+                logger.warning("⚠️ Пачка из %d элементов не обработана: %s", len(items), e)
+
+        await asyncio.gather(*(
+            self._resolve(item, future, result) for (item, future), result in zip(batch, results)
+        ))
+
+    async def _resolve(self, item: T, future: asyncio.Future, result: Optional[R]):
+        if result is None:
+            self.stats["fallbacks"] += 1
+            try:
+                result = await self.fallback(item)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                return
+        if not future.done():  # ожидающий мог уйти по таймауту
+            future.set_result(result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "avg_batch": round(self.stats["batched_items"] / batches, 1) if batches else 0.0,
+        }
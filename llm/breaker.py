@@ -0,0 +1,114 @@
+# llm/breaker.py
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_ICONS = {CLOSED: "🟢", OPEN: "🔴", HALF_OPEN: "🟡"}
+
+
+class CircuitOpen(Exception):
+    """GigaChat недоступен - вызов отклонен сразу, агент отдает fallback"""
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для вызовов модели
+
+    После failure_threshold ошибок подряд размыкается: вызовы сразу
+    получают CircuitOpen, без похода в сеть. Через open_seconds пропускает
+    один пробный вызов (half-open): успех замыкает цепь, ошибка снова
+    размыкает на open_seconds.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, open_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.stats = {"rejected": 0, "opened": 0}
+
+    def _transition(self, state: str):
+        if state == self._state:
+            return
+        logger.warning(f"{_STATE_ICONS[state]} Предохранитель GigaChat [{self.name}]: "
+                       f"{self._state} → {state}")
+        self._state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self.stats["opened"] += 1
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def check(self):
+        """Отклоняет вызов заранее, пока цепь разомкнута (без резервирования пробы)"""
+        state = self.state
+        if state == OPEN or (state == HALF_OPEN and self._probe_in_flight):
+            self.stats["rejected"] += 1
+            raise CircuitOpen(f"GigaChat [{self.name}] недоступен, используем fallback")
+
+    def _acquire(self):
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpen(f"GigaChat [{self.name}] недоступен, используем fallback")
+                self._transition(HALF_OPEN)
+
+            if self._state == HALF_OPEN:
+                if self._probe_in_flight:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpen(f"GigaChat [{self.name}] проверяется, используем fallback")
+                self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._probe_in_flight = False
+                self._transition(OPEN)
+
+    def _release_probe(self):
+        with self._lock:
+            self._probe_in_flight = False
+
+    @contextmanager
+    def guard(self):
+        """Оборачивает один вызов модели и учитывает его результат"""
+        self._acquire()
+        try:
+            yield
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:  # отмена - не ошибка модели
+            self._release_probe()
+            raise
+        else:
+            self.record_success()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "failures": self._failures, **self.stats}
@@ -0,0 +1,184 @@
+# llm/cache.py
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt: Any) -> Any:
+    """Приводит промпт к каноническому виду: лишние пробелы не меняют ключ"""
+    if isinstance(prompt, str):
+        return re.sub(r"\s+", " ", prompt).strip()
+    if hasattr(prompt, "model_dump"):  # Chat из gigachat.models
+        return prompt.model_dump(exclude_none=True)
+    return prompt
+
+
+def make_cache_key(model: str, prompt: Any, params: Optional[Dict[str, Any]] = None) -> str:
+    """Ключ по содержимому: хэш (модель, нормализованный промпт, параметры сэмплирования)"""
+    raw = json.dumps(
+        {"model": model, "prompt": normalize_prompt(prompt), "params": params or {}},
+        ensure_ascii=False, sort_keys=True, default=str
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Двухуровневый кэш ответов LLM
+
+    Первый уровень - LRU в памяти процесса, второй - SQLite на диске
+    (переживает перезапуск). У каждой записи свой TTL, оба уровня
+    ограничены по размеру.
+    """
+
+    def __init__(self, path: Optional[Path] = None, memory_size: int = 1024, disk_size: int = 10000):
+        self.path = Path(path) if path else None
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+        if self.path:
+            self._open_disk()
+
+    # ---------- SQLite ----------
+
+    def _open_disk(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, agent TEXT, value TEXT, "
+                "expires_at REAL, accessed_at REAL)"
+            )
+            self._conn.commit()
+        except Exception as e:
+            logger.warning(f"⚠️  Дисковый кэш LLM недоступен, работаем только в памяти: {e}")
+            self._conn = None
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[str, float]]:
+        row = self._conn.execute(
+            "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+        self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+        return row[0], row[1]
+
+    def _disk_set(self, key: str, agent: str, value: str, expires_at: float, now: float):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, agent, value, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, agent, value, expires_at, now)
+        )
+        self._writes += 1
+        # Чистку делаем не на каждую запись
+        if self._writes % 100 == 0:
+            self._disk_evict(now)
+        self._conn.commit()
+
+    def _disk_evict(self, now: float):
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.disk_size,)
+        )
+
+    # ---------- API ----------
+
+    def _count(self, agent: str, field: str):
+        counters = self.stats.setdefault(agent, {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+        counters[field] += 1
+
+    def get(self, key: str, agent: str = "default") -> Optional[str]:
+        """Возвращает ответ из кэша или None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self._count(agent, "memory_hits")
+                    return entry[0]
+                del self._memory[key]
+
+            if self._conn is not None:
+                try:
+                    entry = self._disk_get(key, now)
+                except sqlite3.Error as e:
+                    logger.warning(f"⚠️  Ошибка чтения кэша LLM: {e}")
+                    entry = None
+                if entry is not None:
+                    self._memory_set(key, entry)
+                    self._count(agent, "disk_hits")
+                    return entry[0]
+
+            self._count(agent, "misses")
+            return None
+
+    def set(self, key: str, value: str, ttl: float, agent: str = "default"):
+        """Сохраняет ответ на ttl секунд в оба уровня"""
+        if ttl <= 0:
+            return
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            self._memory_set(key, (value, expires_at))
+            if self._conn is not None:
+                try:
+                    self._disk_set(key, agent, value, expires_at, now)
+                except sqlite3.Error as e:
+                    logger.warning(f"⚠️  Ошибка записи кэша LLM: {e}")
+
+    def _memory_set(self, key: str, entry: Tuple[str, float]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Очищает оба уровня"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses")
+                self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Счетчики попаданий и промахов по агентам"""
+        with self._lock:
+            per_agent = {agent: dict(counters) for agent, counters in self.stats.items()}
+            memory_entries = len(self._memory)
+
+        hits = sum(c["memory_hits"] + c["disk_hits"] for c in per_agent.values())
+        misses = sum(c["misses"] for c in per_agent.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "memory_entries": memory_entries,
+            "disk": self._conn is not None,
+            "agents": per_agent
+        }
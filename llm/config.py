@@ -0,0 +1,196 @@
+# llm/config.py
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# Модель по умолчанию
+DEFAULT_MODEL = os.getenv("GIGACHAT_MODEL", "GigaChat")
+# gigachat - настоящий API, fake - локальная подмена для нагрузочных тестов (llm/fake.py)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gigachat").lower()
+
+# Пул соединений: общий на процесс для каждой модели
+MAX_CONNECTIONS = _env_int("GIGACHAT_MAX_CONNECTIONS", 100)
+MAX_KEEPALIVE_CONNECTIONS = _env_int("GIGACHAT_MAX_KEEPALIVE", 20)
+KEEPALIVE_EXPIRY = _env_float("GIGACHAT_KEEPALIVE_EXPIRY", 60.0)  # секунды
+REQUEST_TIMEOUT = _env_float("GIGACHAT_TIMEOUT", 30.0)  # секунды
+
+# Кэш OAuth токена на диске, общий для всех процессов на узле ("off" - выключить)
+TOKEN_CACHE_PATH = os.getenv("GIGACHAT_TOKEN_CACHE", str(BASE_DIR / "data" / "gigachat_token.json"))
+TOKEN_REFRESH_MARGIN = _env_float("GIGACHAT_TOKEN_REFRESH_MARGIN", 300.0)  # обновлять за N секунд до истечения
+
+# Планировщик вызовов LLM: лимит одновременных запросов и глубина очереди
+LLM_MAX_CONCURRENCY = _env_int("LLM_MAX_CONCURRENCY", 16)
+LLM_MAX_QUEUE = _env_int("LLM_MAX_QUEUE", 64)  # при переполнении агенты отдают fallback
+
+# Кэш ответов LLM: LRU в памяти + SQLite на диске ("off" - только память)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", str(BASE_DIR / "data" / "llm_cache.sqlite3"))
+LLM_CACHE_MEMORY_SIZE = _env_int("LLM_CACHE_MEMORY_SIZE", 1024)  # записей
+LLM_CACHE_DISK_SIZE = _env_int("LLM_CACHE_DISK_SIZE", 10000)  # записей
+
+# TTL кэша по агентам, секунды (LLM_CACHE_TTL_<AGENT> переопределяет)
+LLM_CACHE_TTLS = {
+    agent: _env_float(f"LLM_CACHE_TTL_{agent.upper()}", ttl)
+    for agent, ttl in {
+        "interviewer": 24 * 3600,
+        "planner": 24 * 3600,
+        "reviewer": 7 * 24 * 3600,
+        "assessor": 3600,
+    }.items()
+}
+
+# Отключение кэша: "all" или список "agent" / "agent.method" через запятую
+LLM_CACHE_DISABLED = {
+    item.strip() for item in os.getenv("LLM_CACHE_DISABLED", "").split(",") if item.strip()
+}
+
+# Бюджеты времени на методы агентов, секунды (LLM_BUDGET_<AGENT>_<METHOD> переопределяет).
+# По истечении агент отдает fallback вместо зависания
+LLM_DEFAULT_BUDGET = _env_float("LLM_DEFAULT_BUDGET", 20.0)
+LLM_BUDGETS = {
+    name: _env_float("LLM_BUDGET_" + name.replace(".", "_").upper(), budget)
+    for name, budget in {
+        "interviewer.evaluate_answer": 10.0,
+        "interviewer.get_hints": 6.0,
+        "interviewer.start_interview": 15.0,
+        "interviewer.end_interview": 10.0,
+        "interviewer.grade_exam": 20.0,
+        "assessor.assess": 12.0,
+        "assessor.assess_with_feedback": 12.0,
+        "reviewer.get_quick_feedback": 8.0,
+        "reviewer.review": 20.0,
+        "planner.make_plan": 25.0,
+        "planner.adjust_plan": 25.0,
+    }.items()
+}
+RAG_BUDGET_SHARE = _env_float("RAG_BUDGET_SHARE", 0.3)  # доля бюджета на поиск в базе знаний
+
+# Дублирование медленных запросов: второй вызов после p90 наблюдаемой задержки
+LLM_HEDGE = os.getenv("LLM_HEDGE", "off").lower() == "on"
+LLM_HEDGE_PERCENTILE = _env_float("LLM_HEDGE_PERCENTILE", 0.9)
+LLM_HEDGE_MIN_SAMPLES = _env_int("LLM_HEDGE_MIN_SAMPLES", 20)  # до этого не дублируем
+
+# Предохранитель: после N ошибок подряд сразу отдаем fallback, через M секунд - пробный вызов
+LLM_BREAKER_FAILURES = _env_int("LLM_BREAKER_FAILURES", 5)
+LLM_BREAKER_OPEN_SECONDS = _env_float("LLM_BREAKER_OPEN_SECONDS", 30.0)
+
+# Поиск похожих документов: порог сходства (0..1, 0 - без порога) и MMR против почти одинаковых кусков
+RAG_MIN_SIMILARITY = _env_float("RAG_MIN_SIMILARITY", 0.0)
+RAG_MMR_LAMBDA = _env_float("RAG_MMR_LAMBDA", 0.5)  # 1 - только релевантность, 0 - только разнообразие
+RAG_MMR_FETCH_K = _env_int("RAG_MMR_FETCH_K", 20)  # кандидатов для переранжирования
+
+# Кэш эмбеддингов запросов к базе знаний (0 - выключен; путь - хранить и на диске)
+RAG_EMBEDDING_CACHE_SIZE = _env_int("RAG_EMBEDDING_CACHE_SIZE", 1024)  # записей
+RAG_EMBEDDING_CACHE_PATH = os.getenv("RAG_EMBEDDING_CACHE_PATH", "off")
+
+# Хранилище поиска: chroma - коллекция ChromaDB, numpy - выгруженная из нее матрица эмбеддингов (перебор)
+RAG_BACKEND = os.getenv("RAG_BACKEND", "chroma").lower()
+RAG_NUMPY_INDEX_DIR = os.getenv("RAG_NUMPY_INDEX_DIR", str(BASE_DIR / "data" / "numpy_index"))
+
+# Кэш результатов поиска по версии коллекции (0 - выключен); версию перепроверяем раз в N секунд
+RAG_RESULT_CACHE_SIZE = _env_int("RAG_RESULT_CACHE_SIZE", 1024)  # записей
+RAG_RESULT_CACHE_CHECK_SECONDS = _env_float("RAG_RESULT_CACHE_CHECK_SECONDS", 5.0)
+
+# Бюджеты контекста из базы знаний в промпте, токены (RAG_TOKENS_<AGENT>_<METHOD> переопределяет)
+RAG_DEFAULT_TOKENS = _env_int("RAG_DEFAULT_TOKENS", 300)
+RAG_TOKEN_BUDGETS = {
+    name: _env_int("RAG_TOKENS_" + name.replace(".", "_").upper(), tokens)
+    for name, tokens in {
+        "interviewer.start_interview": 300,
+        "interviewer.evaluate_answer": 150,
+        "assessor.assess": 300,
+        "assessor.assess_with_feedback": 250,
+        "planner.make_plan": 450,
+        "planner.resources": 150,
+        "reviewer.review": 450,
+        "reviewer.similar": 150,
+    }.items()
+}
+
+# Уровни моделей: короткие ответы - легкой модели с лимитом длины, планы и ревью - полной
+LLM_LIGHT_MODEL = os.getenv("GIGACHAT_LIGHT_MODEL", "GigaChat")
+LLM_TIERS = {
+    "light": {"model": LLM_LIGHT_MODEL, "max_tokens": _env_int("LLM_LIGHT_MAX_TOKENS", 300)},
+    "full": {"model": DEFAULT_MODEL, "max_tokens": None},
+}
+# Уровень метода агента (LLM_TIER_<AGENT>_<METHOD>=light|full переопределяет), по умолчанию full
+LLM_METHOD_TIERS = {
+    name: os.getenv("LLM_TIER_" + name.replace(".", "_").upper(), tier)
+    for name, tier in {
+        "interviewer.get_hints": "light",
+        "interviewer.end_interview": "light",
+        "reviewer.get_quick_feedback": "light",
+    }.items()
+}
+# Лимит длины ответа метода, токены (LLM_MAX_TOKENS_<AGENT>_<METHOD> переопределяет лимит уровня)
+LLM_MAX_TOKENS = {
+    name: _env_int("LLM_MAX_TOKENS_" + name.replace(".", "_").upper(), tokens)
+    for name, tokens in {
+        "interviewer.get_hints": 200,
+        "interviewer.end_interview": 300,
+        "reviewer.get_quick_feedback": 250,
+    }.items()
+}
+
+# Структурированный ответ через function calling GigaChat: "all" или список "agent" / "agent.method".
+# Выключено - ответ JSON в тексте (он же запасной путь, если модель не вызвала функцию)
+LLM_STRUCTURED_OUTPUT = {
+    item.strip() for item in os.getenv("LLM_STRUCTURED_OUTPUT", "").split(",") if item.strip()
+}
+
+# Интервью как диалог: системный промпт один раз на сессию, дальше только вопрос и ответ.
+# В запросе остаются последние N пар реплик в пределах бюджета токенов (скользящее окно)
+INTERVIEW_DIALOG = os.getenv("INTERVIEW_DIALOG", "off").lower() == "on"
+INTERVIEW_DIALOG_TURNS = _env_int("INTERVIEW_DIALOG_TURNS", 2)
+INTERVIEW_DIALOG_TOKENS = _env_int("INTERVIEW_DIALOG_TOKENS", 800)
+
+# Склейка оценки ответов интервью разных пользователей в один вызов (только async путь бота)
+INTERVIEW_BATCH = os.getenv("INTERVIEW_BATCH", "off").lower() == "on"
+INTERVIEW_BATCH_SIZE = _env_int("INTERVIEW_BATCH_SIZE", 8)
+INTERVIEW_BATCH_WINDOW = _env_float("INTERVIEW_BATCH_WINDOW_MS", 200) / 1000
+
+# Режим интервью по умолчанию: live - оценка после каждого ответа, exam - одной проверкой в конце
+INTERVIEW_MODE = os.getenv("INTERVIEW_MODE", "live").lower()
+
+# Пул заранее сгенерированных вопросов интервью по (тема, уровень, направление)
+QUESTION_POOL = os.getenv("QUESTION_POOL", "off").lower() == "on"
+QUESTION_POOL_SIZE = _env_int("QUESTION_POOL_SIZE", 4)            # наборов на связку
+QUESTION_POOL_LOW_WATER = _env_int("QUESTION_POOL_LOW_WATER", 2)  # ниже - пополняем в фоне
+QUESTION_POOL_MAX_SERVES = _env_int("QUESTION_POOL_MAX_SERVES", 20)  # выдач одного набора
+# Популярные связки для прогрева при старте: "Python:middle:backend,SQL:junior:general"
+QUESTION_POOL_WARM = [
+    tuple((part.split(":") + ["middle", "general"])[:3])
+    for part in os.getenv("QUESTION_POOL_WARM", "").split(",") if part.strip()
+]
+
+# Упреждающая генерация в интервью: "hints", "recommendations" или "all" (через запятую), по умолчанию выключена
+INTERVIEW_PREFETCH = {
+    item.strip() for item in os.getenv("INTERVIEW_PREFETCH", "").split(",") if item.strip()
+}
+
+# Локальная подмена GigaChat (LLM_BACKEND=fake): задержка и доля сбоев
+FAKE_LLM_LATENCY_MS = _env_float("FAKE_LLM_LATENCY_MS", 300)       # медиана задержки
+FAKE_LLM_LATENCY_SIGMA = _env_float("FAKE_LLM_LATENCY_SIGMA", 0.5)  # разброс (логнормальное распределение)
+FAKE_LLM_MS_PER_TOKEN = _env_float("FAKE_LLM_MS_PER_TOKEN", 2)      # генерация, мс на токен ответа
+FAKE_LLM_ERROR_RATE = _env_float("FAKE_LLM_ERROR_RATE", 0.0)
+FAKE_LLM_TRUNCATE_RATE = _env_float("FAKE_LLM_TRUNCATE_RATE", 0.0)
+FAKE_LLM_MALFORMED_RATE = _env_float("FAKE_LLM_MALFORMED_RATE", 0.0)
+FAKE_LLM_SEED = _env_int("FAKE_LLM_SEED", 0)
@@ -0,0 +1,118 @@
+# llm/deadline.py
+import time
+import asyncio
+import inspect
+import logging
+import functools
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+from llm import config
+
+logger = logging.getLogger(__name__)
+
+# Момент (time.monotonic), к которому текущий запрос должен завершиться.
+# ContextVar переходит и в корутины, и в asyncio.to_thread
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("llm_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Бюджет времени на запрос исчерпан - агент отдает fallback"""
+
+
+def remaining() -> Optional[float]:
+    """Сколько секунд осталось (None - без ограничения)"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def expired() -> bool:
+    """Бюджет уже исчерпан"""
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def check():
+    """Бросает DeadlineExceeded, если бюджет исчерпан"""
+    if expired():
+        raise DeadlineExceeded("Бюджет времени на запрос исчерпан")
+
+
+@contextmanager
+def deadline(budget: Optional[float]):
+    """
+    Ограничивает время выполнения вложенных вызовов RAG и LLM
+
+    Вложенный бюджет не может продлить внешний: действует более строгий.
+    """
+    if budget is None:
+        yield
+        return
+
+    new_deadline = time.monotonic() + budget
+    current = _deadline.get()
+    if current is not None:
+        new_deadline = min(new_deadline, current)
+
+    token = _deadline.set(new_deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def budget_for(agent: str, method: str) -> Optional[float]:
+    """Бюджет метода агента из настроек"""
+    return config.LLM_BUDGETS.get(f"{agent}.{method}", config.LLM_DEFAULT_BUDGET)
+
+
+def latency_budget(agent: str, method: str):
+    """
+    Декоратор метода агента: задает бюджет времени на весь вызов
+
+    Бюджет берется из настроек, вызывающий может передать свой: budget=секунды.
+    """
+    def decorator(func: Callable):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, budget: Optional[float] = None, **kwargs):
+                with deadline(budget if budget is not None else budget_for(agent, method)):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, budget: Optional[float] = None, **kwargs):
+            with deadline(budget if budget is not None else budget_for(agent, method)):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+async def bounded(awaitable, share: float = 1.0):
+    """Ждет awaitable не дольше share от оставшегося бюджета"""
+    left = remaining()
+    if left is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout=left * share)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded("Бюджет времени на запрос исчерпан")
+
+
+async def run_rag(func: Callable, *args, default: Any) -> Any:
+    """
+    Поиск в RAG в отдельном потоке с частью бюджета
+
+    Не успели - продолжаем без контекста, чтобы осталось время на LLM.
+    """
+    if expired():
+        return default
+    try:
+        return await bounded(asyncio.to_thread(func, *args), share=config.RAG_BUDGET_SHARE)
+    except DeadlineExceeded:
+        logger.warning("⚠️  RAG не уложился в бюджет времени, продолжаем без контекста")
+        return default
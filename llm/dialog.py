@@ -0,0 +1,44 @@
+# llm/dialog.py
+from typing import Dict, List, Optional
+
+from gigachat.models import Chat, Messages, MessagesRole
+
+from llm.tokens import count_tokens
+
+# Реплика диалога: {"role": "user" | "assistant", "content": "..."}
+Turn = Dict[str, str]
+
+
+def window(history: List[Turn], max_turns: int, max_tokens: Optional[int] = None) -> List[Turn]:
+    """
+    Скользящее окно истории: последние max_turns пар вопрос-ответ
+
+    Старые пары отбрасываются целиком, пока история не уложится в max_tokens.
+    Пока окно не сдвинулось, начало диалога не меняется и GigaChat
+    берет его из кэша сессии.
+    """
+    pairs = [history[i:i + 2] for i in range(0, len(history) - len(history) % 2, 2)]
+    pairs = pairs[-max_turns:] if max_turns > 0 else []
+    if max_tokens is not None:
+        while pairs and sum(count_tokens(t["content"]) for pair in pairs for t in pair) > max_tokens:
+            pairs.pop(0)
+    return [turn for pair in pairs for turn in pair]
+
+
+def build_chat(system: str, history: List[Turn], message: str, max_turns: int,
+               max_tokens: Optional[int] = None) -> Chat:
+    """
+    Запрос-диалог: системный промпт, окно истории и новая реплика
+
+    Args:
+        system: Роль и формат ответа (один раз на диалог)
+        history: Предыдущие реплики
+        message: Новая реплика пользователя
+        max_turns: Сколько прошлых пар реплик оставить
+        max_tokens: Бюджет истории, токены
+    """
+    messages = [Messages(role=MessagesRole.SYSTEM, content=system)]
+    messages += [Messages(role=MessagesRole(t["role"]), content=t["content"])
+                 for t in window(history, max_turns, max_tokens)]
+    messages.append(Messages(role=MessagesRole.USER, content=message))
+    return Chat(messages=messages)
@@ -0,0 +1,326 @@
+# llm/fake.py
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from gigachat.exceptions import ResponseError
+from gigachat.models import ChatCompletion, ChatCompletionChunk
+
+from llm import config
+from llm.json_parser import extract_json
+from llm.tokens import count_tokens
+from prompts.templates import PROMPTS
+
+_TOPICS = ["асинхронность", "индексы в БД", "сложность алгоритмов", "HTTP", "тестирование", "Git", "ООП"]
+_ITEM_RE = re.compile(r"^\[(\d+)\]", re.MULTILINE)
+_WEEKS_RE = re.compile(r"на (\d+) недел")
+
+
+# ===============================
+#  Ответы по типам промптов
+# ===============================
+def _points(rng: random.Random, n: int = 2) -> List[str]:
+    return rng.sample(_TOPICS, n)
+
+
+def _score(text: str, rng: random.Random) -> Dict[str, Any]:
+    return {
+        "score": rng.randint(35, 95),
+        "comment": "Ответ по существу, но не хватает примеров из практики.",
+        "strong_points": _points(rng),
+        "weak_points": _points(rng),
+        "recommended_resources": ["Документация языка"],
+    }
+
+
+def _numbered_scores(text: str, rng: random.Random) -> List[Dict[str, Any]]:
+    ids = [int(i) for i in _ITEM_RE.findall(text)] or [1]
+    return [{"id": i, **_score(text, rng)} for i in ids]
+
+
+def _exam(text: str, rng: random.Random) -> Dict[str, Any]:
+    return {
+        "scores": _numbered_scores(text, rng),
+        "summary": "Кандидат уверенно знает основы, практику стоит подтянуть.",
+        "recommendations": _recommendations(text, rng),
+    }
+
+
+def _questions(text: str, rng: random.Random) -> Dict[str, Any]:
+    return {"questions": [
+        {
+            "topic": topic,
+            "question": f"Расскажите про {topic}: где это применяется и какие есть подводные камни?",
+            "expected_concepts": _points(rng),
+            "difficulty": difficulty,
+            "hints": [f"Вспомните, как {topic} используется в вашем проекте"],
+        }
+        for topic, difficulty in zip(_points(rng, 3), ("easy", "medium", "hard"))
+    ]}
+
+
+def _hints(text: str, rng: random.Random) -> List[str]:
+    return [f"Начните с определения: {_TOPICS[rng.randrange(len(_TOPICS))]}", "Приведите пример из практики"]
+
+
+def _recommendations(text: str, rng: random.Random) -> List[str]:
+    return [f"Разобрать тему «{topic}» на практике" for topic in _points(rng, 3)]
+
+
+def _assess(text: str, rng: random.Random) -> Dict[str, Any]:
+    return {
+        "scores": {name: rng.randint(30, 90) for name in ("theory", "practice", "interview_readiness")},
+        "weak_topics": _points(rng),
+        "follow_up": "Какие задачи вы решали на последнем проекте?",
+        "feedback": "База есть, для собеседований не хватает практики и системного повторения.",
+    }
+
+
+def _feedback(text: str, rng: random.Random) -> Dict[str, Any]:
+    criteria = {"accuracy": rng.randint(15, 40), "completeness": rng.randint(10, 30),
+                "clarity": rng.randint(8, 20), "examples": rng.randint(2, 10)}
+    return {
+        "total_score": sum(criteria.values()),
+        "criteria_scores": criteria,
+        "strengths": _points(rng),
+        "improvements": _points(rng),
+        "recommended_resources": ["Документация языка"],
+    }
+
+
+def _plan(text: str, rng: random.Random) -> Dict[str, Any]:
+    match = _WEEKS_RE.search(text)
+    weeks = int(match.group(1)) if match else 4
+    return {
+        "plan": [
+            {
+                "week": week,
+                "title": f"Неделя {week}: {topic}",
+                "description": f"Разобрать {topic} и закрепить на задачах",
+                "topics": [topic],
+                "tasks": [f"Решить 5 задач по теме {topic}"],
+                "resources": ["Документация языка"],
+                "estimated_hours": 10,
+                "success_criteria": [f"Объясняю {topic} без подсказок"],
+            }
+            for week, topic in zip(range(1, weeks + 1), (rng.choice(_TOPICS) for _ in range(weeks)))
+        ],
+        "summary": "План от основ к практике собеседований",
+        "total_weeks": weeks,
+        "total_hours": weeks * 10,
+        "focus_areas": _points(rng),
+    }
+
+
+def _adjust(text: str, rng: random.Random) -> Dict[str, Any]:
+    try:
+        return extract_json(text)
+    except ValueError:
+        return _plan(text, rng)
+
+
+def _review(text: str, rng: random.Random) -> Dict[str, Any]:
+    return {
+        "summary": "Код рабочий, но есть проблемы со структурой и обработкой ошибок.",
+        "issues": [{
+            "type": "best_practice",
+            "line": rng.randint(1, 20),
+            "description": "Исключение перехватывается слишком широко",
+            "recommendation": "Ловите конкретные исключения",
+            "severity": "medium",
+        }],
+        "score": rng.randint(40, 90),
+        "follow_up": "Как этот код поведет себя при пустом вводе?",
+        "strengths": ["Понятные имена"],
+        "improvements": ["Добавить тесты"],
+    }
+
+
+def _quick_feedback(text: str, rng: random.Random) -> str:
+    return "Код читается легко. Стоит обработать граничные случаи и добавить тесты."
+
+
+# Шаблон промпта (без суффикса _rag) -> генератор ответа
+RESPONDERS: Dict[str, Callable[[str, random.Random], Any]] = {
+    "assessor.assess": _assess,
+    "assessor.feedback": _feedback,
+    "interviewer.questions": _questions,
+    "interviewer.evaluate": _score,
+    "interviewer.evaluate_system": _score,
+    "interviewer.evaluate_turn": _score,
+    "interviewer.evaluate_batch": _numbered_scores,
+    "interviewer.exam": _exam,
+    "interviewer.hints": _hints,
+    "interviewer.recommendations": _recommendations,
+    "planner.plan": _plan,
+    "planner.adjust": _adjust,
+    "reviewer.review": _review,
+    "reviewer.quick_feedback": _quick_feedback,
+}
+
+
+def _prompt_text(prompt: Any) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    messages = getattr(prompt, "messages", None) or (prompt.get("messages", []) if isinstance(prompt, dict) else [])
+    return "\n".join(getattr(m, "content", None) or (m.get("content", "") if isinstance(m, dict) else "")
+                     for m in messages)
+
+
+# ===============================
+#  Клиент
+# ===============================
+class FakeGigaChat:
+    """
+    Локальная подмена GigaChat для нагрузочных тестов без сети и квоты (LLM_BACKEND=fake)
+
+    Узнает шаблон промпта агента и отвечает валидным по схеме JSON. Ответ
+    зависит только от текста промпта и seed. Задержка - логнормальная
+    с медианой latency_ms плюс ms_per_token на токен ответа. С заданными
+    вероятностями отвечает ошибкой сервера, обрезает ответ или портит JSON;
+    последовательность сбоев воспроизводима при одном порядке вызовов.
+    """
+
+    is_fake = True
+
+    def __init__(self, model: Optional[str] = None, *,
+                 latency_ms: Optional[float] = None, latency_sigma: Optional[float] = None,
+                 ms_per_token: Optional[float] = None, error_rate: Optional[float] = None,
+                 truncate_rate: Optional[float] = None, malformed_rate: Optional[float] = None,
+                 seed: Optional[int] = None):
+        self._settings = SimpleNamespace(model=f"fake:{model or config.DEFAULT_MODEL}", profanity_check=None)
+        self.latency_ms = config.FAKE_LLM_LATENCY_MS if latency_ms is None else latency_ms
+        self.latency_sigma = config.FAKE_LLM_LATENCY_SIGMA if latency_sigma is None else latency_sigma
+        self.ms_per_token = config.FAKE_LLM_MS_PER_TOKEN if ms_per_token is None else ms_per_token
+        self.error_rate = config.FAKE_LLM_ERROR_RATE if error_rate is None else error_rate
+        self.truncate_rate = config.FAKE_LLM_TRUNCATE_RATE if truncate_rate is None else truncate_rate
+        self.malformed_rate = config.FAKE_LLM_MALFORMED_RATE if malformed_rate is None else malformed_rate
+        self.seed = config.FAKE_LLM_SEED if seed is None else seed
+
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "errors": 0, "truncated": 0, "malformed": 0, "unknown_prompts": 0}
+
+    # ---------- генерация ----------
+
+    def _content_rng(self, text: str) -> random.Random:
+        digest = hashlib.sha256(f"{self.seed}:{text}".encode("utf-8")).hexdigest()
+        return random.Random(int(digest[:16], 16))
+
+    def _answer(self, text: str) -> Any:
+        template = PROMPTS.match(text)
+        name = template.name[:-4] if template and template.name.endswith("_rag") else getattr(template, "name", None)
+        responder = RESPONDERS.get(name)
+        if responder is None:
+            self.stats["unknown_prompts"] += 1
+            return "Ответ локальной тестовой модели."
+        return responder(text, self._content_rng(text))
+
+    def _malform(self, content: str, rng: random.Random) -> str:
+        """Типичные ошибки формата: текст вокруг JSON, Python-литералы, оборванный конец"""
+        kind = rng.choice(("prose", "python", "unclosed"))
+        if kind == "prose":
+            return f"Вот результат:\n```json\n{content}\n```\nЕсли нужно, могу уточнить."
+        if kind == "python":
+            return content.replace('"', "'").replace("null", "None")
+        return content.rstrip("]}")
+
+    def _faults(self) -> Tuple[float, bool, bool, bool, float]:
+        """(задержка без токенов, ошибка, обрезка, порча JSON, доля при обрезке) - из общего seed"""
+        with self._lock:
+            self.stats["calls"] += 1
+            rng = self._rng
+            delay = self.latency_ms / 1000 * rng.lognormvariate(0, self.latency_sigma) if self.latency_ms else 0.0
+            return (delay, rng.random() < self.error_rate, rng.random() < self.truncate_rate,
+                    rng.random() < self.malformed_rate, rng.uniform(0.3, 0.9))
+
+    def _respond(self, prompt: Any) -> Tuple[Optional[ChatCompletion], float]:
+        """Готовый ответ и его задержка; None - ответить ошибкой сервера"""
+        delay, error, truncate, malformed, cut = self._faults()
+        if error:
+            self.stats["errors"] += 1
+            return None, delay
+
+        text = _prompt_text(prompt)
+        answer = self._answer(text)
+        functions = getattr(prompt, "functions", None)
+        if functions and isinstance(answer, dict) and not (truncate or malformed):
+            content, function_call, finish = "", {"name": functions[0].name, "arguments": answer}, "function_call"
+        else:
+            content = answer if isinstance(answer, str) else json.dumps(answer, ensure_ascii=False, indent=2)
+            function_call, finish = None, "stop"
+            if malformed:
+                self.stats["malformed"] += 1
+                content = self._malform(content, self._content_rng(content))
+
+        max_tokens = getattr(prompt, "max_tokens", None)
+        if truncate or (max_tokens and count_tokens(content) > max_tokens):
+            self.stats["truncated"] += 1
+            limit = int(len(content) * cut) if truncate else max_tokens * 3
+            content, finish = content[:limit], "length"
+
+        completion_tokens = count_tokens(content) if content else count_tokens(json.dumps(answer))
+        prompt_tokens = count_tokens(text)
+        message = {"role": "assistant", "content": content}
+        if function_call:
+            message["function_call"] = function_call
+        response = ChatCompletion.model_validate({
+            "choices": [{"message": message, "index": 0, "finish_reason": finish}],
+            "created": int(time.time()),
+            "model": self._settings.model,
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+            "object": "chat.completion",
+        })
+        return response, delay + completion_tokens * self.ms_per_token / 1000
+
+    def _error(self) -> ResponseError:
+        return ResponseError("/chat/completions", 503, b'{"message": "fake backend error"}', None)
+
+    # ---------- API клиента GigaChat ----------
+
+    def chat(self, prompt: Any) -> ChatCompletion:
+        response, delay = self._respond(prompt)
+        time.sleep(delay)
+        if response is None:
+            raise self._error()
+        return response
+
+    async def achat(self, prompt: Any) -> ChatCompletion:
+        response, delay = self._respond(prompt)
+        await asyncio.sleep(delay)
+        if response is None:
+            raise self._error()
+        return response
+
+    async def astream(self, prompt: Any) -> AsyncIterator[ChatCompletionChunk]:
+        response, delay = self._respond(prompt)
+        if response is None:
+            await asyncio.sleep(delay)
+            raise self._error()
+
+        content = response.choices[0].message.content or ""
+        pieces = [content[i:i + 40] for i in range(0, len(content), 40)] or [""]
+        for piece in pieces:
+            await asyncio.sleep(delay / len(pieces))
+            yield ChatCompletionChunk.model_validate({
+                "choices": [{"delta": {"content": piece}, "index": 0}],
+                "created": int(time.time()),
+                "model": self._settings.model,
+                "object": "chat.completion",
+            })
+
+    def open_connections(self) -> int:
+        return 0
+
+    def close(self):
+        pass
+
+    async def aclose(self):
+        pass
@@ -0,0 +1,503 @@
+# llm/gateway.py
+import json
+import time
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from llm import config
+from llm.cache import ResponseCache, make_cache_key
+from llm.singleflight import SingleFlight
+from llm.scheduler import Priority, PriorityScheduler
+from llm.hedging import LatencyTracker, ahedged, hedged
+from llm.deadline import DeadlineExceeded, bounded, check, remaining
+from llm.breaker import CircuitBreaker
+from llm.tokens import count_tokens
+from llm.registry import PooledGigaChat, get_gigachat
+
+from gigachat.context import session_id_cvar
+from gigachat.models import Chat, Function, Messages, MessagesRole
+
+logger = logging.getLogger(__name__)
+
+# Общий на процесс кэш ответов
+response_cache = ResponseCache(
+    path=None if config.LLM_CACHE_PATH.lower() == "off" else config.LLM_CACHE_PATH,
+    memory_size=config.LLM_CACHE_MEMORY_SIZE,
+    disk_size=config.LLM_CACHE_DISK_SIZE
+)
+
+# Склейка одинаковых запросов, которые выполняются прямо сейчас
+inflight = SingleFlight()
+
+# Общий лимит одновременных вызовов GigaChat с приоритетами
+scheduler = PriorityScheduler(
+    max_concurrency=config.LLM_MAX_CONCURRENCY,
+    max_queue=config.LLM_MAX_QUEUE
+)
+
+# Наблюдаемые задержки GigaChat: по ним решаем, когда дублировать запрос
+latency = LatencyTracker(min_samples=config.LLM_HEDGE_MIN_SAMPLES, percentile=config.LLM_HEDGE_PERCENTILE)
+latency_stats = {"hedged": 0, "deadline_exceeded": 0}
+
+# Размер промптов по методам агентов ("agent.method" -> счетчики), токены
+prompt_stats: Dict[str, Dict[str, int]] = {}
+
+# Вызовы по уровням моделей (light/full): задержка и токены
+tier_stats: Dict[str, Dict[str, Any]] = {}
+
+# Разбор ответов по агентам и режимам (text / function / function_text): вызовы и ошибки
+parse_stats: Dict[str, Dict[str, Dict[str, int]]] = {}
+
+# Предохранители по моделям: при отказе GigaChat сразу отдаем fallback
+_breakers: Dict[str, CircuitBreaker] = {}
+
+# Потоки для синхронных вызовов с бюджетом или дублированием
+_executor = ThreadPoolExecutor(max_workers=config.LLM_MAX_CONCURRENCY * 2, thread_name_prefix="llm")
+
+
+def _model_of(llm) -> Optional[str]:
+    """Имя модели клиента (None - неизвестный клиент)"""
+    model = getattr(getattr(llm, "_settings", None), "model", None)
+    return model if isinstance(model, str) else None
+
+
+def _request_key(llm, prompt: Any) -> Optional[str]:
+    """Ключ запроса по содержимому или None для неизвестного клиента"""
+    model = _model_of(llm)
+    if model is None:
+        return None
+
+    params: Dict[str, Any] = {"profanity_check": getattr(llm._settings, "profanity_check", None)}
+    return make_cache_key(model, prompt, params)
+
+
+def _hedge_after(model: Optional[str]) -> Optional[float]:
+    """Через сколько секунд дублировать запрос (None - не дублировать)"""
+    # Под нагрузкой дубли только удлинят очередь
+    if not config.LLM_HEDGE or model is None or scheduler.queued:
+        return None
+    return latency.threshold(model)
+
+
+def _breaker(model: Optional[str]) -> Optional[CircuitBreaker]:
+    """Предохранитель модели (None для неизвестного клиента)"""
+    if model is None:
+        return None
+    breaker = _breakers.get(model)
+    if breaker is None:
+        breaker = _breakers.setdefault(model, CircuitBreaker(
+            model,
+            failure_threshold=config.LLM_BREAKER_FAILURES,
+            open_seconds=config.LLM_BREAKER_OPEN_SECONDS
+        ))
+    return breaker
+
+
+@contextmanager
+def _guarded(breaker: Optional[CircuitBreaker]):
+    if breaker is None:
+        yield
+    else:
+        with breaker.guard():
+            yield
+
+
+def _on_hedge():
+    latency_stats["hedged"] += 1
+
+
+def _deadline_exceeded() -> DeadlineExceeded:
+    latency_stats["deadline_exceeded"] += 1
+    return DeadlineExceeded("Бюджет времени на вызов LLM исчерпан")
+
+
+def _record_prompt(agent: str, method: str, prompt: Any):
+    """Учитывает размер промпта вызова"""
+    tokens = count_tokens(prompt)
+    stats = prompt_stats.setdefault(f"{agent}.{method}", {"calls": 0, "total": 0, "max": 0, "last": 0})
+    stats["calls"] += 1
+    stats["total"] += tokens
+    stats["max"] = max(stats["max"], tokens)
+    stats["last"] = tokens
+
+
+def tier_of(agent: str, method: str) -> str:
+    """Уровень модели метода агента"""
+    tier = config.LLM_METHOD_TIERS.get(f"{agent}.{method}", "full")
+    return tier if tier in config.LLM_TIERS else "full"
+
+
+def _route(llm, prompt: Any, agent: str, method: str):
+    """
+    Клиент и запрос под уровень метода: (llm, prompt, tier)
+
+    Общий клиент GigaChat меняется на клиент модели уровня, к запросу
+    добавляется лимит длины ответа. Чужие клиенты (моки) не подменяются.
+    """
+    tier = tier_of(agent, method)
+    spec = config.LLM_TIERS[tier]
+    shared = isinstance(llm, PooledGigaChat) or (config.LLM_BACKEND == "fake" and getattr(llm, "is_fake", None) is True)
+    if shared and spec["model"] and spec["model"] != _model_of(llm):
+        llm = get_gigachat(spec["model"])
+
+    max_tokens = config.LLM_MAX_TOKENS.get(f"{agent}.{method}", spec["max_tokens"])
+    if max_tokens:
+        if isinstance(prompt, str):
+            prompt = Chat(messages=[Messages(role=MessagesRole.USER, content=prompt)], max_tokens=max_tokens)
+        elif isinstance(prompt, Chat) and prompt.max_tokens is None:
+            prompt = prompt.model_copy(update={"max_tokens": max_tokens})
+    return llm, prompt, tier
+
+
+def _record_tier(tier: str, model: Optional[str], seconds: float, prompt: Any, response=None, content: str = ""):
+    """Учитывает вызов модели уровня: задержку и токены (из usage ответа, иначе оценка)"""
+    usage = getattr(response, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    cached_tokens = getattr(usage, "precached_prompt_tokens", None)
+    stats = tier_stats.setdefault(tier, {"calls": 0, "seconds": 0.0, "prompt_tokens": 0, "cached_prompt_tokens": 0,
+                                         "completion_tokens": 0, "models": set()})
+    stats["calls"] += 1
+    stats["seconds"] += seconds
+    stats["prompt_tokens"] += prompt_tokens if isinstance(prompt_tokens, int) else count_tokens(prompt)
+    stats["completion_tokens"] += (completion_tokens if isinstance(completion_tokens, int)
+                                   else count_tokens(content))
+    if isinstance(cached_tokens, int):
+        stats["cached_prompt_tokens"] += cached_tokens
+    if model is not None:
+        stats["models"].add(model)
+
+
+def _cache_enabled(agent: str, method: str, cache: bool) -> bool:
+    """Кэшируется ли ответ этого метода"""
+    if not cache or "all" in config.LLM_CACHE_DISABLED:
+        return False
+    return agent not in config.LLM_CACHE_DISABLED and f"{agent}.{method}" not in config.LLM_CACHE_DISABLED
+
+
+def _structured(agent: str, method: str, function: Optional[Function]) -> bool:
+    """Просим ли ответ вызовом функции"""
+    if function is None:
+        return False
+    enabled = config.LLM_STRUCTURED_OUTPUT
+    return "all" in enabled or agent in enabled or f"{agent}.{method}" in enabled
+
+
+def _with_function(prompt: Any, function: Function) -> Chat:
+    """Запрос, в котором модель обязана вызвать функцию"""
+    if isinstance(prompt, str):
+        prompt = Chat(messages=[Messages(role=MessagesRole.USER, content=prompt)])
+    return prompt.model_copy(update={"functions": [function], "function_call": {"name": function.name}})
+
+
+def _content_of(response, structured: bool) -> Tuple[str, str]:
+    """
+    Текст ответа и режим, в котором он получен
+
+    Аргументы вызванной функции возвращаются JSON-строкой: агент разбирает
+    их тем же парсером, что и JSON в тексте.
+    """
+    message = response.choices[0].message
+    arguments = getattr(getattr(message, "function_call", None), "arguments", None)
+    if structured and isinstance(arguments, dict):
+        return json.dumps(arguments, ensure_ascii=False), "function"
+    return message.content, "function_text" if structured else "text"
+
+
+def _validated(agent: str, mode: str, content: str, validate: Optional[Callable[[str], Any]]) -> bool:
+    """Проверяет свежий ответ парсером агента и учитывает ошибки разбора"""
+    if validate is None:
+        return True
+    stats = parse_stats.setdefault(agent, {}).setdefault(mode, {"calls": 0, "failures": 0})
+    stats["calls"] += 1
+    try:
+        validate(content)
+        return True
+    except Exception:
+        stats["failures"] += 1
+        return False
+
+
+def _in_session(session: Optional[str], send: Callable[[], Any]) -> Any:
+    """
+    Вызов GigaChat с заголовком X-Session-ID
+
+    По идентификатору сессии GigaChat кэширует уже прочитанное начало
+    диалога: повторный префикс сообщений не обрабатывается заново.
+    Заголовок ставится в потоке или задаче, которые делают запрос.
+    """
+    if session is None:
+        return send()
+    token = session_id_cvar.set(session)
+    try:
+        return send()
+    finally:
+        session_id_cvar.reset(token)
+
+
+async def _ain_session(session: Optional[str], send: Callable[[], Awaitable[Any]]) -> Any:
+    """Асинхронная версия _in_session"""
+    if session is None:
+        return await send()
+    token = session_id_cvar.set(session)
+    try:
+        return await send()
+    finally:
+        session_id_cvar.reset(token)
+
+
+def _store(key: Optional[str], content: str, agent: str):
+    """Кладет проверенный ответ в кэш"""
+    if key is None or not content:
+        return
+    response_cache.set(key, content, config.LLM_CACHE_TTLS.get(agent, 3600), agent=agent)
+
+
+def complete(llm, prompt: Any, *, agent: str, method: str, cache: bool = False,
+             validate: Optional[Callable[[str], Any]] = None,
+             priority: Priority = Priority.BATCH,
+             function: Optional[Function] = None,
+             session: Optional[str] = None) -> str:
+    """
+    Запрос к LLM через общий кэш ответов
+
+    Одинаковые одновременные запросы склеиваются в один вызов GigaChat,
+    вызовы проходят через планировщик с приоритетами. Вызов укладывается
+    в текущий бюджет времени (llm.deadline), медленный запрос дублируется.
+    Пока предохранитель модели разомкнут, вызов сразу отклоняется.
+
+    Args:
+        llm: Клиент GigaChat
+        prompt: Текст промпта или Chat
+        agent: Имя агента (для TTL и статистики)
+        method: Имя метода агента (для отключения кэша)
+        cache: Кэшировать ли ответ этого метода
+        validate: Парсер ответа: исключение - ошибка разбора, ответ не кэшируется
+        priority: Класс приоритета в очереди к GigaChat
+        function: Схема результата (llm.structured.function_for); при включенном
+            LLM_STRUCTURED_OUTPUT модель возвращает аргументы функции
+        session: Идентификатор диалога для кэша префикса на стороне GigaChat
+
+    Returns:
+        Текст ответа модели (или JSON аргументов функции)
+
+    Raises:
+        LLMOverloaded: Очередь переполнена (агент должен вернуть fallback)
+        DeadlineExceeded: Бюджет времени исчерпан (агент должен вернуть fallback)
+        CircuitOpen: GigaChat недоступен (агент должен вернуть fallback)
+    """
+    check()
+    _record_prompt(agent, method, prompt)
+    llm, prompt, tier = _route(llm, prompt, agent, method)
+    structured = _structured(agent, method, function)
+    if structured:
+        prompt = _with_function(prompt, function)
+    model = _model_of(llm)
+    breaker = _breaker(model)
+    key = _request_key(llm, prompt)
+    cache_key = key if _cache_enabled(agent, method, cache) else None
+    if cache_key is not None:
+        cached = response_cache.get(cache_key, agent)
+        if cached is not None:
+            return cached
+
+    def attempt(deadline_at: Optional[float], abandoned: threading.Event) -> Any:
+        """
+        Один запрос к GigaChat в потоке _executor со своим слотом (и у дубля тоже)
+
+        Поток не прервать: если вызывающий ушел по таймауту, слот остается
+        занят до конца запроса, и LLM_MAX_CONCURRENCY соблюдается.
+        """
+        wait = None if deadline_at is None else max(0.0, deadline_at - time.monotonic())
+        with scheduler.slot(priority, timeout=wait):
+            if abandoned.is_set():  # слот достался, когда ответ уже не нужен
+                raise TimeoutError("Ответ LLM больше не нужен")
+            with _guarded(breaker):
+                return _in_session(session, lambda: llm.chat(prompt))
+
+    def call() -> str:
+        if breaker is not None:
+            breaker.check()  # не занимаем очередь, если GigaChat лежит
+        hedge_after, left = _hedge_after(model), remaining()
+        start = time.monotonic()
+        if hedge_after is None and left is None:
+            with scheduler.slot(priority), _guarded(breaker):
+                response = _in_session(session, lambda: llm.chat(prompt))
+        else:
+            deadline_at = None if left is None else start + left
+            response = hedged(_executor, lambda abandoned: attempt(deadline_at, abandoned),
+                              hedge_after, left, _on_hedge)
+        elapsed = time.monotonic() - start
+        if model is not None:
+            latency.observe(model, elapsed)
+        content, mode = _content_of(response, structured)
+        _record_tier(tier, model, elapsed, prompt, response, content)
+        if _validated(agent, mode, content, validate):
+            _store(cache_key, content, agent)
+        return content
+
+    try:
+        if key is None:
+            return call()
+        return inflight.do(key, call, timeout=remaining())
+    except TimeoutError:
+        raise _deadline_exceeded()
+
+
+async def acomplete(llm, prompt: Any, *, agent: str, method: str, cache: bool = False,
+                    validate: Optional[Callable[[str], Any]] = None,
+                    priority: Priority = Priority.BATCH,
+                    on_progress: Optional[Callable[[str], Awaitable[None]]] = None,
+                    function: Optional[Function] = None,
+                    session: Optional[str] = None) -> str:
+    """
+    Асинхронная версия complete
+
+    С on_progress ответ запрашивается потоком: после каждого фрагмента
+    on_progress получает весь накопленный текст. Поток всегда в текстовом
+    режиме - аргументы функции по частям не показать.
+    """
+    check()
+    _record_prompt(agent, method, prompt)
+    llm, prompt, tier = _route(llm, prompt, agent, method)
+    structured = on_progress is None and _structured(agent, method, function)
+    if structured:
+        prompt = _with_function(prompt, function)
+    model = _model_of(llm)
+    breaker = _breaker(model)
+    key = _request_key(llm, prompt)
+    cache_key = key if _cache_enabled(agent, method, cache) else None
+    if cache_key is not None:
+        # SQLite читаем вне event loop
+        cached = await asyncio.to_thread(response_cache.get, cache_key, agent)
+        if cached is not None:
+            return cached
+
+    if on_progress is not None:
+        async def collect() -> str:
+            content = ""
+            start = time.monotonic()
+            async for delta in astream(llm, prompt, priority=priority):
+                content += delta
+                await on_progress(content)
+            _record_tier(tier, model, time.monotonic() - start, prompt, content=content)
+            if _validated(agent, "text", content, validate) and cache_key is not None:
+                await asyncio.to_thread(_store, cache_key, content, agent)
+            return content
+
+        # Поток не склеиваем с другими запросами
+        try:
+            return await bounded(collect())
+        except DeadlineExceeded:
+            raise _deadline_exceeded()
+
+    async def attempt() -> Any:
+        # Свой слот на каждый запрос: дубль тоже считается в LLM_MAX_CONCURRENCY
+        async with scheduler.aslot(priority):
+            with _guarded(breaker):
+                return await _ain_session(session, lambda: llm.achat(prompt))
+
+    async def call() -> str:
+        if breaker is not None:
+            breaker.check()  # не занимаем очередь, если GigaChat лежит
+        start = time.monotonic()
+        response = await ahedged(attempt, _hedge_after(model), _on_hedge)
+        elapsed = time.monotonic() - start
+        if model is not None:
+            latency.observe(model, elapsed)
+        content, mode = _content_of(response, structured)
+        _record_tier(tier, model, elapsed, prompt, response, content)
+        if _validated(agent, mode, content, validate) and cache_key is not None:
+            await asyncio.to_thread(_store, cache_key, content, agent)
+        return content
+
+    try:
+        if key is None:
+            return await bounded(call())
+        # Общий вызов не отменяется, если этот ожидающий не уложился в бюджет
+        return await bounded(inflight.ado(key, call))
+    except DeadlineExceeded:
+        raise _deadline_exceeded()
+
+
+async def astream(llm, prompt: Any, *, priority: Priority = Priority.BATCH) -> AsyncIterator[str]:
+    """
+    Потоковый ответ модели: фрагменты текста по мере генерации
+
+    Слот планировщика занят до конца потока, ошибки учитывает предохранитель.
+    """
+    model = _model_of(llm)
+    breaker = _breaker(model)
+    if breaker is not None:
+        breaker.check()
+
+    async with scheduler.aslot(priority):
+        with _guarded(breaker):
+            start = time.monotonic()
+            async for chunk in llm.astream(prompt):
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            if model is not None:
+                latency.observe(model, time.monotonic() - start)
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Статистика кэша ответов LLM и склейки запросов"""
+    stats = response_cache.get_stats()
+    stats["coalesced"] = inflight.stats["shared"]
+    return stats
+
+
+def get_scheduler_stats() -> Dict[str, Any]:
+    """Загрузка планировщика вызовов LLM"""
+    return scheduler.get_stats()
+
+
+def get_latency_stats() -> Dict[str, Any]:
+    """Задержки по моделям, дубли запросов и превышения бюджета"""
+    return {**latency_stats, "models": latency.get_stats()}
+
+
+def get_prompt_stats() -> Dict[str, Dict[str, Any]]:
+    """Размер промптов по методам агентов: вызовы, средний, максимальный и последний, токены"""
+    return {
+        name: {**stats, "avg": round(stats["total"] / stats["calls"]) if stats["calls"] else 0}
+        for name, stats in prompt_stats.items()
+    }
+
+
+def get_tier_stats() -> Dict[str, Dict[str, Any]]:
+    """Вызовы по уровням моделей: средняя задержка и токены на вызов"""
+    result = {}
+    for tier, stats in tier_stats.items():
+        calls = stats["calls"] or 1
+        result[tier] = {
+            "calls": stats["calls"],
+            "models": sorted(stats["models"]),
+            "avg_ms": round(stats["seconds"] / calls * 1000, 1),
+            "prompt_tokens": stats["prompt_tokens"],
+            "cached_prompt_tokens": stats["cached_prompt_tokens"],
+            "completion_tokens": stats["completion_tokens"],
+            "avg_completion_tokens": round(stats["completion_tokens"] / calls),
+        }
+    return result
+
+
+def get_parse_stats() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Доля ошибок разбора ответов по агентам и режимам"""
+    return {
+        agent: {
+            mode: {**stats, "failure_rate": round(stats["failures"] / stats["calls"], 3) if stats["calls"] else 0.0}
+            for mode, stats in modes.items()
+        }
+        for agent, modes in parse_stats.items()
+    }
+
+
+def get_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """Состояние предохранителей по моделям"""
+    return {model: breaker.get_stats() for model, breaker in list(_breakers.items())}
@@ -0,0 +1,111 @@
+# llm/hedging.py
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+
+class LatencyTracker:
+    """Скользящее окно задержек вызовов по моделям"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20, percentile: float = 0.9):
+        self.window = window
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+
+    def threshold(self, model: str) -> Optional[float]:
+        """Перцентиль задержки (None - пока мало данных)"""
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * self.percentile))]
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            model: {"samples": len(self._samples[model]), "p90": round(self.threshold(model) or 0.0, 3)}
+            for model in list(self._samples)
+        }
+
+
+async def ahedged(fn: Callable[[], Awaitable[Any]], hedge_after: Optional[float],
+                  on_hedge: Callable[[], None] = None) -> Any:
+    """
+    Вызов с дублированием: если fn не ответила за hedge_after секунд,
+    запускаем второй такой же вызов и берем тот, что вернется первым
+    """
+    first = asyncio.ensure_future(fn())
+    if hedge_after is None:
+        return await first
+
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if done:
+            return first.result()
+
+        if on_hedge:
+            on_hedge()
+        tasks.add(asyncio.ensure_future(fn()))
+
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            # Ошибка одного из вызовов не важна, пока другой ответил или еще жив
+            result = _first_success(done, tasks)
+            if result is not None:
+                return result.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _first_success(done, pending):
+    """Успешно завершенный вызов; если упали все - любой из упавших (его ошибка поднимется)"""
+    for task in done:
+        if task.exception() is None:
+            return task
+    return next(iter(done)) if not pending else None
+
+
+def hedged(executor: ThreadPoolExecutor, fn: Callable[[threading.Event], Any], hedge_after: Optional[float],
+           timeout: Optional[float], on_hedge: Callable[[], None] = None) -> Any:
+    """
+    Синхронная версия ahedged для блокирующих вызовов
+
+    Поток с запросом нельзя прервать, поэтому fn получает событие abandoned:
+    оно выставляется, когда ответ больше не нужен (пришел другой или вышел
+    timeout). fn сама решает, что делать с уже начатым запросом.
+
+    Raises:
+        TimeoutError: Ни один вызов не успел за timeout секунд
+    """
+    start = time.monotonic()
+    abandoned = threading.Event()
+    futures = {executor.submit(fn, abandoned)}
+    try:
+        if hedge_after is not None and (timeout is None or hedge_after < timeout):
+            done, _ = wait(futures, timeout=hedge_after)
+            if not done:
+                if on_hedge:
+                    on_hedge()
+                futures.add(executor.submit(fn, abandoned))
+
+        while futures:
+            left = None if timeout is None else max(0.0, timeout - (time.monotonic() - start))
+            done, futures = wait(futures, timeout=left, return_when=FIRST_COMPLETED)
+            if not done:
+                raise TimeoutError("Вызов LLM не уложился в бюджет")
+            result = _first_success(done, futures)
+            if result is not None:
+                return result.result()
+        raise TimeoutError("Вызов LLM не уложился в бюджет")
+    finally:
+        abandoned.set()
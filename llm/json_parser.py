@@ -0,0 +1,172 @@
+# llm/json_parser.py
+import json
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+
+Model = TypeVar("Model", bound=BaseModel)
+
+_CLOSERS = {"{": "}", "[": "]"}
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+# Слова, которые json.loads принимает без кавычек
+_BARE_WORDS = {"true", "false", "null", "NaN", "Infinity"}
+
+
+class JSONExtractError(ValueError):
+    """В ответе модели нет JSON, который удалось бы восстановить"""
+
+
+def _scan(text: str, start: int) -> Tuple[str, str, List[Tuple[int, str]]]:
+    """
+    Один проход по тексту от первой скобки до парной ей
+
+    По пути исправляет типичные ошибки LLM: одинарные кавычки (и \\' в них),
+    висящие запятые, переводы строк внутри строк, True/False/None.
+    Прочие слова вне строк (текст после обрезанного объекта) выкидываются.
+
+    Returns:
+        (JSON без незакрытых скобок, недостающие закрывающие скобки,
+         точки отката для обрезанного ответа)
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    cuts: List[Tuple[int, str]] = []  # (длина out, закрывающие скобки) после запятой
+    quote: Optional[str] = None
+    escape = False
+    i, n = start, len(text)
+
+    while i < n:
+        ch = text[i]
+
+        if quote:
+            if escape:
+                if ch == "'":  # \' в JSON недопустим - оставляем просто кавычку
+                    out[-1] = ch
+                else:
+                    out.append(ch)
+                escape = False
+            elif ch == "\\":
+                out.append(ch)
+                escape = True
+            elif ch == quote:
+                out.append('"')
+                quote = None
+            elif ch == '"':  # двойная кавычка внутри строки в одинарных
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            elif ch == "\t":
+                out.append("\\t")
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch in "\"'":
+            quote = ch
+            out.append('"')
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+            out.append(ch)
+        elif ch in "}]":
+            # Висящая запятая перед закрывающей скобкой
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if ch not in stack:
+                i += 1
+                continue
+            # Незакрытые внутренние скобки закрываем сами
+            while stack:
+                closer = stack.pop()
+                out.append(closer)
+                if closer == ch:
+                    break
+            if not stack:
+                return "".join(out), "", cuts
+        elif ch == ",":
+            cuts.append((len(out), "".join(reversed(stack))))
+            out.append(ch)
+        elif ch.isalpha():
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = _LITERALS.get(text[i:j], text[i:j])
+            # Экспонента числа (1e5) - часть числа, а не слово
+            if word in _BARE_WORDS or (out and out[-1][-1:].isdigit()):
+                out.append(word)
+            i = j
+            continue
+        else:
+            out.append(ch)
+        i += 1
+
+    # Ответ оборвался: закрываем строку и скобки
+    if quote:
+        if escape:
+            out.pop()
+        out.append('"')
+    return "".join(out), "".join(reversed(stack)), cuts
+
+
+def extract_json(text: str, root: str = "{") -> Any:
+    """
+    Находит и разбирает первый JSON-объект (или массив при root="[") в ответе модели
+
+    Markdown-блоки и текст вокруг игнорируются. Обрезанный ответ
+    восстанавливается до последнего целого элемента.
+
+    Raises:
+        JSONExtractError: JSON не найден или не восстанавливается
+    """
+    if not text:
+        raise JSONExtractError("Пустой ответ модели")
+
+    # Быстрый путь: ответ - чистый JSON
+    stripped = text.strip()
+    if stripped.startswith(root):
+        try:
+            return json.loads(stripped)
+        except ValueError:
+            pass
+
+    start = text.find(root)
+    if start < 0:
+        raise JSONExtractError(f"В ответе нет '{root}'")
+
+    body, closers, cuts = _scan(text, start)
+    try:
+        return json.loads(body + closers)
+    except ValueError:
+        pass
+
+    # Оборванный последний элемент: откатываемся к предыдущей запятой
+    for length, cut_closers in reversed(cuts[-3:]):
+        try:
+            return json.loads(body[:length] + cut_closers)
+        except ValueError:
+            continue
+
+    raise JSONExtractError("Не удалось восстановить JSON из ответа модели")
+
+
+def parse_model(text: str, model: Type[Model], defaults: Optional[Dict[str, Any]] = None,
+                **overrides: Any) -> Model:
+    """
+    Извлекает JSON из ответа и сразу валидирует его в pydantic-модель
+
+    Args:
+        text: Ответ модели
+        model: Класс pydantic-модели
+        defaults: Значения полей, которые модель могла не вернуть
+        overrides: Поля, которые берутся не из ответа (например, context_used)
+
+    Raises:
+        JSONExtractError: JSON не найден
+        pydantic.ValidationError: JSON не подходит под модель
+    """
+    data = extract_json(text)
+    if not isinstance(data, dict):
+        raise JSONExtractError("Ожидался JSON-объект")
+    return model.model_validate({**(defaults or {}), **data, **overrides})
@@ -0,0 +1,29 @@
+# llm/partial_json.py
+import re
+import json
+from typing import List
+
+
+def string_fields(text: str, field: str, allow_partial: bool = False) -> List[str]:
+    """
+    Значения строкового поля из недописанного JSON (для показа прогресса)
+
+    Args:
+        text: Накопленный ответ модели
+        field: Имя поля
+        allow_partial: Вернуть и последнее значение, у которого еще нет закрывающей кавычки
+
+    Returns:
+        Значения в порядке появления
+    """
+    pattern = r'"%s"\s*:\s*"((?:[^"\\]|\\.)*)(")?' % re.escape(field)
+    values = []
+    for match in re.finditer(pattern, text):
+        raw, closed = match.group(1), match.group(2)
+        if not closed and not allow_partial:
+            continue
+        try:
+            values.append(json.loads(f'"{raw.rstrip(chr(92))}"'))
+        except ValueError:
+            values.append(raw)
+    return values
@@ -0,0 +1,82 @@
+# llm/prefetch.py
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+from llm.deadline import bounded
+
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """
+    Упреждающая генерация: ответ LLM запрашивается до того, как его попросят
+
+    Задачи привязаны к сессии и отменяются вместе с ней. Результат готовой
+    задачи отдается из памяти, незавершенную задачу можно дождаться вместо
+    повторного вызова. Вне event loop (синхронный путь) ничего не запускается.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._sessions: Dict[str, Set[Hashable]] = {}
+        self.stats = {"started": 0, "ready": 0, "joined": 0, "misses": 0, "failed": 0, "cancelled": 0}
+
+    def start(self, session_id: str, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> bool:
+        """Запускает фоновую задачу, если такой еще нет"""
+        if key in self._tasks:
+            return False
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+        task = loop.create_task(factory())
+        task.add_done_callback(self._log_failure)
+        self._tasks[key] = task
+        self._sessions.setdefault(session_id, set()).add(key)
+        self.stats["started"] += 1
+        return True
+
+    def _log_failure(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            self.stats["failed"] += 1
+            logger.info(f"ℹ️  Упреждающий запрос не удался: {task.exception()}")
+
+    async def take(self, key: Hashable, share: float = 0.5) -> Optional[Any]:
+        """
+        Результат упреждающей задачи или None
+
+        Незавершенную задачу ждем не дольше share от оставшегося бюджета,
+        чтобы осталось время на обычный вызов. Задача при этом не отменяется.
+        """
+        task = self._tasks.pop(key, None)
+        if task is None or task.cancelled():
+            self.stats["misses"] += 1
+            return None
+
+        ready = task.done()
+        try:
+            result = task.result() if ready else await bounded(asyncio.shield(task), share=share)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise  # отменили ожидающего, а не задачу
+            self.stats["misses"] += 1
+            return None
+        except Exception:  # задача упала или не успела (DeadlineExceeded)
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["ready" if ready else "joined"] += 1
+        return result
+
+    def cancel(self, session_id: str):
+        """Отменяет задачи сессии (сессия завершилась - результат больше не нужен)"""
+        for key in self._sessions.pop(session_id, set()):
+            task = self._tasks.pop(key, None)
+            if task is not None and not task.done():
+                task.cancel()
+                self.stats["cancelled"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": sum(not t.done() for t in self._tasks.values())}
@@ -0,0 +1,195 @@
+# llm/registry.py
+import os
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+import httpx
+from gigachat import GigaChat
+
+from llm import config
+from llm.token_cache import TokenCache
+
+logger = logging.getLogger(__name__)
+
+try:
+    from gigachat.client import _get_kwargs
+except ImportError:  # другая версия SDK - используем лимиты по умолчанию
+    _get_kwargs = None
+
+# Те же функции OAuth, что использует SDK внутри _update_token
+from gigachat.client import auth, _build_access_token
+
+
+class PooledGigaChat(GigaChat):
+    """GigaChat с настраиваемым пулом соединений, keep-alive и общим кэшем токена"""
+
+    def __init__(self, *, max_keepalive_connections: int, keepalive_expiry: float,
+                 token_cache: Optional[TokenCache] = None, **kwargs):
+        super().__init__(**kwargs)
+        self._limits = httpx.Limits(
+            max_connections=self._settings.max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self._token_cache = token_cache
+        self._token_key = TokenCache.make_key(self._settings.credentials, self._settings.scope)
+        self._client_lock = threading.Lock()
+
+    # ---------- токен: общий кэш на диске ----------
+
+    def _is_token_usable(self) -> bool:
+        if self._token_cache is None:
+            return super()._is_token_usable()
+        # Обновляем заранее, а не в момент истечения
+        return self._token_cache.is_fresh(self._access_token)
+
+    def _fetch_token(self) -> Optional[Any]:
+        """
+        OAuth запрос средствами SDK
+
+        Новый токен не пишется в клиент: до замены остальные запросы
+        продолжают видеть текущий токен и не запускают свое обновление.
+        """
+        if self._settings.credentials:
+            return auth.auth_sync(self._auth_client, url=self._settings.auth_url,
+                                  credentials=self._settings.credentials, scope=self._settings.scope)
+        if self._settings.user and self._settings.password:
+            return _build_access_token(auth.token_sync(self._client, user=self._settings.user,
+                                                       password=self._settings.password))
+        return None
+
+    def _update_token(self) -> None:
+        if self._token_cache is None:
+            return super()._update_token()
+        if self._is_token_usable():
+            return
+        self._access_token = self._token_cache.get_or_fetch(self._token_key, self._fetch_token)
+
+    async def _aupdate_token(self) -> None:
+        if self._token_cache is None:
+            return await super()._aupdate_token()
+        if self._is_token_usable():
+            return
+        # Файловая блокировка и редкий OAuth запрос - в отдельном потоке
+        self._access_token = await asyncio.to_thread(
+            self._token_cache.get_or_fetch, self._token_key, self._fetch_token
+        )
+
+    def _reset_token(self) -> None:
+        # Токен отвергнут сервером (401) - убираем его и из общего кэша
+        if self._token_cache is not None and self._access_token is not None:
+            try:
+                self._token_cache.invalidate(self._token_key, self._access_token.access_token)
+            except Exception as e:
+                logger.warning(f"⚠️  Не удалось очистить кэш токенов: {e}")
+        super()._reset_token()
+
+    def _http_kwargs(self) -> Dict[str, Any]:
+        kwargs = _get_kwargs(self._settings)
+        kwargs["limits"] = self._limits
+        return kwargs
+
+    if _get_kwargs is not None:
+        @property
+        def _client(self) -> httpx.Client:
+            if self._client_instance is None:
+                # Не _sync_token_lock: его держит обновление токена по логину/паролю, которому нужен _client
+                with self._client_lock:
+                    if self._client_instance is None:
+                        self._client_instance = httpx.Client(**self._http_kwargs())
+            return self._client_instance
+
+        @property
+        def _aclient(self) -> httpx.AsyncClient:
+            if self._aclient_instance is None:
+                self._aclient_instance = httpx.AsyncClient(**self._http_kwargs())
+            return self._aclient_instance
+
+    def open_connections(self) -> int:
+        """Количество открытых соединений в sync и async пулах"""
+        total = 0
+        for http_client in (getattr(self, "_client_instance", None), getattr(self, "_aclient_instance", None)):
+            pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+            if pool is not None:
+                total += len(getattr(pool, "connections", []))
+        return total
+
+
+# model -> общий клиент
+_clients: Dict[str, PooledGigaChat] = {}
+_lock = threading.Lock()
+
+# Токен один на учетные данные, поэтому кэш общий для всех моделей
+_token_cache: Optional[TokenCache] = (
+    TokenCache(config.TOKEN_CACHE_PATH, config.TOKEN_REFRESH_MARGIN)
+    if config.TOKEN_CACHE_PATH.lower() != "off" else None
+)
+
+
+def get_gigachat(model: Optional[str] = None) -> PooledGigaChat:
+    """
+    Возвращает общий на процесс клиент GigaChat для модели
+
+    С LLM_BACKEND=fake - локальная подмена (llm.fake.FakeGigaChat) с тем же API.
+
+    Args:
+        model: Имя модели (по умолчанию GIGACHAT_MODEL)
+
+    Returns:
+        Клиент с общим пулом соединений и токеном
+    """
+    model = model or config.DEFAULT_MODEL
+
+    client = _clients.get(model)
+    if client is None:
+        with _lock:
+            client = _clients.get(model)
+            if client is None and config.LLM_BACKEND == "fake":
+                from llm.fake import FakeGigaChat
+                client = _clients[model] = FakeGigaChat(model)
+                logger.info(f"🧪 Локальная подмена GigaChat для модели {model}")
+            elif client is None:
+                client = PooledGigaChat(
+                    credentials=os.getenv("GIGACHAT_CLIENT_SECRET"),
+                    verify_ssl_certs=False,
+                    model=model,
+                    timeout=config.REQUEST_TIMEOUT,
+                    max_connections=config.MAX_CONNECTIONS,
+                    max_keepalive_connections=config.MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=config.KEEPALIVE_EXPIRY,
+                    token_cache=_token_cache
+                )
+                _clients[model] = client
+                logger.info(f"🔌 Создан общий клиент GigaChat для модели {model} "
+                            f"(max_connections={config.MAX_CONNECTIONS})")
+    return client
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Статистика пулов соединений по моделям"""
+    return {
+        "clients": len(_clients),
+        "max_connections": config.MAX_CONNECTIONS,
+        "max_keepalive_connections": config.MAX_KEEPALIVE_CONNECTIONS,
+        "keepalive_expiry": config.KEEPALIVE_EXPIRY,
+        "models": {
+            model: {"open_connections": client.open_connections()}
+            for model, client in list(_clients.items())
+        }
+    }
+
+
+async def aclose_all():
+    """Закрывает все клиенты (при остановке бота)"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+
+    for client in clients:
+        try:
+            await client.aclose()
+            client.close()
+        except Exception as e:
+            logger.error(f"❌ Ошибка закрытия клиента GigaChat: {e}")
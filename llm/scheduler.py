@@ -0,0 +1,194 @@
+# llm/scheduler.py
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+import threading
+from enum import IntEnum
+from contextlib import contextmanager, asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Классы приоритета вызовов LLM (меньше - важнее)"""
+    INTERACTIVE = 0  # оценка ответов и подсказки, пользователь ждет
+    QUESTIONS = 1    # генерация вопросов интервью
+    BATCH = 2        # планы, ревью, рекомендации
+    BACKGROUND = 3   # фоновые задачи
+
+
+# Доля очереди, после которой класс начинает получать отказ:
+# фоновые задачи отбрасываются первыми, интерактивные - последними
+SHED_THRESHOLDS = {
+    Priority.INTERACTIVE: 1.0,
+    Priority.QUESTIONS: 0.75,
+    Priority.BATCH: 0.5,
+    Priority.BACKGROUND: 0.25,
+}
+
+
+class LLMOverloaded(Exception):
+    """Очередь к LLM переполнена - вызов отброшен, агент отдает fallback"""
+
+
+class _Waiter:
+    """Ожидающий слота поток или корутина"""
+
+    __slots__ = ("priority", "event", "loop", "future", "granted", "cancelled")
+
+    def __init__(self, priority: Priority, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.priority = priority
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+        self.granted = False
+        self.cancelled = False
+
+
+class PriorityScheduler:
+    """
+    Ограничитель одновременных вызовов LLM с приоритетами
+
+    Не больше max_concurrency вызовов одновременно. Освободившийся слот
+    получает самый приоритетный из ожидающих. Когда очередь глубже порога
+    для класса, новый вызов сразу получает LLMOverloaded.
+    Общий для потоков и корутин.
+    """
+
+    def __init__(self, max_concurrency: int = 16, max_queue: int = 64):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        self._heap: List[Any] = []
+        self._seq = itertools.count()
+
+        self.stats: Dict[str, Dict[str, int]] = {
+            p.name.lower(): {"admitted": 0, "shed": 0} for p in Priority
+        }
+        self._wait_total = 0.0
+
+    # ---------- очередь ----------
+
+    def _try_admit(self, priority: Priority, loop=None) -> Optional[_Waiter]:
+        """Занимает слот сразу (None) или ставит в очередь (waiter)"""
+        with self._lock:
+            if self._active < self.max_concurrency and not self._queued:
+                self._active += 1
+                self.stats[priority.name.lower()]["admitted"] += 1
+                return None
+
+            if self._queued >= self.max_queue * SHED_THRESHOLDS[priority]:
+                self.stats[priority.name.lower()]["shed"] += 1
+                raise LLMOverloaded(f"Очередь к LLM переполнена ({self._queued}), "
+                                    f"приоритет {priority.name}")
+
+            waiter = _Waiter(priority, loop)
+            heapq.heappush(self._heap, (priority, next(self._seq), waiter))
+            self._queued += 1
+            return waiter
+
+    def _cancel(self, waiter: _Waiter) -> bool:
+        """Убирает из очереди; False - слот уже выдан"""
+        with self._lock:
+            if waiter.granted:
+                return False
+            waiter.cancelled = True
+            self._queued -= 1
+            return True
+
+    def release(self):
+        """Освобождает слот: передает его самому приоритетному ожидающему"""
+        with self._lock:
+            while self._heap:
+                _, _, waiter = heapq.heappop(self._heap)
+                if waiter.cancelled:
+                    continue
+                waiter.granted = True
+                self._queued -= 1
+                self.stats[waiter.priority.name.lower()]["admitted"] += 1
+                break
+            else:
+                self._active -= 1
+                return
+
+        # Слот переходит ожидающему, счетчик active не меняется
+        if waiter.loop is None:
+            waiter.event.set()
+            return
+        try:
+            waiter.loop.call_soon_threadsafe(self._resolve, waiter)
+        except RuntimeError:  # цикл событий уже закрыт
+            self.release()
+
+    def _resolve(self, waiter: _Waiter):
+        if waiter.future.cancelled():
+            self.release()
+        else:
+            waiter.future.set_result(None)
+
+    # ---------- API ----------
+
+    @contextmanager
+    def slot(self, priority: Priority = Priority.BATCH, timeout: Optional[float] = None):
+        """
+        Слот для синхронного вызова
+
+        Raises:
+            LLMOverloaded: Очередь переполнена
+            TimeoutError: Слот не освободился за timeout секунд
+        """
+        start = time.perf_counter()
+        waiter = self._try_admit(priority)
+        if waiter is not None and not waiter.event.wait(timeout):
+            if self._cancel(waiter):
+                raise TimeoutError("Не дождались слота для вызова LLM")
+            # Слот выдали в последний момент - пользуемся им
+        self._wait_total += time.perf_counter() - start
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self, priority: Priority = Priority.BATCH):
+        """Слот для асинхронного вызова"""
+        start = time.perf_counter()
+        waiter = self._try_admit(priority, asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                # Слот выдан, но не получен: отменено ожидание после _resolve
+                if not self._cancel(waiter) and waiter.future.done() and not waiter.future.cancelled():
+                    self.release()
+                raise
+        self._wait_total += time.perf_counter() - start
+        try:
+            yield
+        finally:
+            self.release()
+
+    @property
+    def queued(self) -> int:
+        """Сколько вызовов ждут слота"""
+        return self._queued
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Текущая загрузка и счетчики по классам"""
+        with self._lock:
+            admitted = sum(s["admitted"] for s in self.stats.values())
+            return {
+                "active": self._active,
+                "queued": self._queued,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "shed": sum(s["shed"] for s in self.stats.values()),
+                "avg_wait_ms": round(self._wait_total / admitted * 1000, 1) if admitted else 0.0,
+                "priorities": {name: dict(s) for name, s in self.stats.items()}
+            }
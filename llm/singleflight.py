@@ -0,0 +1,81 @@
+# llm/singleflight.py
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    """Выполняющийся вызов, которого ждут остальные потоки"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """
+    Склейка одинаковых одновременных вызовов
+
+    Пока вызов с ключом выполняется, повторные вызовы с тем же ключом
+    не идут в сеть, а ждут и получают тот же результат (или ту же ошибку).
+    Работает и для потоков (do), и для корутин (ado).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Tuple[int, Hashable], asyncio.Task] = {}
+        self.stats = {"calls": 0, "shared": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Выполняет fn один раз на все одновременные вызовы с ключом key
+
+        timeout ограничивает только ожидание чужого вызова (TimeoutError).
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.stats["shared"] += 1
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError("Не дождались общего вызова")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Асинхронная версия do: все ожидающие получают результат одной корутины"""
+        task_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            self.stats["calls"] += 1
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = self._tasks[task_key] = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda _: self._forget(task_key))
+            else:
+                self.stats["shared"] += 1
+
+        # Отмена одного ожидающего не отменяет общий запрос
+        return await asyncio.shield(task)
+
+    def _forget(self, task_key: Tuple[int, Hashable]):
+        with self._lock:
+            self._tasks.pop(task_key, None)
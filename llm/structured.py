@@ -0,0 +1,58 @@
+# llm/structured.py
+from typing import Any, Dict, Iterable, Optional, Type
+
+from pydantic import BaseModel
+from gigachat.models import Function
+
+# Служебные поля результатов агентов: их заполняет код, а не модель
+SERVICE_FIELDS = ("context_used", "rag_context_used")
+
+
+def _resolve(schema: Dict[str, Any], defs: Dict[str, Any], exclude: Iterable[str] = ()) -> Dict[str, Any]:
+    """JSON Schema pydantic -> простая схема GigaChat: без $ref, anyOf с null и title"""
+    if not schema:  # list без типа элементов
+        return {"type": "string"}
+    if "$ref" in schema:
+        schema = defs[schema["$ref"].split("/")[-1]]
+    if "anyOf" in schema:
+        variants = [s for s in schema["anyOf"] if s.get("type") != "null"]
+        schema = {**variants[0], **{k: v for k, v in schema.items() if k not in ("anyOf", "default")}}
+
+    result: Dict[str, Any] = {"type": schema.get("type", "object")}
+    if schema.get("description"):
+        result["description"] = schema["description"]
+    if "enum" in schema:
+        result["enum"] = [str(v) for v in schema["enum"]]
+    if "items" in schema:
+        result["items"] = _resolve(schema["items"], defs)
+    if "properties" in schema:
+        result["properties"] = {
+            name: _resolve(prop, defs)
+            for name, prop in schema["properties"].items() if name not in exclude
+        }
+        required = [name for name in schema.get("required", []) if name not in exclude]
+        if required:
+            result["required"] = required
+    return result
+
+
+def function_for(model: Type[BaseModel], name: str, description: str,
+                 fields: Optional[Dict[str, str]] = None) -> Function:
+    """
+    Описание функции GigaChat, аргументы которой - поля pydantic-модели
+
+    Модель вызывает функцию и возвращает аргументы готовым JSON,
+    без текста вокруг. Служебные поля (SERVICE_FIELDS) в схему не попадают.
+
+    Args:
+        model: Модель результата агента
+        name: Имя функции
+        description: Что делает функция (модель читает это описание)
+        fields: Описания полей верхнего уровня
+    """
+    schema = model.model_json_schema()
+    parameters = _resolve(schema, schema.get("$defs", {}), exclude=SERVICE_FIELDS)
+    for field, text in (fields or {}).items():
+        if field in parameters["properties"]:
+            parameters["properties"][field]["description"] = text
+    return Function(name=name, description=description, parameters=parameters)
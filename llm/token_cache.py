@@ -0,0 +1,129 @@
+# llm/token_cache.py
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from gigachat.models import AccessToken
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировка только внутри процесса
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCache:
+    """
+    Файловый кэш OAuth токенов GigaChat
+
+    Токен и время его истечения хранятся на диске, поэтому переживают
+    перезапуск и общие для всех процессов на узле. Запись защищена
+    файловой блокировкой: токен запрашивает только один процесс.
+    """
+
+    def __init__(self, path: Path, refresh_margin: float = 300.0):
+        self.path = Path(path)
+        self.lock_path = self.path.with_suffix(self.path.suffix + ".lock")
+        self.refresh_margin = refresh_margin
+        self._thread_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(credentials: Optional[str], scope: Optional[str]) -> str:
+        """Ключ записи: хэш учетных данных (сами данные на диск не пишем)"""
+        raw = f"{credentials or ''}:{scope or ''}"
+        return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+    def is_fresh(self, token: Optional[AccessToken]) -> bool:
+        """Токен действует дольше, чем запас на упреждающее обновление"""
+        if token is None:
+            return False
+        if token.expires_at == 0:  # токен без срока действия
+            return True
+        return token.expires_at > (time.time() + self.refresh_margin) * 1000
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, "a") as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"⚠️  Не удалось прочитать кэш токенов: {e}")
+            return {}
+
+    def _write(self, data: Dict[str, Dict]):
+        # Атомарная замена: читатели без блокировки не увидят половину файла
+        tmp_path = self.path.with_suffix(self.path.suffix + f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, self.path)
+
+    def load(self, key: str) -> Optional[AccessToken]:
+        """Читает токен из кэша (без блокировки)"""
+        entry = self._read().get(key)
+        if not entry:
+            return None
+        return AccessToken(access_token=entry["access_token"], expires_at=entry["expires_at"])
+
+    def store(self, key: str, token: AccessToken):
+        """Сохраняет токен (вызывать под блокировкой)"""
+        data = self._read()
+        data[key] = {"access_token": token.access_token, "expires_at": token.expires_at}
+        self._write(data)
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Optional[AccessToken]]) -> Optional[AccessToken]:
+        """
+        Возвращает свежий токен из кэша или получает новый
+
+        Args:
+            key: Ключ учетных данных
+            fetch: Функция, выполняющая OAuth запрос
+
+        Returns:
+            Токен доступа
+        """
+        token = self.load(key)
+        if self.is_fresh(token):
+            return token
+
+        with self._locked():
+            # Пока ждали блокировку, токен мог обновить другой процесс
+            token = self.load(key)
+            if self.is_fresh(token):
+                return token
+
+            token = fetch()
+            if token is not None:
+                self.store(key, token)
+                logger.info("🔑 Токен GigaChat обновлен и сохранен в кэш")
+            return token
+
+    def invalidate(self, key: str, access_token: Optional[str] = None):
+        """Удаляет токен, отвергнутый сервером (если его еще не заменили)"""
+        with self._locked():
+            data = self._read()
+            entry = data.get(key)
+            if entry and (access_token is None or entry["access_token"] == access_token):
+                del data[key]
+                self._write(data)
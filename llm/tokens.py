@@ -0,0 +1,36 @@
+# llm/tokens.py
+import re
+from typing import Any
+
+# Слова, отдельные знаки, переводы строк и отступы: токенизатор GigaChat
+# режет слова на части, а серии пробелов кодирует отдельными токенами
+_PIECE_RE = re.compile(r"\w+|[^\w\s]|\n|[ \t]{2,}")
+_CYRILLIC_RE = re.compile(r"[а-яё]", re.IGNORECASE)
+
+
+def count_tokens(text: Any) -> int:
+    """
+    Локальная оценка числа токенов, без запроса к API
+
+    Русское слово - примерно токен на 3 символа, латиница и цифры - на 4,
+    знак препинания и перевод строки - отдельный токен, отступ - токен
+    на 4 пробела. Одиночный пробел входит в соседнее слово.
+    Для Chat считаются тексты сообщений.
+    """
+    if text is None:
+        return 0
+    if not isinstance(text, str):
+        messages = getattr(text, "messages", None) or []
+        return sum(count_tokens(m.content) for m in messages)
+
+    tokens = 0
+    for piece in _PIECE_RE.findall(text):
+        if piece[0] in " \t":
+            tokens += (len(piece) + 3) // 4
+        elif len(piece) == 1:
+            tokens += 1
+        elif _CYRILLIC_RE.search(piece):
+            tokens += (len(piece) + 2) // 3
+        else:
+            tokens += (len(piece) + 3) // 4
+    return tokens
@@ -32,6 +32,7 @@ if not TOKEN:
 # =========================
 USE_RAG = False  # Определяем ДО использования
 agents = {}
+pool_warmup = None  # фоновый прогрев пула вопросов, отменяется при остановке
 
 # Создаем папки при запуске (важно для Railway)
 Path("data").mkdir(exist_ok=True)
@@ -50,6 +51,7 @@ sys.path.append(str(Path(__file__).resolve().parent))
 # Сначала импортируем утилиты
 from bot.utils import setup_rag, setup_database, get_bot_commands
 from bot.config import WELCOME_MESSAGE
+from llm import config as llm_config
 
 # Затем импортируем агентов (исправленные названия)
 try:
@@ -102,6 +104,12 @@ agents_dict = {
 }
 
 
+def _log_background_failure(task: asyncio.Task):
+    """Ошибка фоновой задачи не должна пропасть молча"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"❌ Фоновая задача {task.get_name()} упала: {task.exception()}")
+
+
 # =========================
 # Базовые обработчики команд (fallback на случай проблем)
 # =========================
@@ -163,12 +171,55 @@ async def cmd_status(message: types.Message):
     agents_status = f"✅ {len(active_agents)}/{len(agents_dict)}" if active_agents else "❌ Нет"
     rag_status = "✅ ВКЛ" if USE_RAG else "❌ ВЫКЛ"
 
+    from llm.registry import get_pool_stats
+    pool = get_pool_stats()
+    open_connections = sum(m["open_connections"] for m in pool["models"].values())
+
+    from llm.gateway import (get_cache_stats, get_scheduler_stats, get_latency_stats, get_breaker_stats,
+                             get_prompt_stats, get_tier_stats, get_parse_stats)
+    cache = get_cache_stats()
+    scheduler = get_scheduler_stats()
+    latency = get_latency_stats()
+    breakers = get_breaker_stats()
+    breaker_status = ", ".join(f"{model}: {b['state']}" for model, b in breakers.items()) or "нет вызовов"
+    tiers = get_tier_stats()
+    tier_status = ", ".join(
+        f"{tier}: {t['calls']} выз., {t['avg_ms']:.0f} мс, ~{t['avg_completion_tokens']} ток."
+        for tier, t in tiers.items()
+    ) or "нет вызовов"
+    prompts = get_prompt_stats()
+    prompt_calls = sum(p["calls"] for p in prompts.values())
+    prompt_avg = round(sum(p["total"] for p in prompts.values()) / prompt_calls) if prompt_calls else 0
+    parse = [m for modes in get_parse_stats().values() for m in modes.values()]
+    parse_calls = sum(m["calls"] for m in parse)
+    parse_failures = sum(m["failures"] for m in parse)
+    from rag.retriever import get_embedding_cache_stats
+    embeddings = get_embedding_cache_stats()
+    embedding_status = f"{embeddings['hit_rate']:.0%} попаданий" if embeddings else "нет запросов"
+    from rag.retriever import get_result_cache_stats
+    results = get_result_cache_stats()
+
     await message.answer(
         f"🤖 <b>Статус InterPrep AI:</b>\n\n"
         f"🔄 <b>Бот:</b> Активен\n"
         f"🧠 <b>Агенты:</b> {agents_status}\n"
         f"📚 <b>RAG:</b> {rag_status}\n"
-        f"💾 <b>База данных:</b> ✅ Готова\n\n"
+        f"💾 <b>База данных:</b> ✅ Готова\n"
+        f"🔌 <b>GigaChat:</b> {pool['clients']} клиент(ов), "
+        f"{open_connections}/{pool['max_connections']} соединений\n"
+        f"🗃 <b>Кэш LLM:</b> {cache['hits']} попаданий, {cache['misses']} промахов "
+        f"({cache['hit_rate']:.0%})\n"
+        f"🚦 <b>Очередь LLM:</b> {scheduler['active']}/{scheduler['max_concurrency']} в работе, "
+        f"{scheduler['queued']} ждут, {scheduler['shed']} отброшено\n"
+        f"⏱ <b>Задержки LLM:</b> {latency['hedged']} дублей, "
+        f"{latency['deadline_exceeded']} по таймауту\n"
+        f"🛡 <b>Предохранитель:</b> {breaker_status}\n"
+        f"🎚 <b>Уровни моделей:</b> {tier_status}\n"
+        f"📏 <b>Промпты:</b> в среднем {prompt_avg} токенов за {prompt_calls} вызовов\n"
+        f"🧩 <b>Разбор ответов:</b> {parse_failures} ошибок из {parse_calls}\n"
+        f"🔎 <b>Кэш эмбеддингов:</b> {embedding_status}\n"
+        f"🗂 <b>Кэш поиска:</b> {results['hits']} попаданий, {results['misses']} промахов "
+        f"({results['hit_rate']:.0%})\n\n"
         f"<b>Доступные агенты:</b>\n" + "\n".join([f"• {agent}" for agent in active_agents])
     )
 
@@ -178,7 +229,7 @@ async def cmd_status(message: types.Message):
 # =========================
 async def main():
     """Главная функция запуска бота"""
-    global USE_RAG, agents_dict
+    global USE_RAG, agents_dict, pool_warmup
 
     logger.info("🚀 Запуск InterPrep AI...")
 
@@ -215,6 +266,13 @@ async def main():
                 "reviewer": ReviewerAgent(use_rag=USE_RAG)
             }
             logger.info("✅ Агенты инициализированы")
+
+            # Прогрев пула вопросов популярных связок - в фоне, бот стартует сразу
+            question_pool = agents_dict["interviewer"].question_pool
+            if question_pool is not None and llm_config.QUESTION_POOL_WARM:
+                pool_warmup = asyncio.create_task(question_pool.warm(llm_config.QUESTION_POOL_WARM),
+                                                  name="question_pool_warmup")
+                pool_warmup.add_done_callback(_log_background_failure)
         except Exception as e:
             logger.error(f"❌ Ошибка инициализации агентов: {e}")
             # Создаем базовые заглушки
@@ -290,11 +348,20 @@ async def main():
     except Exception as e:
         logger.error(f"❌ Ошибка поллинга: {e}")
         raise
+    finally:
+        # Прогрев живет в цикле событий main - отменяем его здесь, а не в on_shutdown
+        if pool_warmup is not None and not pool_warmup.done():
+            pool_warmup.cancel()
 
 
 async def on_shutdown():
     """Завершение работы бота"""
     logger.info("👋 Завершение работы InterPrep AI...")
+    try:
+        from llm.registry import aclose_all
+        await aclose_all()
+    except Exception as e:
+        logger.error(f"❌ Ошибка при закрытии клиентов GigaChat: {e}")
     try:
         await bot.close()
     except Exception as e:
@@ -0,0 +1,2 @@
+# prompts/__init__.py
+# Пустой файл, чтобы папка стала модулем
@@ -0,0 +1,147 @@
+# prompts/registry.py
+import re
+import sys
+import hashlib
+import textwrap
+from pathlib import Path
+from string import Formatter
+from typing import Any, Dict, FrozenSet, Iterable, Optional
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from llm.tokens import count_tokens
+
+_INNER_SPACES_RE = re.compile(r"(?<=\S)[ \t]{2,}")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+class PromptError(ValueError):
+    """Шаблон промпта или его параметры не сходятся"""
+
+
+def minify(text: str) -> str:
+    """
+    Убирает из шаблона пробелы, которые модель не читает, а мы оплачиваем
+
+    Общий отступ строк, хвостовые пробелы, выравнивание внутри строки
+    и лишние пустые строки. Относительный отступ (вложенность JSON) остается.
+    """
+    text = textwrap.dedent(text).strip("\n")
+    lines = [_INNER_SPACES_RE.sub(" ", line.rstrip()) for line in text.split("\n")]
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+class PromptTemplate:
+    """
+    Скомпилированный шаблон промпта
+
+    Текст минифицируется один раз при регистрации. Версию нужно поднимать
+    при каждом изменении текста: от текста зависят ключи кэша ответов LLM.
+    """
+
+    def __init__(self, name: str, text: str, version: int = 1):
+        self.name = name
+        self.version = version
+        self.text = minify(text)
+        self.fingerprint = hashlib.sha256(self.text.encode("utf-8")).hexdigest()[:12]
+        parsed = list(Formatter().parse(self.text))
+        self.placeholders: FrozenSet[str] = frozenset(field for _, field, _, _ in parsed if field is not None)
+        # Фиксированные куски текста: по ним узнаем шаблон в готовом промпте
+        self.literals = tuple(literal.strip() for literal, _, _, _ in parsed if literal.strip())
+        if any(not field.isidentifier() for field in self.placeholders):
+            raise PromptError(f"Промпт {self.id}: неименованный или составной параметр "
+                              f"в {sorted(self.placeholders)}")
+        # Фиксированная часть промпта: без подставляемых значений (до и после минификации)
+        empty = {field: "" for field in self.placeholders}
+        self.tokens = count_tokens(self.text.format(**empty))
+        self.raw_tokens = count_tokens(text.format(**empty))
+
+    @property
+    def id(self) -> str:
+        return f"{self.name}@v{self.version}"
+
+    def format(self, **params: Any) -> str:
+        """Подставляет параметры; лишние и недостающие - ошибка"""
+        missing = self.placeholders - params.keys()
+        extra = params.keys() - self.placeholders
+        if missing or extra:
+            raise PromptError(f"Промпт {self.id}: не хватает {sorted(missing)}, лишние {sorted(extra)}")
+        return self.text.format(**params)
+
+    def __repr__(self) -> str:
+        return f"<PromptTemplate {self.id} {self.tokens} токенов>"
+
+
+class PromptRegistry:
+    """Все шаблоны промптов агентов по именам"""
+
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._fingerprints: Dict[str, str] = {}
+
+    def register(self, name: str, text: str, version: int = 1,
+                 params: Optional[Iterable[str]] = None) -> PromptTemplate:
+        """
+        Компилирует и регистрирует шаблон
+
+        Args:
+            name: Имя вида "agent.prompt"
+            text: Текст шаблона в формате str.format
+            version: Версия текста
+            params: Ожидаемые параметры; расхождение с шаблоном - ошибка при импорте
+
+        Raises:
+            PromptError: Параметры не совпали или тот же name@version с другим текстом
+        """
+        template = PromptTemplate(name, text, version)
+        if params is not None and frozenset(params) != template.placeholders:
+            raise PromptError(f"Промпт {template.id}: в тексте {sorted(template.placeholders)}, "
+                              f"ожидались {sorted(params)}")
+
+        known = self._fingerprints.get(template.id)
+        if known is not None and known != template.fingerprint:
+            raise PromptError(f"Промпт {template.id} изменился без смены версии")
+
+        self._fingerprints[template.id] = template.fingerprint
+        self._templates[name] = template
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise PromptError(f"Промпт '{name}' не зарегистрирован") from None
+
+    def render(self, name: str, **params: Any) -> str:
+        return self.get(name).format(**params)
+
+    def match(self, text: str) -> Optional[PromptTemplate]:
+        """
+        Шаблон, по которому собран текст промпта (None - не наш промпт)
+
+        Подходят шаблоны, все фиксированные куски которых есть в тексте;
+        из них берется самый длинный (пачка оценок, а не ее элемент).
+        """
+        best, best_size = None, 0
+        for template in self._templates.values():
+            size = sum(len(literal) for literal in template.literals)
+            if size > best_size and all(literal in text for literal in template.literals):
+                best, best_size = template, size
+        return best
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._templates
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Версия и фиксированная стоимость каждого шаблона в токенах (до и после минификации)"""
+        return {
+            name: {
+                "version": t.version,
+                "fingerprint": t.fingerprint,
+                "tokens": t.tokens,
+                "raw_tokens": t.raw_tokens,
+                "placeholders": sorted(t.placeholders),
+            }
+            for name, t in sorted(self._templates.items())
+        }
@@ -0,0 +1,504 @@
+# prompts/templates.py
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from prompts.registry import PromptRegistry
+
+# Общий реестр промптов всех агентов.
+# При изменении текста шаблона поднимайте version: от текста зависят ключи кэша LLM
+PROMPTS = PromptRegistry()
+
+
+# ===============================
+#  Assessor
+# ===============================
+PROMPTS.register("assessor.assess", """
+Ты — эксперт по техническим собеседованиям и оценке знаний.
+
+Темы для оценки: {topics}
+
+Ответ пользователя: {answer}
+
+Всегда:
+- давай явный вердикт по готовности к собеседованиям;
+- объясняй, что означают выставленные баллы и какие темы проседают;
+- предлагай конкретные следующие шаги.
+
+Даже если запрос сформулирован общо, всё равно сделай разумное предположение и дай вердикт по готовности.
+
+Верни строго JSON:
+{{
+  "scores": {{
+    "theory": int,            # теоретическая база (0-100)
+    "practice": int,          # практический опыт (0-100)
+    "interview_readiness": int # готовность к собеседованию (0-100)
+  }},
+  "weak_topics": ["конкретные слабые темы"],
+  "follow_up": "уточняющий вопрос для следующего шага",
+  "feedback": "конструктивный разбор: что уже ок, что мешает собеседованиям и что делать дальше"
+}}
+""", params=["topics", "answer"])
+
+PROMPTS.register("assessor.assess_rag", """
+Ты — эксперт по техническим собеседованиям. Используй информацию из базы знаний, но не цитируй её дословно.
+
+КОНТЕКСТ ПОЛЬЗОВАТЕЛЯ:
+- Уровень: {level}
+- Направление: {track}
+- Текущий вопрос: {question}
+
+КОНТЕКСТ ИЗ БАЗЫ ЗНАНИЙ (примеры вопросов и тем):
+{rag_context}
+
+Темы для оценки: {topics}
+
+Ответ пользователя: {answer}
+
+Всегда:
+- давай явный вердикт по готовности к собеседованиям;
+- используй контекст только как подсказку, но отвечай применительно к пользователю;
+- объясняй, что означают выставленные баллы и какие темы проседают;
+- предлагай конкретные следующие шаги.
+
+Верни строго JSON:
+{{
+  "scores": {{
+    "theory": int,            # теоретическая база (0-100)
+    "practice": int,          # практический опыт (0-100)
+    "interview_readiness": int # готовность к собеседованию (0-100)
+  }},
+  "weak_topics": ["конкретные слабые темы"],
+  "follow_up": "уточняющий вопрос для следующего шага",
+  "feedback": "конструктивный разбор: что уже ок, что мешает собеседованиям и что делать дальше"
+}}
+""", params=["level", "track", "question", "rag_context", "topics", "answer"])
+
+PROMPTS.register("assessor.feedback", """
+Оцени ответ на технический вопрос.
+
+КОНТЕКСТ:
+- Уровень: {level}
+- Направление: {track}
+
+Вопрос: {question}
+Ответ пользователя: {user_answer}
+{details}
+
+Проанализируй ответ по критериям:
+1. Техническая точность (0-40)
+2. Полнота ответа (0-30)
+3. Структура и ясность (0-20)
+4. Примеры и детали (0-10)
+
+Верни строго JSON:
+{{
+  "total_score": 0-100,
+  "criteria_scores": {{
+    "accuracy": 0-40,
+    "completeness": 0-30,
+    "clarity": 0-20,
+    "examples": 0-10
+  }},
+  "strengths": ["сильные стороны"],
+  "improvements": ["что улучшить"],
+  "recommended_resources": ["ресурсы для изучения"]
+}}
+""", params=["level", "track", "question", "user_answer", "details"])
+
+
+# ===============================
+#  Interviewer
+# ===============================
+PROMPTS.register("interviewer.questions", """
+Ты — опытный технический интервьюер.
+
+КОНТЕКСТ ПОЛЬЗОВАТЕЛЯ:
+- Уровень: {user_level}
+- Направление: {track}
+
+Сгенерируй 3 вопроса по теме: {topic}
+Вопросы должны соответствовать уровню {user_level}.
+
+Формат строго JSON:
+{{
+  "questions": [
+    {{
+      "topic": "конкретная подтема",
+      "question": "текст вопроса",
+      "expected_concepts": ["концепция1", "концепция2"],
+      "difficulty": "easy/medium/hard",
+      "hints": ["подсказка при затруднении"]
+    }}
+  ]
+}}
+""", params=["user_level", "track", "topic"])
+
+PROMPTS.register("interviewer.questions_rag", """
+Ты — опытный технический интервьюер. У тебя есть доступ к базе вопросов.
+
+КОНТЕКСТ ИЗ БАЗЫ ЗНАНИЙ:
+{rag_context}
+
+КОНТЕКСТ ПОЛЬЗОВАТЕЛЯ:
+- Уровень: {user_level}
+- Направление: {track}
+
+Сгенерируй 3 уникальных вопроса по теме: {topic}
+Вопросы должны соответствовать уровню {user_level}.
+
+Формат строго JSON:
+{{
+  "questions": [
+    {{
+      "topic": "конкретная подтема",
+      "question": "текст вопроса",
+      "expected_concepts": ["концепция1", "концепция2", "концепция3"],
+      "difficulty": "easy/medium/hard",
+      "hints": ["подсказка 1", "подсказка 2"]
+    }}
+  ]
+}}
+
+Создай 1 легкий, 1 средний и 1 сложный вопрос.
+""", params=["rag_context", "user_level", "track", "topic"])
+
+PROMPTS.register("interviewer.evaluate", """
+Ты — технический интервьюер.
+
+КОНТЕКСТ:
+- Уровень кандидата: {user_level}
+
+ВОПРОС: {question}
+ОЖИДАЕМЫЕ КОНЦЕПЦИИ: {concepts}
+
+ОТВЕТ КАНДИДАТА: {answer}
+
+Оцени ответ кандидата уровня {user_level} по шкале 0-100.
+
+Формат строго JSON:
+{{
+  "score": число от 0 до 100,
+  "comment": "конструктивный фидбек",
+  "strong_points": ["что хорошо в ответе"],
+  "weak_points": ["что нужно доработать"]
+}}
+""", params=["user_level", "question", "concepts", "answer"])
+
+PROMPTS.register("interviewer.evaluate_rag", """
+Ты — технический интервьюер.
+
+КОНТЕКСТ ПОЛЬЗОВАТЕЛЯ:
+- Уровень: {user_level}
+
+ИНФОРМАЦИЯ ДЛЯ ОЦЕНКИ:
+{rag_context}
+
+ВОПРОС: {question}
+ОЖИДАЕМЫЕ КОНЦЕПЦИИ: {concepts}
+
+ОТВЕТ КАНДИДАТА: {answer}
+
+Оцени ответ кандидата уровня {user_level} по шкале 0-100.
+Учти, что для уровня {user_level} требования соответствующие.
+
+Формат строго JSON:
+{{
+  "score": число от 0 до 100,
+  "comment": "детальный фидбек, что правильно, что можно улучшить",
+  "strong_points": ["сильные стороны ответа"],
+  "weak_points": ["что нужно улучшить"],
+  "recommended_resources": ["рекомендации по изучению"]
+}}
+""", params=["user_level", "rag_context", "question", "concepts", "answer"])
+
+# Режим диалога: роль и формат один раз на интервью, дальше только вопрос и ответ
+PROMPTS.register("interviewer.evaluate_system", """
+Ты — технический интервьюер. Кандидат уровня {user_level} по очереди отвечает на вопросы.
+Каждый ответ оцени отдельно по шкале 0-100, требования - как для уровня {user_level}.
+Прошлые оценки в диалоге нужны только для последовательности шкалы.
+
+Формат каждого ответа строго JSON:
+{{
+  "score": число от 0 до 100,
+  "comment": "конструктивный фидбек: что правильно, что можно улучшить",
+  "strong_points": ["сильные стороны ответа"],
+  "weak_points": ["что нужно улучшить"],
+  "recommended_resources": ["рекомендации по изучению"]
+}}
+""", params=["user_level"])
+
+PROMPTS.register("interviewer.evaluate_turn", """
+ВОПРОС: {question}
+ОЖИДАЕМЫЕ КОНЦЕПЦИИ: {concepts}
+
+ОТВЕТ КАНДИДАТА: {answer}
+""", params=["question", "concepts", "answer"])
+
+PROMPTS.register("interviewer.evaluate_turn_rag", """
+ИНФОРМАЦИЯ ДЛЯ ОЦЕНКИ:
+{rag_context}
+
+ВОПРОС: {question}
+ОЖИДАЕМЫЕ КОНЦЕПЦИИ: {concepts}
+
+ОТВЕТ КАНДИДАТА: {answer}
+""", params=["rag_context", "question", "concepts", "answer"])
+
+# Пачка ответов разных кандидатов: одна оценка на каждый элемент
+PROMPTS.register("interviewer.evaluate_batch", """
+Ты — технический интервьюер. Оцени каждый ответ кандидата отдельно по шкале 0-100,
+требования - как для уровня кандидата в элементе. Элементы между собой не связаны.
+
+{items}
+
+Формат строго JSON-массив, по объекту на каждый элемент:
+[
+  {{
+    "id": номер элемента,
+    "score": число от 0 до 100,
+    "comment": "конструктивный фидбек",
+    "strong_points": ["что хорошо в ответе"],
+    "weak_points": ["что нужно доработать"]
+  }}
+]
+""", params=["items"])
+
+PROMPTS.register("interviewer.evaluate_batch_item", """
+[{id}] Уровень: {user_level}
+ВОПРОС: {question}
+ОЖИДАЕМЫЕ КОНЦЕПЦИИ: {concepts}
+ОТВЕТ КАНДИДАТА: {answer}
+""", params=["id", "user_level", "question", "concepts", "answer"])
+
+PROMPTS.register("interviewer.evaluate_batch_item_rag", """
+[{id}] Уровень: {user_level}
+ИНФОРМАЦИЯ ДЛЯ ОЦЕНКИ: {rag_context}
+ВОПРОС: {question}
+ОЖИДАЕМЫЕ КОНЦЕПЦИИ: {concepts}
+ОТВЕТ КАНДИДАТА: {answer}
+""", params=["id", "user_level", "rag_context", "question", "concepts", "answer"])
+
+PROMPTS.register("interviewer.hints", """
+Вопрос для интервью: {question}
+Тема: {topic}
+Уровень кандидата: {level}
+
+Дай 2 подсказки, которые помогут кандидату уровня {level} ответить на вопрос.
+Подсказки должны быть конкретными и полезными.
+
+Формат: ["подсказка 1", "подсказка 2"]
+""", params=["question", "topic", "level"])
+
+# Режим экзамена: все ответы интервью оцениваются одним вызовом в конце
+PROMPTS.register("interviewer.exam", """
+Ты — технический интервьюер. Кандидат уровня {user_level} прошел интервью по теме {topic}.
+Оцени каждый ответ по шкале 0-100, затем подведи итог интервью.
+
+{items}
+
+Формат строго JSON:
+{{
+  "scores": [
+    {{
+      "id": номер вопроса,
+      "score": число от 0 до 100,
+      "comment": "конструктивный фидбек",
+      "strong_points": ["что хорошо в ответе"],
+      "weak_points": ["что нужно доработать"]
+    }}
+  ],
+  "summary": "общий итог интервью в 2-3 предложениях",
+  "recommendations": ["рекомендация 1", "рекомендация 2", "рекомендация 3"]
+}}
+""", params=["user_level", "topic", "items"])
+
+PROMPTS.register("interviewer.exam_item", """
+[{id}] ВОПРОС: {question}
+ОЖИДАЕМЫЕ КОНЦЕПЦИИ: {concepts}
+ОТВЕТ КАНДИДАТА: {answer}
+""", params=["id", "question", "concepts", "answer"])
+
+PROMPTS.register("interviewer.recommendations", """
+На основе слабых сторон: {weak_points}
+Дай 3 конкретные рекомендации для улучшения.
+
+Формат: ["рекомендация 1", "рекомендация 2", "рекомендация 3"]
+""", params=["weak_points"])
+
+
+# ===============================
+#  Planner
+# ===============================
+PROMPTS.register("planner.plan", """
+Ты — AI-планировщик для подготовки к техническим собеседованиям.
+
+Создай детальный план обучения на {weeks} недель для пользователя с описанием: "{user_text}"
+Уровень: {level}
+Направление: {track}
+
+Формат ответа строго JSON:
+{{
+  "plan": [
+    {{
+      "week": 1,
+      "title": "Название недели",
+      "description": "Описание целей недели",
+      "topics": ["тема1", "тема2"],
+      "tasks": ["задача1", "задача2"],
+      "resources": ["ресурс1", "ресурс2"],
+      "estimated_hours": 10,
+      "success_criteria": ["критерий1", "критерий2"]
+    }}
+  ],
+  "summary": "Краткое описание плана",
+  "total_weeks": {weeks},
+  "total_hours": 40,
+  "focus_areas": ["основная область 1", "основная область 2"]
+}}
+""", params=["weeks", "user_text", "level", "track"])
+
+PROMPTS.register("planner.plan_rag", """
+Ты — AI-планировщик с доступом к базе знаний о подготовке к собеседованиям.
+
+КОНТЕКСТ ИЗ БАЗЫ ЗНАНИЙ (материалы, ресурсы, советы):
+{rag_context}
+
+РЕСУРСЫ ИЗ БАЗЫ ЗНАНИЙ (книги, курсы, статьи):
+{resources}
+
+Создай персонализированный план обучения на {weeks} недель.
+
+Информация о пользователе:
+- Описание: {user_text}
+- Уровень: {level}
+- Направление: {track}
+- Цели: {goals}
+
+Используй контекст из базы знаний для подбора актуальных ресурсов и тем.
+План должен быть реалистичным и сфокусированным на слабых местах.
+
+Формат ответа строго JSON:
+{{
+  "plan": [
+    {{
+      "week": номер недели,
+      "title": "Название недели",
+      "description": "Детальное описание целей",
+      "topics": ["конкретные темы для изучения"],
+      "tasks": ["практические задачи и упражнения"],
+      "resources": ["ссылки на материалы из контекста или известные ресурсы"],
+      "estimated_hours": число часов,
+      "success_criteria": ["измеримые критерии успеха"]
+    }}
+  ],
+  "summary": "Детальное обоснование плана",
+  "total_weeks": {weeks},
+  "total_hours": общее количество часов,
+  "focus_areas": ["ключевые области для фокуса"]
+}}
+""", version=2, params=["rag_context", "resources", "weeks", "user_text", "level", "track", "goals"])
+
+PROMPTS.register("planner.adjust", """
+Исходный план обучения:
+{plan_json}
+
+Фидбек пользователя: {feedback}
+
+Скорректируй план с учетом фидбека. Сохрани общую структуру.
+
+Формат ответа такой же JSON как в исходном плане.
+""", params=["plan_json", "feedback"])
+
+
+# ===============================
+#  Reviewer
+# ===============================
+PROMPTS.register("reviewer.review", """
+Ты — Senior Code Reviewer. Проведи строгое ревью кода.
+
+Язык: {language}
+Контекст задачи: {context}
+
+Код:
+{code}
+
+Проанализируй по критериям:
+1. Корректность и баги
+2. Производительность и оптимизация
+3. Читаемость и стиль
+4. Архитектура и дизайн
+5. Безопасность (если применимо)
+
+Формат ответа строго JSON:
+{{
+  "summary": "общая оценка кода",
+  "issues": [
+    {{
+      "type": "bug|style|performance|security|architecture|best_practice",
+      "line": номер строки или null,
+      "description": "описание проблемы",
+      "recommendation": "как исправить",
+      "severity": "low|medium|high|critical"
+    }}
+  ],
+  "score": 0-100,
+  "follow_up": "уточняющий вопрос",
+  "strengths": ["сильная сторона 1", "сильная сторона 2"],
+  "improvements": ["общее улучшение 1", "общее улучшение 2"]
+}}
+""", params=["language", "context", "code"])
+
+PROMPTS.register("reviewer.review_rag", """
+Ты — Senior Code Reviewer с доступом к базе знаний о лучших практиках.
+
+КОНТЕКСТ ИЗ БАЗЫ ЗНАНИЙ (лучшие практики, антипаттерны, примеры):
+{rag_context}
+
+Язык: {language}
+Контекст задачи: {context}
+
+Код для ревью:
+{code}
+
+Проведи детальный анализ кода с использованием контекста из базы знаний.
+Ищи не только ошибки, но и возможности для улучшения в соответствии с best practices.
+
+Формат ответа строго JSON:
+{{
+  "summary": "детальная оценка с ссылками на best practices",
+  "issues": [
+    {{
+      "type": "тип проблемы",
+      "line": номер строки,
+      "description": "детальное описание с объяснением почему это проблема",
+      "recommendation": "конкретное исправление с примером",
+      "severity": "low|medium|high|critical",
+      "code_snippet": "фрагмент проблемного кода"
+    }}
+  ],
+  "score": 0-100,
+  "follow_up": "вопрос для углубленного анализа",
+  "strengths": ["что хорошо сделано"],
+  "improvements": ["общие рекомендации по архитектуре"],
+  "similar_solutions": ["похожие подходы или паттерны"]
+}}
+""", params=["rag_context", "language", "context", "code"])
+
+PROMPTS.register("reviewer.quick_feedback", """
+Дай быструю обратную связь по коду (максимум 3 предложения):
+
+Язык: {language}
+Код: {code}...
+
+Ответь одним абзацем.
+""", params=["language", "code"])
+
+
+# Быстрый тест: фиксированная стоимость промптов
+if __name__ == "__main__":
+    print("📏 Промпты агентов (токены без подставленных значений):")
+    for name, stats in PROMPTS.get_stats().items():
+        print(f"   {name} v{stats['version']}: {stats['tokens']} (было {stats['raw_tokens']})")
@@ -0,0 +1,111 @@
+# rag/context.py
+import re
+import sys
+from pathlib import Path
+from typing import List, Optional, Sequence, Set
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from llm import config
+from llm.tokens import count_tokens
+
+# Границы предложений: конец фразы или перенос строки
+_SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+# Фрагмент, от которого после дедупликации осталось меньше этой доли, пропускаем
+MIN_NEW_SHARE = 0.3
+
+
+def token_budget(agent: str, method: str) -> int:
+    """Бюджет контекста метода агента из настроек, токены"""
+    return config.RAG_TOKEN_BUDGETS.get(f"{agent}.{method}", config.RAG_DEFAULT_TOKENS)
+
+
+def _normalize(sentence: str) -> str:
+    return " ".join(sentence.lower().split()).rstrip(".!?…")
+
+
+def _sentences(chunk: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(chunk) if s.strip()]
+
+
+def _cut(sentence: str, max_tokens: int) -> str:
+    """Начало предложения по словам в пределах max_tokens (с многоточием), пустая строка если не влезло ни слова"""
+    words: List[str] = []
+    used = count_tokens("…")
+    for word in sentence.split():
+        tokens = count_tokens(word)
+        if used + tokens > max_tokens:
+            break
+        words.append(word)
+        used += tokens
+    return " ".join(words) + "…" if words else ""
+
+
+def assemble_context(
+        chunks: Sequence[str],
+        max_tokens: int,
+        template: str = "- {chunk}",
+        scores: Optional[Sequence[float]] = None,
+        seen: Optional[Set[str]] = None
+) -> str:
+    """
+    Собирает контекст для промпта в пределах бюджета токенов
+
+    Фрагменты берутся по убыванию релевантности (scores, иначе порядок
+    выдачи поиска). Предложения, которые уже попали в контекст, выкидываются;
+    фрагмент, почти целиком повторяющий уже взятые, пропускается.
+    Не влезающий фрагмент обрезается по границе предложения, а если не
+    влезает даже первое предложение - по словам.
+
+    Args:
+        chunks: Найденные фрагменты
+        max_tokens: Бюджет на весь контекст
+        template: Формат строки фрагмента, доступны {i} (с 1) и {chunk}
+        scores: Релевантность фрагментов (больше - лучше)
+        seen: Общий набор взятых предложений, если контекст собирается из нескольких секций
+
+    Returns:
+        Строки контекста через перенос, пустая строка если ничего не влезло
+    """
+    order = range(len(chunks))
+    if scores is not None:
+        order = sorted(order, key=lambda idx: -scores[idx])
+
+    seen = set() if seen is None else seen
+    lines: List[str] = []
+    left = max_tokens
+
+    for idx in order:
+        sentences = _sentences(chunks[idx] or "")
+        fresh = [s for s in sentences if _normalize(s) not in seen]
+        if not fresh or len(fresh) < len(sentences) * MIN_NEW_SHARE:
+            continue
+
+        # Берем столько предложений, сколько влезает (токены слов аддитивны)
+        used = count_tokens(template.format(i=len(lines) + 1, chunk=""))
+        taken: List[str] = []
+        for sentence in fresh:
+            tokens = count_tokens(sentence)
+            if used + tokens > left:
+                break
+            taken.append(sentence)
+            used += tokens
+        if taken:
+            text = " ".join(taken)
+        else:
+            # Длинное первое предложение не выбрасываем целиком - режем по словам
+            text = _cut(fresh[0], left - used)
+            if not text:
+                continue
+            used += count_tokens(text)
+            taken = fresh[:1]
+
+        lines.append(template.format(i=len(lines) + 1, chunk=text))
+        left -= used + 1  # перенос строки между фрагментами
+        seen.update(_normalize(s) for s in taken)
+        if left <= 0:
+            break
+
+    return "\n".join(lines)
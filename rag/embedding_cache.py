@@ -0,0 +1,179 @@
+# rag/embedding_cache.py
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """Ключ кэша: лишние пробелы не меняют запрос"""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class EmbeddingCache:
+    """
+    Кэш эмбеддингов запросов: LRU в памяти и (необязательно) SQLite на диске
+
+    Векторы хранятся как float32. namespace - имя модели эмбеддингов:
+    векторы другой модели с диска не подхватываются.
+    """
+
+    def __init__(self, size: int = 1024, path: Optional[Path] = None, namespace: str = "default",
+                 disk_size: int = 20000):
+        self.size = size
+        self.path = Path(path) if path else None
+        self.namespace = namespace
+        self.disk_size = disk_size
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+
+        if self.path:
+            self._open_disk()
+
+    def _open_disk(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB, accessed_at REAL)"
+            )
+            self._conn.commit()
+        except Exception as e:
+            logger.warning(f"⚠️  Дисковый кэш эмбеддингов недоступен, работаем только в памяти: {e}")
+            self._conn = None
+
+    def _disk_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\n{text}".encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Вектор запроса или None"""
+        text = normalize_query(text)
+        with self._lock:
+            vector = self._memory.get(text)
+            if vector is not None:
+                self._memory.move_to_end(text)
+                self.stats["hits"] += 1
+                return vector
+
+            if self._conn is not None:
+                try:
+                    key = self._disk_key(text)
+                    row = self._conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                    if row is not None:
+                        self._conn.execute("UPDATE embeddings SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                        self._conn.commit()
+                        vector = np.frombuffer(row[0], dtype=np.float32)
+                        self._memory_set(text, vector)
+                        self.stats["disk_hits"] += 1
+                        return vector
+                except sqlite3.Error as e:
+                    logger.warning(f"⚠️  Ошибка чтения кэша эмбеддингов: {e}")
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, text: str, vector: Any):
+        text = normalize_query(text)
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._memory_set(text, vector)
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO embeddings (key, vector, accessed_at) VALUES (?, ?, ?)",
+                        (self._disk_key(text), vector.tobytes(), time.time())
+                    )
+                    self._writes += 1
+                    if self._writes % 100 == 0:
+                        self._conn.execute(
+                            "DELETE FROM embeddings WHERE key IN ("
+                            "SELECT key FROM embeddings ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                            (self.disk_size,)
+                        )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"⚠️  Ошибка записи кэша эмбеддингов: {e}")
+
+    def _memory_set(self, text: str, vector: np.ndarray):
+        self._memory[text] = vector
+        self._memory.move_to_end(text)
+        while len(self._memory) > self.size:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM embeddings")
+                self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.stats["hits"] + self.stats["disk_hits"]
+            requests = hits + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(hits / requests, 3) if requests else 0.0,
+                "entries": len(self._memory),
+                "disk": self._conn is not None,
+            }
+
+
+class CachedEmbeddingFunction(EmbeddingFunction):
+    """
+    Функция эмбеддингов коллекции с кэшем перед ней
+
+    Пачка запросов: из кэша берутся известные тексты, модель считает только
+    остальные (одним вызовом). Коллекция ретривера только ищет, поэтому
+    кэшируются оба пути - __call__ (chromadb 0.4) и embed_query (chromadb 1.x).
+    """
+
+    def __init__(self, inner: Callable, cache: EmbeddingCache):
+        self.inner = inner
+        self.cache = cache
+
+    def __call__(self, input: List[str]) -> List[np.ndarray]:
+        return self._embed(input, self.inner)
+
+    def embed_query(self, input: List[str]) -> List[np.ndarray]:
+        return self._embed(input, getattr(self.inner, "embed_query", self.inner))
+
+    def _embed(self, texts: List[str], embed: Callable) -> List[np.ndarray]:
+        vectors: List[Optional[np.ndarray]] = [self.cache.get(text) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            for i, vector in zip(missing, embed([texts[i] for i in missing])):
+                vectors[i] = np.asarray(vector, dtype=np.float32)
+                self.cache.set(texts[i], vectors[i])
+        return vectors
+
+    # Конфигурация - от исходной функции: Chroma сверяет ее с сохраненной в коллекции
+    def name(self) -> str:
+        return self.inner.name() if hasattr(self.inner, "name") else "default"
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.inner.get_config() if hasattr(self.inner, "get_config") else {}
+
+    def default_space(self):
+        return self.inner.default_space() if hasattr(self.inner, "default_space") else "l2"
+
+    def supported_spaces(self):
+        return self.inner.supported_spaces() if hasattr(self.inner, "supported_spaces") else ["cosine", "l2", "ip"]
+
+    def is_legacy(self) -> bool:
+        return self.inner.is_legacy() if hasattr(self.inner, "is_legacy") else True
@@ -4,6 +4,7 @@ from pathlib import Path
 import chromadb
 from chromadb.config import Settings
 import hashlib
+import time
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 KNOWLEDGE_DIR = BASE_DIR / "knowledge"
@@ -111,6 +112,21 @@ def load_all_knowledge():
     return documents
 
 
+def knowledge_fingerprint(documents) -> str:
+    """Хэш текстов и метаданных всех документов"""
+    raw = json.dumps([[doc["text"], doc["metadata"]] for doc in documents], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _invalidate_retrieval_cache():
+    """Сбрасывает кэш поиска, если база пересобрана внутри процесса бота"""
+    try:
+        from rag.retriever import invalidate_cache
+    except ImportError:  # запуск скриптом: другие процессы заметят новую версию коллекции сами
+        return
+    invalidate_cache()
+
+
 def create_knowledge_base():
     """Создает векторную базу знаний"""
     print("🚀 Создаю базу знаний InterPrep AI...")
@@ -143,13 +159,15 @@ def create_knowledge_base():
     except:
         pass
 
-    # Создаем новую коллекцию
+    # Создаем новую коллекцию; отпечаток содержимого меняет версию для кэша поиска
     collection = client.create_collection(
         name=COLLECTION_NAME,
         metadata={
             "description": "InterPrep AI Knowledge Base",
             "version": "1.0",
-            "documents_count": len(documents)
+            "documents_count": len(documents),
+            "fingerprint": knowledge_fingerprint(documents),
+            "built_at": time.time()
         }
     )
 
@@ -173,6 +191,8 @@ def create_knowledge_base():
 
         print(f"  Добавлено {min(i + batch_size, len(documents))}/{len(documents)} документов")
 
+    _invalidate_retrieval_cache()
+
     print("=" * 50)
     print(f"✅ База знаний создана успешно!")
     print(f"📊 Документов: {collection.count()}")
@@ -0,0 +1,196 @@
+# rag/numpy_index.py
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDINGS_FILE = "embeddings.npy"
+MANIFEST_FILE = "manifest.json"
+SPACES = ("l2", "cosine", "ip")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def collection_space(collection) -> str:
+    """Метрика коллекции Chroma: hnsw:space из метаданных (0.4) или конфигурации (1.x); у NumpyIndex - своя"""
+    if isinstance(collection, NumpyIndex):
+        return collection.space
+    space = (collection.metadata or {}).get("hnsw:space")
+    if space is None:
+        configuration = getattr(collection, "configuration", None) or {}
+        space = (configuration.get("hnsw") or {}).get("space")
+    space = str(space or "l2").lower()
+    if space not in SPACES:
+        raise ValueError(f"Метрика {space} не поддерживается NumPy-индексом")
+    return space
+
+
+def export_index(collection, path: Path) -> Path:
+    """
+    Выгружает коллекцию Chroma в каталог индекса
+
+    embeddings.npy - матрица float32 (читается через memory-map; для cosine
+    строки нормированы), manifest.json - id, тексты, метаданные по столбцам,
+    метрика и отпечаток коллекции.
+    Манифест пишется последним: по нему читатель понимает, что индекс целый.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    space = collection_space(collection)
+    data = collection.get(include=["embeddings", "documents", "metadatas"])
+
+    embeddings = data["embeddings"]
+    matrix = np.asarray(embeddings if embeddings is not None else [], dtype=np.float32)
+    if space == "cosine" and matrix.size:
+        matrix = _normalize(matrix)
+    metadatas = [meta or {} for meta in data["metadatas"]]
+    keys = sorted({key for meta in metadatas for key in meta})
+
+    manifest = {
+        "collection_id": str(collection.id),
+        "metadata": dict(collection.metadata or {}),
+        "space": space,
+        "count": len(data["ids"]),
+        "ids": list(data["ids"]),
+        "documents": list(data["documents"]),
+        "columns": {key: [meta.get(key) for meta in metadatas] for key in keys},
+    }
+
+    # Имена временных файлов - на процесс: два воркера могут выгружать индекс одновременно
+    suffix = f".{os.getpid()}.tmp"
+    tmp_embeddings = path / (EMBEDDINGS_FILE + suffix)
+    with open(tmp_embeddings, "wb") as f:
+        np.save(f, np.ascontiguousarray(matrix.reshape(len(metadatas), -1)))
+    tmp_manifest = path / (MANIFEST_FILE + suffix)
+    tmp_manifest.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_embeddings, path / EMBEDDINGS_FILE)
+    os.replace(tmp_manifest, path / MANIFEST_FILE)
+
+    logger.info(f"📦 NumPy-индекс базы знаний: {manifest['count']} документов в {path}")
+    return path
+
+
+class NumpyIndex:
+    """
+    Векторный индекс базы знаний в памяти процесса
+
+    Эмбеддинги - одна непрерывная матрица float32 (memory-map из .npy),
+    метаданные - по массиву на поле. Top-k - одно произведение матрицы на
+    векторы запросов и argpartition, фильтр where - булева маска.
+    Расстояния - в метрике коллекции (l2 - квадрат L2, cosine - 1 - cos,
+    ip - 1 - скалярное произведение), как их возвращает Chroma. Методы
+    query / get / count повторяют коллекцию Chroma, поэтому ретривер
+    работает с индексом без изменений. Поиск точный: для базы в сотни
+    документов перебор быстрее HNSW и SQLite.
+    """
+
+    def __init__(self, path: Path, embedding_function: Callable[[List[str]], Any]):
+        self.path = Path(path)
+        self.embedding_function = embedding_function
+
+        manifest = json.loads((self.path / MANIFEST_FILE).read_text(encoding="utf-8"))
+        self.embeddings = np.load(self.path / EMBEDDINGS_FILE, mmap_mode="r")
+        if self.embeddings.shape[0] != manifest["count"]:
+            raise ValueError(f"Индекс поврежден: {self.embeddings.shape[0]} векторов на {manifest['count']} документов")
+
+        self.id = manifest["collection_id"]
+        self.metadata = manifest["metadata"]
+        self.space = manifest["space"]
+        self.ids = manifest["ids"]
+        self.documents = manifest["documents"]
+        self.columns = {key: np.array(values, dtype=object) for key, values in manifest["columns"].items()}
+        # Квадраты норм документов для L2 считаются один раз
+        self.squared_norms = np.einsum("ij,ij->i", self.embeddings, self.embeddings) if self.space == "l2" else None
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    # ---------- фильтры ----------
+
+    def _column(self, key: str) -> np.ndarray:
+        column = self.columns.get(key)
+        return column if column is not None else np.full(self.count(), None, dtype=object)
+
+    def _mask(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Булева маска документов под фильтр в синтаксисе Chroma ($and, $or, $eq, $ne, $in, $nin)"""
+        mask = np.ones(self.count(), dtype=bool)
+        for key, condition in (where or {}).items():
+            if key == "$and":
+                for part in condition:
+                    mask &= self._mask(part)
+            elif key == "$or":
+                mask &= np.logical_or.reduce([self._mask(part) for part in condition]) if condition else False
+            elif isinstance(condition, dict):
+                column = self._column(key)
+                for op, value in condition.items():
+                    if op == "$eq":
+                        mask &= column == value
+                    elif op == "$ne":
+                        mask &= column != value
+                    elif op in ("$in", "$nin"):
+                        found = np.array([item in value for item in column], dtype=bool)
+                        mask &= found if op == "$in" else ~found
+                    else:
+                        raise ValueError(f"Оператор {op} не поддерживается NumPy-индексом")
+            else:
+                mask &= self._column(key) == condition
+        return mask
+
+    def _metadata_at(self, i: int) -> Dict[str, Any]:
+        return {key: column[i] for key, column in self.columns.items() if column[i] is not None}
+
+    # ---------- API коллекции ----------
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        embed = getattr(self.embedding_function, "embed_query", self.embedding_function)
+        vectors = np.asarray(embed(list(texts)), dtype=np.float32)
+        return _normalize(vectors) if self.space == "cosine" else vectors
+
+    def _distances(self, queries: np.ndarray) -> np.ndarray:
+        """Матрица расстояний запросы x документы в метрике коллекции"""
+        dots = queries @ self.embeddings.T
+        if self.space == "l2":
+            squared = np.einsum("ij,ij->i", queries, queries)[:, None] + self.squared_norms[None, :] - 2.0 * dots
+            return np.maximum(squared, 0.0)
+        return 1.0 - dots
+
+    def query(self, query_texts: List[str], n_results: int = 10, where: Optional[Dict] = None,
+              include: Optional[List[str]] = None, **kwargs) -> Dict[str, Any]:
+        include = include or ["metadatas", "documents", "distances"]
+        mask = self._mask(where)
+        k = min(n_results, int(mask.sum()))
+
+        # Одно произведение на все запросы; отфильтрованные документы не попадут в top-k
+        distances = self._distances(self._embed(query_texts))
+        distances[:, ~mask] = np.inf
+
+        result: Dict[str, Any] = {"ids": [], "documents": [], "metadatas": [], "distances": [], "embeddings": []}
+        for row in distances:
+            top = np.argpartition(row, k - 1)[:k] if 0 < k < len(row) else np.flatnonzero(mask)[:k]
+            top = top[np.argsort(row[top], kind="stable")]
+            result["ids"].append([self.ids[i] for i in top])
+            result["documents"].append([self.documents[i] for i in top])
+            result["metadatas"].append([self._metadata_at(i) for i in top])
+            result["distances"].append(row[top].tolist())
+            result["embeddings"].append(np.asarray(self.embeddings[top]))
+
+        return {key: value for key, value in result.items() if key == "ids" or key in include}
+
+    def get(self, include: Optional[List[str]] = None, where: Optional[Dict] = None, **kwargs) -> Dict[str, Any]:
+        include = include or ["metadatas", "documents"]
+        rows = np.flatnonzero(self._mask(where))
+        result = {
+            "ids": [self.ids[i] for i in rows],
+            "documents": [self.documents[i] for i in rows],
+            "metadatas": [self._metadata_at(i) for i in rows],
+            "embeddings": np.asarray(self.embeddings[rows]),
+        }
+        return {key: value for key, value in result.items() if key == "ids" or key in include}
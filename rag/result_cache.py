@@ -0,0 +1,67 @@
+# rag/result_cache.py
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class RetrievalCache:
+    """
+    Кэш результатов поиска по базе знаний
+
+    Записи привязаны к версии коллекции: при смене версии (база пересобрана
+    или изменена) все старые записи выбрасываются.
+    Потокобезопасен - поиск идет из пула потоков.
+    """
+
+    def __init__(self, size: int = 1024):
+        self.size = size
+        self.version: Optional[str] = None
+        self._entries: "OrderedDict[Hashable, Tuple[str, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def set_version(self, version: str):
+        """Новая версия коллекции: старые результаты больше не верны"""
+        with self._lock:
+            if version != self.version:
+                if self._entries:
+                    self.stats["invalidations"] += 1
+                self._entries.clear()
+                self.version = version
+
+    def get(self, version: str, key: Hashable) -> Optional[Tuple[str, ...]]:
+        with self._lock:
+            documents = self._entries.get(key) if version == self.version else None
+            if documents is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return documents
+
+    def set(self, version: str, key: Hashable, documents):
+        with self._lock:
+            # Результат поиска по прошлой версии (гонка с пересборкой) не сохраняем
+            if self.size <= 0 or version != self.version:
+                return
+            self._entries[key] = tuple(documents)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            if self._entries:
+                self.stats["invalidations"] += 1
+            self._entries.clear()
+            self.version = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(self.stats["hits"] / requests, 3) if requests else 0.0,
+                "entries": len(self._entries),
+                "version": self.version,
+            }
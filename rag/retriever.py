@@ -1,21 +1,47 @@
 # rag/retriever.py
+import sys
 from pathlib import Path
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Any, Optional
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
 import json
+import time
+import threading
+
+import numpy as np
 
 BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from llm.singleflight import SingleFlight
+from llm import config, deadline
+from rag.embedding_cache import CachedEmbeddingFunction, EmbeddingCache
+from rag.result_cache import RetrievalCache
+from rag.numpy_index import NumpyIndex, collection_space, export_index
 PERSIST_DIR = BASE_DIR / "chroma_db"
 COLLECTION_NAME = "interprep_knowledge"
 
 # Кэш для быстродействия
+_client = None
 _vectorstore = None
 
+# Одинаковые одновременные запросы к базе выполняются один раз
+_inflight = SingleFlight()
+
+# Эмбеддинги запросов (создается вместе с коллекцией)
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_function: Optional[CachedEmbeddingFunction] = None
+
+# Результаты поиска по текущей версии коллекции
+_results = RetrievalCache(config.RAG_RESULT_CACHE_SIZE)
+_version_lock = threading.Lock()
+_version_state: Dict[str, Any] = {"store": None, "version": None, "checked": 0.0}
+
 
 def get_vectorstore():
     """Получает векторное хранилище"""
-    global _vectorstore
+    global _client, _vectorstore
 
     if _vectorstore is None:
         if not PERSIST_DIR.exists():
@@ -30,16 +56,115 @@ def get_vectorstore():
         )
 
         try:
-            _vectorstore = client.get_collection(COLLECTION_NAME)
+            collection = client.get_collection(COLLECTION_NAME, **_embedding_kwargs())
         except:
             raise ValueError(
                 f"Коллекция '{COLLECTION_NAME}' не найдена.\n"
                 f"Запустите: python rag/ingest.py"
             )
+        _vectorstore = _open_backend(collection)
+        _client = client
 
     return _vectorstore
 
 
+def _embedding_kwargs() -> Dict[str, Any]:
+    """Функция эмбеддингов коллекции: модель по умолчанию с кэшем запросов перед ней"""
+    global _embedding_cache, _embedding_function
+    if config.RAG_EMBEDDING_CACHE_SIZE <= 0:
+        return {}
+
+    if _embedding_function is None:
+        inner = DefaultEmbeddingFunction()
+        path = config.RAG_EMBEDDING_CACHE_PATH
+        _embedding_cache = EmbeddingCache(
+            size=config.RAG_EMBEDDING_CACHE_SIZE,
+            path=Path(path) if path.lower() != "off" else None,
+            namespace=inner.name() if hasattr(inner, "name") else "default"
+        )
+        _embedding_function = CachedEmbeddingFunction(inner, _embedding_cache)
+    return {"embedding_function": _embedding_function}
+
+
+def _open_backend(collection):
+    """Коллекция Chroma или выгруженный из нее NumPy-индекс (RAG_BACKEND=numpy)"""
+    if config.RAG_BACKEND != "numpy":
+        return collection
+
+    path = Path(config.RAG_NUMPY_INDEX_DIR)
+    embedding_function = _embedding_kwargs().get("embedding_function") or DefaultEmbeddingFunction()
+    try:
+        index = NumpyIndex(path, embedding_function)
+        if _index_current(index, collection):
+            return index
+    except (OSError, ValueError, KeyError):
+        pass  # индекса нет или он поврежден - выгружаем заново
+    export_index(collection, path)
+    return NumpyIndex(path, embedding_function)
+
+
+def _index_current(index: NumpyIndex, collection) -> bool:
+    """Индекс выгружен из этой же версии коллекции"""
+    return (index.id == str(collection.id)
+            and index.space == collection_space(collection)
+            and index.metadata.get("fingerprint") == (collection.metadata or {}).get("fingerprint")
+            and index.count() == collection.count())
+
+
+def get_embedding_cache_stats() -> Dict[str, Any]:
+    """Попадания в кэш эмбеддингов запросов (пусто, пока база не открыта или кэш выключен)"""
+    return _embedding_cache.get_stats() if _embedding_cache is not None else {}
+
+
+def _current_store():
+    """
+    Коллекция и ее версия для кэша результатов: (collection, version)
+
+    Версия - id коллекции (меняется при пересборке), отпечаток содержимого
+    от ingest и число документов. Проверяется не чаще раза в
+    RAG_RESULT_CACHE_CHECK_SECONDS; при смене версии кэш результатов сбрасывается.
+    """
+    global _vectorstore
+    vs = get_vectorstore()
+    now = time.monotonic()
+    with _version_lock:
+        state = _version_state
+        if state["store"] is vs and now - state["checked"] < config.RAG_RESULT_CACHE_CHECK_SECONDS:
+            return vs, state["version"]
+
+        if _client is not None and vs is _vectorstore:
+            # Базу могли пересобрать в другом процессе - перечитываем коллекцию
+            fresh = _client.get_collection(COLLECTION_NAME, **_embedding_kwargs())
+            if str(fresh.id) != str(vs.id) or (isinstance(vs, NumpyIndex) and not _index_current(vs, fresh)):
+                _vectorstore = vs = _open_backend(fresh)
+            metadata = fresh.metadata
+        else:
+            metadata = vs.metadata
+
+        metadata = metadata or {}
+        version = f"{vs.id}:{metadata.get('fingerprint', metadata.get('version', ''))}:{vs.count()}"
+        state.update(store=vs, version=version, checked=now)
+        _results.set_version(version)
+        return vs, version
+
+
+def invalidate_cache():
+    """Сбрасывает кэш результатов (база знаний пересобрана в этом процессе)"""
+    global _vectorstore
+    with _version_lock:
+        _vectorstore = None
+        _version_state.update(store=None, version=None, checked=0.0)
+        _results.invalidate()
+
+
+def get_result_cache_stats() -> Dict[str, Any]:
+    return _results.get_stats()
+
+
+def _cache_key(query: str, k: int, where: Optional[Dict]) -> Tuple[str, int, str]:
+    return query, k, json.dumps(where or None, sort_keys=True, default=str)
+
+
 def retrieve_context(
         query: str,
         k: int = 3,
@@ -58,24 +183,197 @@ def retrieve_context(
     Returns:
         Список текстов документов
     """
+    # Бюджет запроса исчерпан - отвечаем без контекста
+    if deadline.expired():
+        return []
+
+    # Добавляем фильтр по агенту если указан (не меняя словарь вызывающего)
+    where_filter = dict(filter_by or {})
+    if agent:
+        where_filter["agent"] = agent
+
+    try:
+        vs, version = _current_store()
+        key = _cache_key(query, k, where_filter)
+        documents = _results.get(version, key)
+        if documents is None:
+            documents = _inflight.do((version,) + key, lambda: _retrieve_context(vs, query, k, where_filter))
+            _results.set(version, key, documents)
+        # Копия: результат общий для всех склеенных вызовов и кэша
+        return list(documents)
+
+    except Exception as e:
+        print(f"⚠️  Ошибка поиска в базе знаний: {e}")
+        return []
+
+
+def _retrieve_context(vs, query: str, k: int, where_filter: Dict) -> List[str]:
+    """Запрос к векторной базе (без склейки и кэша)"""
+    results = vs.query(
+        query_texts=[query],
+        n_results=k,
+        where=where_filter if where_filter else None,
+        include=["documents", "metadatas"]
+    )
+
+    if results and results['documents']:
+        return results['documents'][0]
+    return []
+
+
+def retrieve_many(
+        queries: Sequence[str],
+        k: Union[int, Sequence[int]] = 3,
+        filters: Union[None, Dict, Sequence[Optional[Dict]]] = None
+) -> List[List[str]]:
+    """
+    Несколько поисков за один проход
+
+    Эмбеддинги запросов считаются одной пачкой: на каждый различный фильтр -
+    один collection.query со всеми его запросами.
+
+    Args:
+        queries: Поисковые запросы
+        k: Количество результатов - общее или для каждого запроса
+        filters: Фильтр - общий или для каждого запроса
+
+    Returns:
+        Списки текстов документов в порядке запросов
+    """
+    results: List[List[str]] = [[] for _ in queries]
+    if not queries or deadline.expired():
+        return results
+
+    ks = [k] * len(queries) if isinstance(k, int) else list(k)
+    wheres = list(filters) if isinstance(filters, (list, tuple)) else [filters] * len(queries)
+
+    # Сначала кэш; Chroma принимает один where на запрос - промахи группируем по фильтру
+    try:
+        vs, version = _current_store()
+    except Exception as e:
+        print(f"⚠️  Ошибка поиска в базе знаний: {e}")
+        return results
+
+    groups: Dict[str, List[int]] = {}
+    for i, where in enumerate(wheres):
+        if ks[i] <= 0:
+            continue
+        cached = _results.get(version, _cache_key(queries[i], ks[i], where))
+        if cached is not None:
+            results[i] = list(cached)
+        else:
+            groups.setdefault(json.dumps(where or None, sort_keys=True, default=str), []).append(i)
+
+    for indices in groups.values():
+        try:
+            found = vs.query(
+                query_texts=[queries[i] for i in indices],
+                n_results=max(ks[i] for i in indices),
+                where=wheres[indices[0]] or None,
+                include=["documents"]
+            )
+            for i, documents in zip(indices, (found or {}).get("documents") or []):
+                results[i] = list(documents[:ks[i]])
+                _results.set(version, _cache_key(queries[i], ks[i], wheres[i]), results[i])
+        except Exception as e:
+            print(f"⚠️  Ошибка поиска в базе знаний: {e}")
+
+    return results
+
+
+def _similarity(distance: float, space: str) -> float:
+    """Сходство с запросом из расстояния Chroma (эмбеддинги нормированы)"""
+    if space == "l2":
+        return 1.0 - distance / 2.0  # квадрат L2 между единичными векторами = 2 - 2cos
+    return 1.0 - distance  # cosine и ip: distance = 1 - сходство
+
+
+def _mmr(query_scores: List[float], embeddings: Any, k: int, lambda_mult: float) -> List[int]:
+    """
+    Maximal marginal relevance: индексы k кандидатов, релевантных запросу
+    и непохожих на уже выбранные
+    """
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1.0, norms)
+    pairwise = vectors @ vectors.T
+
+    selected = [int(np.argmax(query_scores))]
+    candidates = [i for i in range(len(query_scores)) if i != selected[0]]
+    while candidates and len(selected) < k:
+        redundancy = pairwise[np.ix_(candidates, selected)].max(axis=1)
+        scores = [lambda_mult * query_scores[c] - (1 - lambda_mult) * r for c, r in zip(candidates, redundancy)]
+        selected.append(candidates.pop(int(np.argmax(scores))))
+    return selected
+
+
+def search_similar(
+        query: str,
+        k: int = 5,
+        filter_by: Optional[Dict] = None,
+        agent: Optional[str] = None,
+        min_similarity: Optional[float] = None,
+        mmr: bool = False,
+        fetch_k: Optional[int] = None,
+        lambda_mult: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Ищет похожие документы с оценкой близости
+
+    Args:
+        query: Поисковый запрос
+        k: Количество результатов
+        filter_by: Дополнительные фильтры
+        agent: Имя агента для фильтрации
+        min_similarity: Отсекать документы с меньшим сходством (по умолчанию RAG_MIN_SIMILARITY)
+        mmr: Переранжировать по MMR, чтобы не брать почти одинаковые документы
+        fetch_k: Сколько кандидатов брать для MMR (по умолчанию RAG_MMR_FETCH_K)
+        lambda_mult: Баланс релевантности и разнообразия для MMR, 1 - только релевантность
+
+    Returns:
+        Словари {"text", "metadata", "distance", "similarity"} по убыванию релевантности,
+        с mmr - в порядке отбора MMR
+    """
+    if deadline.expired() or k <= 0:
+        return []
+
+    min_similarity = config.RAG_MIN_SIMILARITY if min_similarity is None else min_similarity
+    lambda_mult = config.RAG_MMR_LAMBDA if lambda_mult is None else lambda_mult
+    n_results = max(k, fetch_k or config.RAG_MMR_FETCH_K) if mmr else k
+
     try:
         vs = get_vectorstore()
 
-        # Добавляем фильтр по агенту если указан
-        where_filter = filter_by or {}
+        where_filter = dict(filter_by or {})
         if agent:
             where_filter["agent"] = agent
 
+        include = ["documents", "metadatas", "distances"] + (["embeddings"] if mmr else [])
         results = vs.query(
             query_texts=[query],
-            n_results=k,
+            n_results=n_results,
             where=where_filter if where_filter else None,
-            include=["documents", "metadatas"]
+            include=include
         )
-
-        if results and results['documents']:
-            return results['documents'][0]
-        return []
+        if not results or not results["documents"] or not results["documents"][0]:
+            return []
+
+        space = collection_space(vs)
+        found = [
+            {"text": text, "metadata": meta or {}, "distance": distance,
+             "similarity": _similarity(distance, space)}
+            for text, meta, distance in zip(results["documents"][0], results["metadatas"][0],
+                                            results["distances"][0])
+        ]
+        keep = [i for i, item in enumerate(found) if item["similarity"] >= min_similarity]
+        if not keep:
+            return []
+
+        if mmr and len(keep) > 1:
+            embeddings = [results["embeddings"][0][i] for i in keep]
+            order = _mmr([found[i]["similarity"] for i in keep], embeddings, k, lambda_mult)
+            return [found[keep[i]] for i in order]
+        return [found[i] for i in keep[:k]]
 
     except Exception as e:
         print(f"⚠️  Ошибка поиска в базе знаний: {e}")
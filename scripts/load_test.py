@@ -0,0 +1,81 @@
+# scripts/load_test.py
+# !/usr/bin/env python3
+"""
+Нагрузочный прогон агентов на локальной подмене GigaChat (без сети и квоты).
+
+Пример:
+    FAKE_LLM_ERROR_RATE=0.05 python scripts/load_test.py --users 200 --concurrency 50
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ["LLM_BACKEND"] = "fake"
+os.environ.setdefault("LLM_CACHE_PATH", "off")
+
+from agents.assessor_agent import AssessorAgent
+from agents.interviewer_agent import InterviewerAgent
+from agents.reviewer import ReviewerAgent
+from llm.gateway import get_scheduler_stats, get_parse_stats, get_breaker_stats
+
+
+def percentile(values, share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))] if ordered else 0.0
+
+
+async def user_flow(user: int, interviewer, assessor, reviewer, latencies: dict):
+    """Сценарий одного пользователя: оценка, интервью из 3 вопросов, ревью"""
+    async def timed(name, coro):
+        start = time.monotonic()
+        result = await coro
+        latencies.setdefault(name, []).append(time.monotonic() - start)
+        return result
+
+    await timed("assess", assessor.aassess(f"Пользователь {user}: знаю Python и SQL", topics=["Python", "SQL"]))
+    session = await timed("start_interview", interviewer.astart_interview(
+        "Python", "middle", user_context={"user_id": user}, session_id=f"load-{user}"))
+    for i in range(len(session.questions)):
+        await timed("evaluate_answer", interviewer.aevaluate_answer(session.id, f"Ответ {i} пользователя {user}"))
+    await timed("end_interview", interviewer.aend_interview(session.id))
+    await timed("review", reviewer.areview(f"def f{user}(x):\n    return x * 2", language="python"))
+
+
+async def main(users: int, concurrency: int):
+    interviewer, assessor, reviewer = (InterviewerAgent(use_rag=False), AssessorAgent(use_rag=False),
+                                       ReviewerAgent(use_rag=False))
+    latencies: dict = {}
+    gate = asyncio.Semaphore(concurrency)
+
+    async def run(user: int):
+        async with gate:
+            await user_flow(user, interviewer, assessor, reviewer, latencies)
+
+    start = time.monotonic()
+    await asyncio.gather(*(run(user) for user in range(users)))
+    elapsed = time.monotonic() - start
+
+    calls = sum(len(v) for v in latencies.values())
+    print(f"\n{'=' * 60}")
+    print(f"🧪 {users} пользователей, {concurrency} одновременно: {elapsed:.1f} с, "
+          f"{calls / elapsed:.1f} вызовов агентов/с")
+    print(f"{'=' * 60}")
+    for name, values in latencies.items():
+        print(f"   {name:16} p50 {percentile(values, 0.5) * 1000:7.0f} мс   "
+              f"p95 {percentile(values, 0.95) * 1000:7.0f} мс   p99 {percentile(values, 0.99) * 1000:7.0f} мс")
+    print(f"\n🚦 Планировщик: {get_scheduler_stats()}")
+    print(f"🧩 Разбор ответов: {get_parse_stats()}")
+    print(f"🛡 Предохранители: {get_breaker_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон на локальной подмене GigaChat")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.concurrency))
@@ -3,6 +3,7 @@ import os
 import sys
 import pytest
 import asyncio
+from types import SimpleNamespace
 from unittest.mock import Mock, AsyncMock, MagicMock, patch
 from pathlib import Path
 
@@ -80,6 +81,34 @@ def mock_rag_dependencies(mock_vectorstore):
                 yield
 
 
+def _llm_response(content: str = "", **message):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content, **message))])
+
+
+@pytest.fixture
+def llm_response():
+    """Фабрика ответа GigaChat: llm_response("текст") - как результат chat/achat."""
+    return _llm_response
+
+
+@pytest.fixture
+def mock_llm():
+    """
+    Фабрика мока клиента GigaChat с настройками модели, как у настоящего.
+
+    mock_llm("текст") - chat и achat отвечают этим текстом;
+    chat=/achat= - функция или исключение вместо постоянного ответа (side_effect).
+    """
+    def make(content: str = "", model=None, chat=None, achat=None):
+        llm = Mock()
+        llm._settings = SimpleNamespace(model=model, profanity_check=None)
+        llm.chat = Mock(return_value=_llm_response(content), side_effect=chat)
+        llm.achat = AsyncMock(return_value=_llm_response(content), side_effect=achat)
+        return llm
+
+    return make
+
+
 @pytest.fixture
 def sample_questions():
     """Пример вопросов для тестов."""
@@ -0,0 +1,109 @@
+# tests/integration/test_async_agents.py
+import json
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from bot.handlers.start import process_experience
+from agents.assessor_agent import AssessorAgent
+from agents.interviewer_agent import InterviewerAgent
+from agents.planner_agent import PlannerAgent
+from agents.reviewer import ReviewerAgent
+
+
+@pytest.fixture
+def async_llm(mock_llm, llm_response):
+    """Фабрика LLM-мока: синхронный chat запрещен, achat отвечает с задержкой"""
+    def make(content: str, delay: float = 0.0):
+        async def achat(prompt):
+            await asyncio.sleep(delay)
+            return llm_response(content)
+
+        return mock_llm(chat=AssertionError("синхронный вызов из async-пути"), achat=achat)
+
+    return make
+
+
+class TestAsyncAgents:
+    """Асинхронные версии методов агентов не используют блокирующий chat."""
+
+    @pytest.mark.asyncio
+    async def test_aassess(self, async_llm):
+        agent = AssessorAgent(use_rag=False)
+        agent.llm = async_llm(json.dumps({
+            "scores": {"theory": 70, "practice": 65, "interview_readiness": 60},
+            "weak_topics": ["SQL"],
+            "follow_up": "Что дальше?",
+            "feedback": "ok"
+        }))
+
+        result = await agent.aassess("Знаю Python", topics=["Python"])
+
+        assert result.scores["theory"] == 70
+        assert result.weak_topics == ["SQL"]
+        agent.llm.achat.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_interview_flow(self, async_llm):
+        agent = InterviewerAgent(use_rag=False)
+        agent.llm = async_llm(json.dumps({
+            "questions": [
+                {"topic": "GIL", "question": "Что такое GIL?", "expected_concepts": ["потоки"],
+                 "difficulty": "easy", "hints": ["lock"]}
+            ]
+        }))
+
+        session = await agent.astart_interview("Python", session_id="s1")
+        assert session.questions[0].question == "Что такое GIL?"
+
+        agent.llm = async_llm(json.dumps({"score": 80, "comment": "хорошо",
+                                          "strong_points": ["a"], "weak_points": ["b"]}))
+        score = await agent.aevaluate_answer("s1", "Глобальная блокировка интерпретатора")
+        assert score.score == 80
+
+        summary = await agent.aend_interview("s1")
+        assert summary["completed"] == 1
+        assert "s1" not in agent.active_sessions
+
+    @pytest.mark.asyncio
+    async def test_amake_plan_falls_back_on_error(self, async_llm):
+        agent = PlannerAgent(use_rag=False)
+        agent.llm = async_llm("не JSON")
+
+        result = await agent.amake_plan("Python", weeks=2)
+
+        assert result.total_weeks == 2
+        assert len(result.plan) == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_reviews_do_not_serialize(self, async_llm):
+        agent = ReviewerAgent(use_rag=False)
+        agent.llm = async_llm(json.dumps({"summary": "ok", "issues": [], "score": 90,
+                                          "follow_up": "?", "strengths": [], "improvements": []}),
+                              delay=0.2)
+
+        start = asyncio.get_running_loop().time()
+        results = await asyncio.gather(*[agent.areview("print('hi')") for _ in range(20)])
+        elapsed = asyncio.get_running_loop().time() - start
+
+        assert all(r.score == 90 for r in results)
+        assert elapsed < 1.0
+
+    @pytest.mark.asyncio
+    async def test_experience_handler_uses_aassess(self, async_llm):
+        agent = AssessorAgent(use_rag=False)
+        agent.llm = async_llm(json.dumps({
+            "scores": {"theory": 70, "practice": 60, "interview_readiness": 55},
+            "weak_topics": ["<SQL>"],
+            "follow_up": "Что дальше?"
+        }))
+        message = Mock(text="Два года пишу на Django")
+        message.answer = AsyncMock()
+        state = AsyncMock()
+        state.get_data.return_value = {"level": "junior", "track": "backend"}
+
+        await process_experience(message, state, {"assessor": agent}, use_rag=False)
+
+        response = message.answer.await_args.args[0]
+        assert "55/100" in response and "&lt;SQL&gt;" in response
+        agent.llm.achat.assert_awaited_once()
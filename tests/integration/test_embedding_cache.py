@@ -0,0 +1,67 @@
+# tests/integration/test_embedding_cache.py
+import time
+
+import numpy as np
+import chromadb
+from chromadb.config import Settings
+
+from rag.embedding_cache import CachedEmbeddingFunction, EmbeddingCache
+
+
+class CountingEmbedding:
+    """Эмбеддинги по длине слов; считает, сколько текстов посчитано моделью"""
+
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, input):
+        self.texts.extend(input)
+        return [np.array([len(w) for w in (t.split() + [""] * 4)[:4]], dtype=np.float32) + 1 for t in input]
+
+    @staticmethod
+    def name() -> str:
+        return "counting_test"
+
+
+class TestEmbeddingCache:
+    """Повторные запросы не пересчитываются моделью эмбеддингов."""
+
+    def test_repeated_queries_hit_cache(self):
+        model = CountingEmbedding()
+        cache = EmbeddingCache(size=16)
+        embed = CachedEmbeddingFunction(model, cache)
+
+        first = embed.embed_query(["python best practices", "anti-patterns"])
+        second = embed.embed_query(["python  best practices ", "sql индексы"])
+
+        assert model.texts == ["python best practices", "anti-patterns", "sql индексы"]
+        assert np.array_equal(first[0], second[0])
+        assert cache.get_stats()["hits"] == 1
+
+    def test_lru_bounded(self):
+        cache = EmbeddingCache(size=2)
+        for text in ("a", "b", "c"):
+            cache.set(text, [1.0])
+
+        assert cache.get("a") is None
+        assert cache.get("c") is not None
+        assert cache.get_stats()["entries"] == 2
+
+    def test_persisted_between_restarts(self, tmp_path):
+        path = tmp_path / "embeddings.sqlite3"
+        EmbeddingCache(path=path, namespace="m1").set("python gil", [0.5, 0.25])
+
+        assert np.allclose(EmbeddingCache(path=path, namespace="m1").get("python gil"), [0.5, 0.25])
+        assert EmbeddingCache(path=path, namespace="m2").get("python gil") is None
+
+    def test_collection_queries_use_cache(self):
+        model = CountingEmbedding()
+        client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+        collection = client.create_collection(f"kb_test_{time.monotonic_ns()}",
+                                              embedding_function=CachedEmbeddingFunction(model, EmbeddingCache()))
+        collection.add(documents=["python gil", "sql index"], ids=["1", "2"], embeddings=[[1, 1, 1, 1], [2, 2, 2, 2]])
+
+        for _ in range(3):
+            collection.query(query_texts=["python best practices"], n_results=1)
+
+        assert model.texts == ["python best practices"]
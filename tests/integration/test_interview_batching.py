@@ -0,0 +1,73 @@
+# tests/integration/test_interview_batching.py
+import json
+import asyncio
+import pytest
+
+from llm import config
+from agents.interviewer_agent import InterviewerAgent, InterviewQuestion
+
+
+@pytest.fixture
+def make_agent(monkeypatch, mock_llm, llm_response):
+    """Фабрика интервьюера с тремя сессиями; пачка отвечает batch_reply(число элементов)"""
+    monkeypatch.setattr(config, "INTERVIEW_BATCH", True)
+    monkeypatch.setattr(config, "INTERVIEW_BATCH_WINDOW", 0.05)
+
+    def make(batch_reply):
+        agent = InterviewerAgent(use_rag=False)
+        agent.calls = []
+
+        async def achat(prompt):
+            agent.calls.append(prompt)
+            if "[1]" in prompt:
+                return llm_response(batch_reply(prompt.count("ОТВЕТ КАНДИДАТА")))
+            return llm_response(json.dumps({"score": 40, "comment": "отдельно"}))
+
+        agent.llm = mock_llm(achat=achat)
+        for user in range(3):
+            question = InterviewQuestion(topic="SQL", question=f"Вопрос пользователя {user}?",
+                                         expected_concepts=["индексы"], difficulty="easy")
+            agent._create_session(f"batch-{user}", "SQL", "middle", [question], {"level": "middle"})
+        return agent
+
+    return make
+
+
+async def answer_all(agent):
+    return await asyncio.gather(*(agent.aevaluate_answer(f"batch-{user}", f"Ответ {user}") for user in range(3)))
+
+
+class TestInterviewBatching:
+    """Ответы разных пользователей оцениваются одним вызовом LLM."""
+
+    @pytest.mark.asyncio
+    async def test_one_call_for_batch(self, make_agent):
+        agent = make_agent(lambda n: json.dumps(
+            [{"id": i, "score": 60 + i, "comment": f"оценка {i}"} for i in range(1, n + 1)]
+        ))
+
+        scores = await answer_all(agent)
+
+        assert len(agent.calls) == 1
+        assert [s.score for s in scores] == [61, 62, 63]
+        assert all(agent.active_sessions[f"batch-{u}"].current_question_index == 1 for u in range(3))
+
+    @pytest.mark.asyncio
+    async def test_missing_item_falls_back(self, make_agent):
+        agent = make_agent(lambda n: json.dumps([{"id": 1, "score": 90, "comment": "ok"},
+                                                              {"id": 2, "score": "плохо"}]))
+
+        scores = await answer_all(agent)
+
+        assert [s.score for s in scores] == [90, 40, 40]
+        assert len(agent.calls) == 3
+        assert agent.grader.get_stats()["fallbacks"] == 2
+
+    @pytest.mark.asyncio
+    async def test_broken_batch_falls_back(self, make_agent):
+        agent = make_agent(lambda n: "не JSON")
+
+        scores = await answer_all(agent)
+
+        assert [s.score for s in scores] == [40, 40, 40]
+        assert agent.grader.get_stats()["batch_failures"] == 1
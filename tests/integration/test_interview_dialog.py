@@ -0,0 +1,81 @@
+# tests/integration/test_interview_dialog.py
+import json
+import pytest
+
+from gigachat.context import session_id_cvar
+from gigachat.models import MessagesRole
+
+from llm import config
+from llm.dialog import window
+from agents.interviewer_agent import InterviewerAgent, InterviewQuestion
+
+
+@pytest.fixture
+def make_agent(mock_llm, llm_response):
+    def make():
+        agent = InterviewerAgent(use_rag=False)
+        agent.sent = []
+
+        def chat(payload):
+            agent.sent.append((payload, session_id_cvar.get()))
+            return llm_response(json.dumps({"score": 70, "comment": "норм", "strong_points": [], "weak_points": []}))
+
+        agent.llm = mock_llm(chat=chat)
+        questions = [InterviewQuestion(topic="Python", question=f"Вопрос {i}?", expected_concepts=["c"],
+                                       difficulty="easy") for i in range(3)]
+        agent._create_session("dialog-1", "Python", "junior", questions, {"level": "junior"})
+        return agent
+
+    return make
+
+
+class TestInterviewDialog:
+    """Оценка ответов интервью одним диалогом с системным промптом."""
+
+    def test_system_prompt_sent_once(self, monkeypatch, make_agent):
+        monkeypatch.setattr(config, "INTERVIEW_DIALOG", True)
+        monkeypatch.setattr(config, "INTERVIEW_DIALOG_TURNS", 2)
+        agent = make_agent()
+
+        agent.evaluate_answer("dialog-1", "Первый ответ")
+        agent.evaluate_answer("dialog-1", "Второй ответ")
+
+        payload, session = agent.sent[-1]
+        roles = [m.role for m in payload.messages]
+        assert roles == [MessagesRole.SYSTEM, MessagesRole.USER, MessagesRole.ASSISTANT, MessagesRole.USER]
+        assert "Второй ответ" in payload.messages[-1].content
+        assert "Формат" not in payload.messages[-1].content
+        assert session == "dialog-1"
+        assert session_id_cvar.get() is None
+
+    def test_sliding_window(self, monkeypatch, make_agent):
+        monkeypatch.setattr(config, "INTERVIEW_DIALOG", True)
+        monkeypatch.setattr(config, "INTERVIEW_DIALOG_TURNS", 1)
+        agent = make_agent()
+
+        for answer in ("раз", "два", "три"):
+            agent.evaluate_answer("dialog-1", answer)
+
+        payload, _ = agent.sent[-1]
+        assert len(payload.messages) == 4
+        assert "два" in payload.messages[1].content
+        assert len(agent.active_sessions["dialog-1"].dialog) == 2
+
+    def test_window_token_budget(self):
+        history = []
+        for i in range(3):
+            history += [{"role": "user", "content": "слово " * 50 + str(i)},
+                        {"role": "assistant", "content": "ok"}]
+        assert len(window(history, max_turns=3)) == 6
+        assert window(history, max_turns=3, max_tokens=150)[0]["content"].endswith("2")
+
+    def test_legacy_prompt(self, monkeypatch, make_agent):
+        monkeypatch.setattr(config, "INTERVIEW_DIALOG", False)
+        agent = make_agent()
+
+        score = agent.evaluate_answer("dialog-1", "Ответ")
+
+        payload, session = agent.sent[-1]
+        assert isinstance(payload, str)
+        assert session is None
+        assert score.score == 70
@@ -0,0 +1,72 @@
+# tests/integration/test_interview_exam.py
+import json
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from bot.handlers.interview import process_exam_answer
+from agents.interviewer_agent import InterviewerAgent, InterviewQuestion, InterviewScore
+
+
+@pytest.fixture
+def make_agent(mock_llm):
+    """Фабрика интервьюера с экзаменом из трех отвеченных вопросов; модель отвечает content"""
+    def make(content: str):
+        agent = InterviewerAgent(use_rag=False)
+        agent.llm = mock_llm(content)
+        questions = [InterviewQuestion(topic="Python", question=f"Вопрос {i}?", expected_concepts=["c"],
+                                       difficulty="easy") for i in range(3)]
+        agent._create_session("exam-1", "Python", "middle", questions, {"level": "middle"}, mode="exam")
+        for answer in ("первый", "второй", "третий"):
+            assert agent.record_answer("exam-1", answer)
+        return agent
+
+    return make
+
+
+class TestExamMode:
+    """Режим экзамена: все ответы, итог и рекомендации - одним вызовом."""
+
+    def test_single_call(self, make_agent):
+        agent = make_agent(json.dumps({
+            "scores": [{"id": i, "score": 70 + i, "comment": "ok", "weak_points": [f"тема {i}"]}
+                       for i in (1, 2, 3)],
+            "summary": "Хорошая база",
+            "recommendations": ["Повторить GIL"]
+        }))
+
+        summary = agent.grade_exam("exam-1")
+
+        assert agent.llm.chat.call_count == 1
+        assert "первый" in agent.llm.chat.call_args[0][0]
+        assert [s.score for s in summary["scores"]] == [71, 72, 73]
+        assert all(isinstance(s, InterviewScore) for s in summary["scores"])
+        assert summary["completed"] == 3
+        assert summary["average_score"] == 72.0
+        assert summary["overall"] == "Хорошая база"
+        assert summary["recommendations"] == ["Повторить GIL"]
+        assert "exam-1" not in agent.active_sessions
+
+    def test_fallback_scores(self, make_agent):
+        agent = make_agent(json.dumps({"scores": [{"id": 2, "score": 90, "comment": "отлично"}]}))
+
+        summary = agent.grade_exam("exam-1")
+
+        assert [s.score for s in summary["scores"]] == [50, 90, 50]
+        assert summary["recommendations"] == agent._default_recommendations()
+
+    def test_no_more_answers_after_last_question(self, make_agent):
+        agent = make_agent("{}")
+        assert not agent.record_answer("exam-1", "лишний")
+
+    @pytest.mark.asyncio
+    async def test_lost_session_reported(self):
+        agent = InterviewerAgent(use_rag=False)
+        message = Mock(text="ответ")
+        message.answer = AsyncMock()
+        state = AsyncMock()
+
+        await process_exam_answer(message, state, {"interviewer": agent}, "нет-такой", 0, [{}, {}])
+
+        assert "не найдена" in message.answer.await_args.args[0]
+        state.clear.assert_awaited_once()
+        state.update_data.assert_not_awaited()
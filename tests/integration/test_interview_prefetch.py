@@ -0,0 +1,76 @@
+# tests/integration/test_interview_prefetch.py
+import asyncio
+import pytest
+
+from llm import config
+from agents.interviewer_agent import InterviewerAgent, InterviewQuestion, InterviewScore
+
+
+@pytest.fixture
+def make_agent(monkeypatch, mock_llm, llm_response):
+    """Фабрика интервьюера с предзагрузкой prefetch; модель отвечает через delay секунд"""
+    def make(prefetch: set, delay: float = 0.0):
+        monkeypatch.setattr(config, "INTERVIEW_PREFETCH", prefetch)
+        agent = InterviewerAgent(use_rag=False)
+
+        async def achat(prompt):
+            await asyncio.sleep(delay)
+            return llm_response('["первое", "второе"]')
+
+        agent.llm = mock_llm(achat=achat)
+        return agent
+
+    return make
+
+
+def new_session(agent, session_id: str):
+    question = InterviewQuestion(topic="Git", question=f"Что такое rebase ({session_id})?",
+                                 expected_concepts=["история"], difficulty="easy")
+    return agent._create_session(session_id, "Git", "junior", [question], {})
+
+
+class TestInterviewPrefetch:
+    """Подсказки и рекомендации запрашиваются заранее и отдаются из памяти."""
+
+    @pytest.mark.asyncio
+    async def test_hints_ready_before_request(self, make_agent):
+        agent = make_agent({"hints"})
+        new_session(agent, "pf-1")
+        await asyncio.sleep(0.01)
+
+        assert await agent.aget_hints("pf-1") == ["первое", "второе"]
+        assert agent.llm.achat.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_request_joins_running_prefetch(self, make_agent):
+        agent = make_agent({"hints"}, delay=0.05)
+        new_session(agent, "pf-2")
+
+        assert await agent.aget_hints("pf-2") == ["первое", "второе"]
+        assert agent.llm.achat.await_count == 1
+        assert agent.prefetcher.get_stats()["joined"] == 1
+
+    @pytest.mark.asyncio
+    async def test_recommendations_after_last_score(self, make_agent):
+        agent = make_agent({"recommendations"})
+        session = new_session(agent, "pf-3")
+        agent._record_score(session, InterviewScore(score=40, comment="слабо", weak_points=["merge"]))
+        await asyncio.sleep(0.01)
+
+        summary = await agent.aend_interview("pf-3")
+
+        assert summary["recommendations"] == ["первое", "второе"]
+        assert agent.llm.achat.await_count == 1
+        assert agent.prefetcher.get_stats()["ready"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_with_session(self, make_agent):
+        agent = make_agent({"all"}, delay=1.0)
+        new_session(agent, "pf-4")
+
+        agent._close_session("pf-4")
+        await asyncio.sleep(0)
+
+        stats = agent.prefetcher.get_stats()
+        assert stats["cancelled"] == 1
+        assert stats["pending"] == 0
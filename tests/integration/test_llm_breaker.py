@@ -0,0 +1,67 @@
+# tests/integration/test_llm_breaker.py
+import time
+import pytest
+
+from agents.reviewer import ReviewerAgent
+from llm import gateway
+from llm.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+def call(breaker: CircuitBreaker, ok: bool):
+    with breaker.guard():
+        if not ok:
+            raise ConnectionError("upstream")
+
+
+class TestCircuitBreaker:
+    """После серии ошибок вызовы сразу получают fallback."""
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker("m", failure_threshold=3, open_seconds=60)
+        for _ in range(3):
+            with pytest.raises(ConnectionError):
+                call(breaker, ok=False)
+
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpen):
+            call(breaker, ok=True)
+        assert breaker.get_stats()["rejected"] == 1
+
+    def test_half_open_single_probe(self):
+        breaker = CircuitBreaker("m", failure_threshold=1, open_seconds=0.01)
+        with pytest.raises(ConnectionError):
+            call(breaker, ok=False)
+        time.sleep(0.02)
+        assert breaker.state == HALF_OPEN
+
+        with breaker.guard():
+            # Пока идет проба, остальные вызовы отклоняются
+            with pytest.raises(CircuitOpen):
+                breaker.check()
+        assert breaker.state == CLOSED
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker("m", failure_threshold=1, open_seconds=0.01)
+        with pytest.raises(ConnectionError):
+            call(breaker, ok=False)
+        time.sleep(0.02)
+
+        with pytest.raises(ConnectionError):
+            call(breaker, ok=False)
+        assert breaker.state == OPEN
+        assert breaker.get_stats()["opened"] == 2
+
+    @pytest.mark.asyncio
+    async def test_agent_serves_fallback_without_network(self, monkeypatch, mock_llm):
+        monkeypatch.setattr(gateway, "_breakers", {})
+        monkeypatch.setattr(gateway.config, "LLM_BREAKER_FAILURES", 2)
+
+        agent = ReviewerAgent(use_rag=False)
+        agent.llm = mock_llm(model="GigaChat-Breaker", chat=ConnectionError("GigaChat недоступен"),
+                             achat=ConnectionError("GigaChat недоступен"))
+        for i in range(5):
+            result = await agent.aget_quick_feedback(f"print({i})")
+            assert result == agent.QUICK_FEEDBACK_FALLBACK
+
+        assert agent.llm.achat.await_count == 2
+        assert gateway.get_breaker_stats()["GigaChat-Breaker"]["state"] == OPEN
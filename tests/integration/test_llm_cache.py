@@ -0,0 +1,64 @@
+# tests/integration/test_llm_cache.py
+import json
+import time
+import pytest
+
+from agents.interviewer_agent import InterviewerAgent
+from llm import gateway
+from llm.cache import ResponseCache, make_cache_key
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ResponseCache(tmp_path / "llm_cache.sqlite3", memory_size=2)
+    monkeypatch.setattr(gateway, "response_cache", cache)
+    return cache
+
+
+class TestResponseCache:
+    """Повторяющиеся промпты не доходят до GigaChat."""
+
+    def test_key_ignores_whitespace(self):
+        assert make_cache_key("GigaChat", "a  b\n") == make_cache_key("GigaChat", "a b")
+        assert make_cache_key("GigaChat", "a b") != make_cache_key("GigaChat-Pro", "a b")
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        path = tmp_path / "llm_cache.sqlite3"
+        ResponseCache(path).set("k", "ответ", ttl=60, agent="reviewer")
+
+        restarted = ResponseCache(path)
+        assert restarted.get("k", "reviewer") == "ответ"
+        assert restarted.get_stats()["agents"]["reviewer"]["disk_hits"] == 1
+
+    def test_ttl_and_lru_eviction(self, cache):
+        cache.set("old", "1", ttl=0.01)
+        time.sleep(0.02)
+        assert cache.get("old") is None
+
+        for key in ("a", "b", "c"):
+            cache.set(key, key, ttl=60)
+        assert list(cache._memory) == ["b", "c"]
+
+    def test_opt_in_method_is_cached(self, cache, mock_llm):
+        agent = InterviewerAgent(use_rag=False)
+        agent.llm = mock_llm(json.dumps({"questions": [{"question": "Что такое GIL?"}]}), model="GigaChat")
+
+        agent.start_interview("Python", session_id="s1")
+        agent.start_interview("Python", session_id="s2")
+
+        agent.llm.chat.assert_called_once()
+        assert cache.get_stats()["agents"]["interviewer"]["memory_hits"] == 1
+
+    def test_invalid_response_is_not_cached(self, cache, mock_llm):
+        llm = mock_llm("не JSON", model="GigaChat")
+        for _ in range(2):
+            gateway.complete(llm, "prompt", agent="planner", method="make_plan", cache=True,
+                             validate=json.loads)
+        assert llm.chat.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_opt_out_method_is_not_cached(self, cache, mock_llm):
+        llm = mock_llm("ok", model="GigaChat")
+        for _ in range(2):
+            await gateway.acomplete(llm, "prompt", agent="interviewer", method="evaluate_answer")
+        assert llm.achat.await_count == 2
@@ -0,0 +1,138 @@
+# tests/integration/test_llm_deadlines.py
+import time
+import asyncio
+import pytest
+from concurrent.futures import Future
+
+from agents.interviewer_agent import InterviewerAgent
+from llm import gateway
+from llm.deadline import DeadlineExceeded, deadline, remaining, run_rag
+from llm.hedging import LatencyTracker, _first_success
+from llm.scheduler import PriorityScheduler
+
+
+@pytest.fixture
+def slow_llm(mock_llm, llm_response):
+    """Фабрика LLM-мока: i-й вызов отвечает через delays[i] секунд"""
+    def make(*delays: float, model: str = None):
+        calls = iter(delays)
+
+        async def achat(prompt):
+            delay = next(calls)
+            await asyncio.sleep(delay)
+            return llm_response(f"ответ через {delay}")
+
+        def chat(prompt):
+            delay = next(calls)
+            time.sleep(delay)
+            return llm_response(f"ответ через {delay}")
+
+        return mock_llm(model=model, chat=chat, achat=achat)
+
+    return make
+
+
+class TestDeadlines:
+    """По истечении бюджета агент отдает fallback, а не висит."""
+
+    @pytest.mark.asyncio
+    async def test_evaluate_answer_falls_back_on_deadline(self, slow_llm):
+        agent = InterviewerAgent(use_rag=False)
+        agent.llm = slow_llm(5.0)
+        agent._create_session("s1", "Python", "middle", agent._fallback_questions("Python"), {})
+
+        start = time.monotonic()
+        score = await agent.aevaluate_answer("s1", "ответ", budget=0.1)
+
+        assert time.monotonic() - start < 1.0
+        assert score.comment == agent._evaluation_error_score().comment
+
+    def test_sync_call_respects_deadline(self, slow_llm):
+        llm = slow_llm(1.0)
+        start = time.monotonic()
+
+        with deadline(0.1), pytest.raises(DeadlineExceeded):
+            gateway.complete(llm, "prompt", agent="planner", method="make_plan")
+
+        assert time.monotonic() - start < 0.5
+
+    def test_nested_budget_cannot_extend(self):
+        with deadline(0.2):
+            with deadline(10):
+                assert remaining() <= 0.2
+
+    @pytest.mark.asyncio
+    async def test_rag_timeout_returns_default(self):
+        with deadline(0.1):
+            result = await run_rag(time.sleep, 1.0, default="")
+        assert result == ""
+
+
+class TestHedging:
+    """Запрос дольше p90 дублируется, берется первый ответ."""
+
+    @pytest.fixture(autouse=True)
+    def tracker(self, monkeypatch):
+        monkeypatch.setattr(gateway.config, "LLM_HEDGE", True)
+        tracker = LatencyTracker(min_samples=1)
+        tracker.observe("GigaChat", 0.05)
+        monkeypatch.setattr(gateway, "latency", tracker)
+        return tracker
+
+    @pytest.mark.asyncio
+    async def test_async_hedge_wins(self, slow_llm):
+        llm = slow_llm(1.0, 0.01, model="GigaChat")
+
+        start = time.monotonic()
+        content = await gateway.acomplete(llm, "hedge-async", agent="reviewer", method="review")
+
+        assert content == "ответ через 0.01"
+        assert llm.achat.call_count == 2
+        assert time.monotonic() - start < 0.5
+
+    def test_sync_hedge_wins(self, slow_llm):
+        llm = slow_llm(1.0, 0.01, model="GigaChat")
+
+        content = gateway.complete(llm, "hedge-sync", agent="reviewer", method="review")
+
+        assert content == "ответ через 0.01"
+        assert llm.chat.call_count == 2
+
+    def test_hedge_takes_own_slot(self, monkeypatch, mock_llm, llm_response):
+        scheduler = PriorityScheduler(max_concurrency=4)
+        monkeypatch.setattr(gateway, "scheduler", scheduler)
+        active = []
+
+        def chat(prompt):
+            active.append(scheduler.get_stats()["active"])
+            time.sleep(0.3 if len(active) == 1 else 0.01)
+            return llm_response("ok")
+
+        llm = mock_llm(model="GigaChat", chat=chat)
+        gateway.complete(llm, "hedge-slot", agent="reviewer", method="review")
+
+        assert active == [1, 2]
+
+    def test_abandoned_call_keeps_slot(self, monkeypatch, slow_llm):
+        scheduler = PriorityScheduler(max_concurrency=1)
+        monkeypatch.setattr(gateway, "scheduler", scheduler)
+        llm = slow_llm(0.4, model="GigaChat-abandoned")
+
+        with deadline(0.1), pytest.raises(DeadlineExceeded):
+            gateway.complete(llm, "abandoned", agent="planner", method="make_plan")
+
+        # Вызывающий ушел, но запрос в потоке еще идет и держит слот
+        assert scheduler.get_stats()["active"] == 1
+        time.sleep(0.5)
+        assert scheduler.get_stats()["active"] == 0
+
+    def test_success_wins_over_failure_in_same_batch(self):
+        failed, succeeded = Future(), Future()
+        failed.set_exception(RuntimeError("упал"))
+        succeeded.set_result("ok")
+
+        # Оба вызова завершились к одной проверке: ошибка не перекрывает ответ
+        for done in ([failed, succeeded], [succeeded, failed]):
+            assert _first_success(done, set()).result() == "ok"
+        assert _first_success([failed], {succeeded}) is None
+        assert _first_success([failed], set()) is failed
@@ -0,0 +1,55 @@
+# tests/integration/test_llm_registry.py
+from agents.assessor_agent import AssessorAgent
+from agents.interviewer_agent import InterviewerAgent
+from agents.planner_agent import PlannerAgent
+from agents.reviewer import ReviewerAgent
+from llm import config
+from llm.registry import get_gigachat, get_pool_stats
+
+
+class TestGigaChatRegistry:
+    """Все агенты используют один клиент GigaChat на модель."""
+
+    def test_agents_share_client(self):
+        agents = [AssessorAgent(use_rag=False), InterviewerAgent(use_rag=False),
+                  PlannerAgent(use_rag=False), ReviewerAgent(use_rag=False)]
+
+        assert all(agent.llm is agents[0].llm for agent in agents)
+        assert agents[0].llm is get_gigachat(config.DEFAULT_MODEL)
+
+    def test_client_per_model(self):
+        assert get_gigachat("GigaChat-Pro") is not get_gigachat("GigaChat")
+        assert get_gigachat("GigaChat-Pro") is get_gigachat("GigaChat-Pro")
+
+    def test_pool_limits(self):
+        client = get_gigachat()
+        limits = client._http_kwargs()["limits"]
+
+        assert limits.max_connections == config.MAX_CONNECTIONS
+        assert limits.keepalive_expiry == config.KEEPALIVE_EXPIRY
+
+        stats = get_pool_stats()
+        assert stats["clients"] >= 1
+        assert stats["models"][config.DEFAULT_MODEL]["open_connections"] == 0
+
+    def test_token_refresh_keeps_current_token(self, tmp_path, monkeypatch):
+        from llm import registry
+        from llm.token_cache import TokenCache
+        from gigachat.models import AccessToken
+
+        client = registry.PooledGigaChat(credentials="secret", max_keepalive_connections=1, keepalive_expiry=1,
+                                         token_cache=TokenCache(tmp_path / "token.json", 300))
+        old = AccessToken(access_token="old", expires_at=1)  # давно истек
+        new = AccessToken(access_token="new", expires_at=(2 ** 41))
+        client._access_token = old
+        seen = []
+
+        def auth_sync(*args, **kwargs):
+            seen.append(client._access_token)  # пока идет запрос, другие видят старый токен
+            return new
+
+        monkeypatch.setattr(registry.auth, "auth_sync", auth_sync)
+        client._update_token()
+
+        assert seen == [old]
+        assert client._access_token.access_token == "new"
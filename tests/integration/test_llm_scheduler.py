@@ -0,0 +1,109 @@
+# tests/integration/test_llm_scheduler.py
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from agents.planner_agent import PlannerAgent
+from llm import gateway
+from llm.scheduler import LLMOverloaded, Priority, PriorityScheduler
+
+
+class TestPriorityScheduler:
+    """Лимит одновременных вызовов, приоритеты и отбрасывание при перегрузке."""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        scheduler = PriorityScheduler(max_concurrency=2, max_queue=20)
+        running, peak = 0, 0
+
+        async def job():
+            nonlocal running, peak
+            async with scheduler.aslot():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*[job() for _ in range(8)])
+
+        assert peak == 2
+        assert scheduler.get_stats()["active"] == 0
+
+    @pytest.mark.asyncio
+    async def test_interactive_goes_first(self):
+        scheduler = PriorityScheduler(max_concurrency=1, max_queue=10)
+        order = []
+        gate = asyncio.Event()
+
+        async def job(name, priority):
+            async with scheduler.aslot(priority):
+                if name == "first":
+                    await gate.wait()
+                order.append(name)
+
+        first = asyncio.ensure_future(job("first", Priority.BATCH))
+        await asyncio.sleep(0)
+        queued = [asyncio.ensure_future(job(name, p)) for name, p in
+                  [("plan", Priority.BATCH), ("questions", Priority.QUESTIONS),
+                   ("grade", Priority.INTERACTIVE)]]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(first, *queued)
+
+        assert order == ["first", "grade", "questions", "plan"]
+
+    @pytest.mark.asyncio
+    async def test_low_priority_shed_first(self):
+        scheduler = PriorityScheduler(max_concurrency=1, max_queue=4)
+        gate = asyncio.Event()
+
+        async def hold(priority):
+            async with scheduler.aslot(priority):
+                await gate.wait()
+
+        tasks = [asyncio.ensure_future(hold(Priority.INTERACTIVE)) for _ in range(3)]
+        await asyncio.sleep(0)  # 1 в работе, 2 в очереди (половина очереди)
+
+        with pytest.raises(LLMOverloaded):
+            async with scheduler.aslot(Priority.BATCH):
+                pass
+        tasks.append(asyncio.ensure_future(hold(Priority.INTERACTIVE)))
+        await asyncio.sleep(0)
+
+        gate.set()
+        await asyncio.gather(*tasks)
+        assert scheduler.get_stats()["priorities"]["batch"]["shed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_frees_queue(self):
+        scheduler = PriorityScheduler(max_concurrency=1, max_queue=10)
+        gate = asyncio.Event()
+
+        async def hold():
+            async with scheduler.aslot():
+                await gate.wait()
+
+        holder = asyncio.ensure_future(hold())
+        waiter = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        gate.set()
+        await holder
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        stats = scheduler.get_stats()
+        assert stats["active"] == 0 and stats["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_overload_returns_agent_fallback(self, monkeypatch):
+        overloaded = PriorityScheduler(max_concurrency=0, max_queue=0)
+        monkeypatch.setattr(gateway, "scheduler", overloaded)
+
+        agent = PlannerAgent(use_rag=False)
+        agent.llm = Mock()
+        agent.llm.achat = AsyncMock()
+
+        result = await agent.amake_plan("Python", weeks=3)
+
+        agent.llm.achat.assert_not_awaited()
+        assert result.total_weeks == 3
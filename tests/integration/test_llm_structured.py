@@ -0,0 +1,66 @@
+# tests/integration/test_llm_structured.py
+import pytest
+from types import SimpleNamespace
+
+from gigachat.models import Chat
+
+from llm import config, gateway
+from agents.reviewer import REVIEW_FUNCTION, ReviewerAgent
+
+
+@pytest.fixture
+def review_llm(mock_llm, llm_response):
+    """Фабрика LLM-мока: ответ текстом или вызовом функции submit_review с arguments"""
+    def make(content: str = "", arguments=None):
+        llm = mock_llm()
+        function_call = SimpleNamespace(name="submit_review", arguments=arguments) if arguments is not None else None
+        llm.chat.return_value = llm_response(content, function_call=function_call)
+        return llm
+
+    return make
+
+
+def parse(content: str):
+    return ReviewerAgent._parse_review(ReviewerAgent.__new__(ReviewerAgent), content, False)
+
+
+REVIEW = {"summary": "Чисто", "issues": [], "score": 90, "follow_up": "Почему set?",
+          "strengths": ["Читаемо"], "improvements": []}
+
+
+class TestStructuredOutput:
+    """Режим function calling: аргументы функции вместо JSON в тексте."""
+
+    def test_schema_without_service_fields(self):
+        properties = REVIEW_FUNCTION.parameters.properties
+        assert "rag_context_used" not in properties
+        assert properties["score"].type_ == "integer"
+
+    def test_disabled_by_default(self, monkeypatch, review_llm):
+        monkeypatch.setattr(config, "LLM_STRUCTURED_OUTPUT", set())
+        llm = review_llm('{"score": 1}')
+        gateway.complete(llm, "Проверь код", agent="reviewer", method="review", function=REVIEW_FUNCTION)
+        assert llm.chat.call_args[0][0] == "Проверь код"
+
+    def test_function_arguments_returned(self, monkeypatch, review_llm):
+        monkeypatch.setattr(config, "LLM_STRUCTURED_OUTPUT", {"reviewer.review"})
+        llm = review_llm(arguments=REVIEW)
+
+        content = gateway.complete(llm, "Проверь код", agent="reviewer", method="review",
+                                   validate=parse, function=REVIEW_FUNCTION)
+
+        payload = llm.chat.call_args[0][0]
+        assert isinstance(payload, Chat)
+        assert payload.function_call == {"name": "submit_review"}
+        assert parse(content).score == 90
+        assert gateway.get_parse_stats()["reviewer"]["function"]["calls"] >= 1
+
+    def test_text_fallback_and_failures_counted(self, monkeypatch, review_llm):
+        monkeypatch.setattr(config, "LLM_STRUCTURED_OUTPUT", {"all"})
+        before = gateway.get_parse_stats().get("reviewer", {}).get("function_text", {}).get("failures", 0)
+
+        content = gateway.complete(review_llm("Код хороший, замечаний нет"), "Проверь код снова",
+                                   agent="reviewer", method="review", validate=parse, function=REVIEW_FUNCTION)
+
+        assert content == "Код хороший, замечаний нет"
+        assert gateway.get_parse_stats()["reviewer"]["function_text"]["failures"] - before == 1
@@ -0,0 +1,56 @@
+# tests/integration/test_llm_tiers.py
+import pytest
+from types import SimpleNamespace
+
+from gigachat.models import Chat
+
+from llm import config, gateway
+from llm.registry import get_gigachat
+
+
+@pytest.fixture
+def tier_llm(mock_llm, llm_response):
+    """Фабрика LLM-мока, ответ которого несет расход токенов"""
+    def make(content: str = "ok"):
+        llm = mock_llm()
+        llm.chat.return_value = llm_response(content)
+        llm.chat.return_value.usage = SimpleNamespace(prompt_tokens=40, completion_tokens=12)
+        return llm
+
+    return make
+
+
+class TestModelTiers:
+    """Короткие вызовы идут в легкую модель с лимитом длины ответа."""
+
+    def test_light_method_gets_max_tokens(self, tier_llm):
+        llm = tier_llm()
+        gateway.complete(llm, "Дай 2 подсказки", agent="interviewer", method="get_hints")
+
+        payload = llm.chat.call_args[0][0]
+        assert isinstance(payload, Chat)
+        assert payload.max_tokens == config.LLM_MAX_TOKENS["interviewer.get_hints"]
+        assert payload.messages[0].content == "Дай 2 подсказки"
+
+    def test_full_method_unchanged(self, tier_llm):
+        llm = tier_llm()
+        gateway.complete(llm, "Составь план", agent="planner", method="make_plan")
+        assert llm.chat.call_args[0][0] == "Составь план"
+
+    def test_shared_client_switched_to_light_model(self, monkeypatch):
+        monkeypatch.setitem(config.LLM_TIERS, "light", {"model": "GigaChat-Tier-Light", "max_tokens": 100})
+
+        routed, _, tier = gateway._route(get_gigachat("GigaChat-Tier-Full"), "x", "reviewer", "get_quick_feedback")
+        assert tier == "light"
+        assert routed._settings.model == "GigaChat-Tier-Light"
+
+        routed, _, tier = gateway._route(get_gigachat("GigaChat-Tier-Full"), "x", "reviewer", "review")
+        assert tier == "full"
+
+    def test_tier_stats(self, tier_llm):
+        before = gateway.get_tier_stats().get("light", {}).get("completion_tokens", 0)
+        gateway.complete(tier_llm(), "Быстрый фидбек", agent="reviewer", method="get_quick_feedback")
+
+        stats = gateway.get_tier_stats()["light"]
+        assert stats["completion_tokens"] - before == 12
+        assert stats["calls"] >= 1
@@ -0,0 +1,59 @@
+# tests/integration/test_prompt_registry.py
+import json
+from pathlib import Path
+
+import pytest
+
+from prompts.registry import PromptError, PromptRegistry, minify
+from prompts.templates import PROMPTS
+
+VERSIONS_PATH = Path(__file__).resolve().parent.parent / "fixtures" / "prompt_versions.json"
+
+
+class TestPromptRegistry:
+    """Шаблоны промптов компилируются один раз и проверяются при импорте."""
+
+    def test_minify(self):
+        text = """
+            Оцени ответ.
+
+
+            Формат:
+            {{
+              "score": int,        # 0-100
+            }}
+        """
+        assert minify(text) == 'Оцени ответ.\n\nФормат:\n{{\n  "score": int, # 0-100\n}}'
+
+    def test_placeholders_validated(self):
+        registry = PromptRegistry()
+        with pytest.raises(PromptError):
+            registry.register("t.bad", "Тема: {topic}", params=["topic", "level"])
+
+        template = registry.register("t.ok", "Тема: {topic}", params=["topic"])
+        with pytest.raises(PromptError):
+            template.format(topik="SQL")
+        assert template.format(topic="SQL") == "Тема: SQL"
+
+    def test_changed_text_needs_new_version(self):
+        registry = PromptRegistry()
+        registry.register("t.prompt", "Тема: {topic}")
+        with pytest.raises(PromptError):
+            registry.register("t.prompt", "Новая тема: {topic}")
+        assert registry.register("t.prompt", "Новая тема: {topic}", version=2).id == "t.prompt@v2"
+
+    def test_minified_is_cheaper(self):
+        for name, stats in PROMPTS.get_stats().items():
+            assert stats["tokens"] <= stats["raw_tokens"], name
+
+    def test_versions_pinned(self):
+        # Текст промпта изменился - поднимите version в prompts/templates.py
+        # и обновите tests/fixtures/prompt_versions.json
+        with open(VERSIONS_PATH, encoding="utf-8") as f:
+            pinned = json.load(f)
+
+        for name, stats in PROMPTS.get_stats().items():
+            assert name in pinned, f"{name} нет в prompt_versions.json"
+            if pinned[name]["version"] == stats["version"]:
+                assert pinned[name]["fingerprint"] == stats["fingerprint"], \
+                    f"{name}: текст изменился без смены версии"
@@ -0,0 +1,80 @@
+# tests/integration/test_question_pool.py
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from agents.question_pool import QuestionPool
+from agents.interviewer_agent import InterviewerAgent
+
+
+def question_set(n: int):
+    return [{"topic": "SQL", "question": f"Вопрос {n}.{i}?", "expected_concepts": ["индексы"],
+             "difficulty": "easy"} for i in range(3)]
+
+
+def counting_generator():
+    counter = {"calls": 0}
+
+    async def generate(topic, level, track):
+        counter["calls"] += 1
+        await asyncio.sleep(0)
+        return question_set(counter["calls"])
+
+    return generate, counter
+
+
+class TestQuestionPool:
+    """Наборы вопросов генерируются заранее и не повторяются для пользователя."""
+
+    @pytest.mark.asyncio
+    async def test_refill_and_take(self):
+        generate, counter = counting_generator()
+        pool = QuestionPool(generate, target=3, low_water=1)
+
+        await pool.refill("SQL", "Junior", "backend")
+        assert pool.available("sql", "junior", "backend") == 3
+
+        first = pool.take("SQL", "junior", "backend", user_id=1)
+        second = pool.take("SQL", "junior", "backend", user_id=1)
+        assert first != second
+        assert pool.get_stats()["hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_user_never_gets_same_set(self):
+        generate, _ = counting_generator()
+        pool = QuestionPool(generate, target=2, low_water=0)
+        await pool.refill("SQL", "junior")
+
+        assert pool.take("SQL", "junior", user_id=7) is not None
+        assert pool.take("SQL", "junior", user_id=7) is not None
+        assert pool.take("SQL", "junior", user_id=7) is None
+        assert pool.take("SQL", "junior", user_id=8) is not None
+
+    @pytest.mark.asyncio
+    async def test_low_water_triggers_background_refill(self):
+        generate, counter = counting_generator()
+        pool = QuestionPool(generate, target=2, low_water=2, max_serves=1)
+        await pool.refill("SQL", "junior")
+
+        pool.take("SQL", "junior", user_id=1)  # набор выдан max_serves раз и ушел из пула
+        assert pool.available("SQL", "junior") == 1
+        await asyncio.sleep(0.01)
+
+        assert pool.available("SQL", "junior") == 2
+        assert counter["calls"] == 3
+
+    @pytest.mark.asyncio
+    async def test_start_interview_served_from_pool(self, monkeypatch):
+        from llm import config
+        monkeypatch.setattr(config, "QUESTION_POOL", True)
+        agent = InterviewerAgent(use_rag=False)
+        agent.llm = Mock()
+        agent.llm.achat = AsyncMock(side_effect=AssertionError("вызов LLM при попадании в пул"))
+        agent.question_pool.low_water = 0
+        agent.question_pool.put("SQL", "junior", "backend", question_set(1))
+
+        session = await agent.astart_interview("SQL", "junior", session_id="pool-1",
+                                               user_context={"user_id": 5, "track": "backend"})
+
+        assert session.questions[0].question == "Вопрос 1.0?"
+        assert agent.question_pool.get_stats()["hits"] == 1
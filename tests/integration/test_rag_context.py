@@ -0,0 +1,85 @@
+# tests/integration/test_rag_context.py
+from llm import gateway
+from llm.tokens import count_tokens
+from rag.context import assemble_context
+
+
+CHUNKS = [
+    "Индекс ускоряет поиск. B-tree подходит для диапазонов. Hash только для равенства.",
+    "B-tree подходит для диапазонов. Hash только для равенства.",
+    "GIL мешает потокам в Python. Для CPU-задач используйте multiprocessing.",
+]
+
+
+class TestContextAssembly:
+    """Контекст из базы знаний укладывается в бюджет токенов."""
+
+    def test_overlapping_chunk_dropped(self):
+        context = assemble_context(CHUNKS, 200)
+
+        assert context.count("B-tree подходит для диапазонов") == 1
+        assert len(context.splitlines()) == 2
+        assert "multiprocessing" in context
+
+    def test_budget_respected(self):
+        for budget in (10, 25, 40, 200):
+            context = assemble_context(CHUNKS * 5, budget, template="Пример {i}: {chunk}")
+            assert count_tokens(context) <= budget
+
+    def test_truncated_on_sentence_boundary(self):
+        context = assemble_context(CHUNKS, 12)
+        assert context == "- Индекс ускоряет поиск."
+
+    def test_long_first_sentence_cut_by_words(self):
+        chunk = "Составной индекс " + "по нескольким колонкам таблицы " * 10 + "ускоряет выборки."
+        context = assemble_context([chunk], 20)
+
+        assert context.startswith("- Составной индекс по") and context.endswith("…")
+        assert count_tokens(context) <= 20
+
+    def test_scores_order(self):
+        context = assemble_context(CHUNKS, 30, scores=[0.1, 0.2, 0.9])
+        assert context.startswith("- GIL")
+
+    def test_shared_seen_between_sections(self):
+        seen = set()
+        assemble_context(CHUNKS[:1], 200, seen=seen)
+        assert assemble_context(CHUNKS[1:2], 200, seen=seen) == ""
+
+
+class TestPromptTokens:
+    """Размер промпта учитывается на каждый вызов."""
+
+    def test_prompt_tokens_recorded(self, mock_llm):
+        llm = mock_llm("ok")
+        prompt = "Оцени ответ кандидата про индексы"
+
+        gateway.complete(llm, prompt, agent="test", method="tokens")
+        gateway.complete(llm, prompt, agent="test", method="tokens")
+
+        stats = gateway.get_prompt_stats()["test.tokens"]
+        assert stats["calls"] == 2
+        assert stats["last"] == stats["max"] == stats["avg"] == count_tokens(prompt)
+
+
+class TestPlannerResources:
+    """Ресурсы из базы знаний доходят до промпта плана, самые близкие первыми."""
+
+    def test_resources_ranked_in_prompt(self, monkeypatch):
+        from agents import planner_agent
+
+        monkeypatch.setattr(planner_agent, "retrieve_context", lambda query, k=4: CHUNKS[:1])
+        monkeypatch.setattr(planner_agent, "search_similar", lambda query, k=5, **kwargs: [
+            {"text": "Курс по SQL для начинающих.", "similarity": 0.4},
+            {"text": "Книга Designing Data-Intensive Applications.", "similarity": 0.9},
+            {"text": "Статья без ключевых слов.", "similarity": 0.95},
+        ])
+        agent = planner_agent.PlannerAgent(use_rag=True)
+
+        rag_context = agent._get_rag_context_for_planning("SQL", "junior", "backend")
+        prompt, rag_used = agent._build_plan_prompt("SQL", "junior", "backend", 4, "", rag_context)
+
+        assert rag_used
+        assert rag_context["resources"].splitlines() == [
+            "Книга Designing Data-Intensive Applications.", "Курс по SQL для начинающих."]
+        assert rag_context["resources"] in prompt
@@ -0,0 +1,98 @@
+# tests/integration/test_rag_result_cache.py
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from llm import config
+from rag import retriever
+
+
+def make_store(documents, fingerprint="a"):
+    store = Mock()
+    store.id = "collection-1"
+    store.metadata = {"version": "1.0", "fingerprint": fingerprint}
+    store.count = Mock(return_value=len(documents))
+    store.query = Mock(side_effect=lambda query_texts, n_results, where, include: {
+        "documents": [documents[:n_results] for _ in query_texts]
+    })
+    return store
+
+
+@pytest.fixture
+def use_store(monkeypatch):
+    monkeypatch.setattr(config, "RAG_RESULT_CACHE_CHECK_SECONDS", 0.0)
+    retriever.invalidate_cache()
+    holder = {}
+    monkeypatch.setattr(retriever, "get_vectorstore", lambda: holder["store"])
+
+    def use(store):
+        holder["store"] = store
+        return store
+
+    yield use
+    retriever.invalidate_cache()
+
+
+class TestRetrievalCache:
+    """Повторный поиск по неизменной базе не идет в Chroma."""
+
+    def test_repeated_query_cached(self, use_store):
+        store = use_store(make_store(["doc1", "doc2", "doc3"]))
+
+        first = retriever.retrieve_context("Python GIL", k=2)
+        first.append("чужая правка")
+        second = retriever.retrieve_context("Python GIL", k=2)
+
+        assert second == ["doc1", "doc2"]
+        assert store.query.call_count == 1
+        retriever.retrieve_context("Python GIL", k=3)
+        retriever.retrieve_context("Python GIL", k=2, agent="reviewer")
+        assert store.query.call_count == 3
+
+    def test_shared_with_retrieve_many(self, use_store):
+        store = use_store(make_store(["doc1", "doc2"]))
+
+        retriever.retrieve_context("Python GIL", k=1)
+        results = retriever.retrieve_many(["Python GIL", "SQL"], k=1)
+
+        assert results == [["doc1"], ["doc1"]]
+        assert store.query.call_args.kwargs["query_texts"] == ["SQL"]
+
+    def test_invalidated_when_collection_changes(self, use_store):
+        store = use_store(make_store(["old"]))
+        assert retriever.retrieve_context("Python") == ["old"]
+
+        # Документ добавлен: сменилось число документов
+        store.count.return_value = 2
+        store.query.side_effect = lambda **kwargs: {"documents": [["new", "old"]]}
+        assert retriever.retrieve_context("Python") == ["new", "old"]
+
+        # Пересборка: новая коллекция с другим отпечатком
+        use_store(make_store(["rebuilt"], fingerprint="b"))
+        assert retriever.retrieve_context("Python") == ["rebuilt"]
+
+    def test_errors_not_cached(self, use_store):
+        store = use_store(make_store(["doc"]))
+        store.query.side_effect = [RuntimeError("chroma down"), {"documents": [["doc"]]}]
+
+        assert retriever.retrieve_context("Python") == []
+        assert retriever.retrieve_context("Python") == ["doc"]
+
+    def test_thread_safe(self, use_store):
+        store = use_store(make_store(["doc1", "doc2"]))
+        results = []
+
+        def worker(i):
+            for j in range(50):
+                results.append(retriever.retrieve_context(f"query {j % 5}", k=1 + i % 2))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(results) == 400
+        assert all(r in (["doc1"], ["doc1", "doc2"]) for r in results)
+        assert store.query.call_count <= 10 * 8  # каждый поток промахивается по ключу не больше раза
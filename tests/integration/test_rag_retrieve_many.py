@@ -0,0 +1,69 @@
+# tests/integration/test_rag_retrieve_many.py
+from unittest.mock import Mock
+
+from llm import config
+from llm.tokens import count_tokens
+from rag import retriever
+from agents.reviewer import ReviewerAgent
+
+
+def store_with(documents):
+    """Мок коллекции: на каждый запрос - документы с его текстом"""
+    store = Mock()
+    store.query = Mock(side_effect=lambda query_texts, n_results, where, include: {
+        "documents": [[f"{q}: {d}" for d in documents][:n_results] for q in query_texts]
+    })
+    return store
+
+
+class TestRetrieveMany:
+    """Несколько поисков - один запрос к коллекции на фильтр."""
+
+    def test_single_query_per_filter(self, monkeypatch):
+        store = store_with(["a", "b", "c"])
+        monkeypatch.setattr(retriever, "get_vectorstore", lambda: store)
+
+        results = retriever.retrieve_many(["q1", "q2", "q3"], k=[3, 1, 2])
+
+        assert store.query.call_count == 1
+        assert store.query.call_args.kwargs["query_texts"] == ["q1", "q2", "q3"]
+        assert [len(r) for r in results] == [3, 1, 2]
+        assert results[1] == ["q2: a"]
+
+    def test_grouped_by_filter(self, monkeypatch):
+        store = store_with(["a"])
+        monkeypatch.setattr(retriever, "get_vectorstore", lambda: store)
+        code = {"type": "code_example"}
+
+        results = retriever.retrieve_many(["q1", "q2", "q3"], k=1, filters=[code, None, code])
+
+        assert store.query.call_count == 2
+        assert results == [["q1: a"], ["q2: a"], ["q3: a"]]
+
+    def test_failure_gives_empty_results(self, monkeypatch):
+        store = Mock()
+        store.query = Mock(side_effect=RuntimeError("chroma down"))
+        monkeypatch.setattr(retriever, "get_vectorstore", lambda: store)
+
+        assert retriever.retrieve_many(["q1", "q2"]) == [[], []]
+
+    def test_reviewer_uses_one_query(self, monkeypatch):
+        store = store_with(["doc"])
+        monkeypatch.setattr(retriever, "get_vectorstore", lambda: store)
+
+        context = ReviewerAgent()._get_rag_context_for_review(
+            "def f():\n    for x in range(3):\n        print(x)", "python", "")
+
+        assert store.query.call_count == 1
+        assert "Лучшие практики" in context["rag_context"]
+
+    def test_reviewer_similar_solutions_within_budget(self, monkeypatch):
+        store = store_with(["решение " * 300])
+        monkeypatch.setattr(retriever, "get_vectorstore", lambda: store)
+        monkeypatch.setitem(config.RAG_TOKEN_BUDGETS, "reviewer.similar", 40)
+
+        context = ReviewerAgent()._get_rag_context_for_review(
+            "def load(path):\n    data = open(path).read()\n    return json.loads(data)", "python", "")
+
+        assert context["similar_patterns"]
+        assert count_tokens(context["similar_patterns"]) <= 40
@@ -0,0 +1,87 @@
+# tests/integration/test_singleflight.py
+import json
+import time
+import asyncio
+import threading
+import pytest
+from unittest.mock import Mock
+
+from agents.interviewer_agent import InterviewerAgent
+from llm import gateway
+from llm.cache import ResponseCache
+from llm.singleflight import SingleFlight
+import rag.retriever as retriever
+
+
+class TestSingleFlight:
+    """Одинаковые одновременные запросы выполняются один раз."""
+
+    def test_threads_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            time.sleep(0.05)
+            return "ok"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do("k", fn))) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert results == ["ok"] * 10
+
+    @pytest.mark.asyncio
+    async def test_errors_are_shared(self):
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream")
+
+        results = await asyncio.gather(*[flight.ado("k", fail) for _ in range(3)], return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert flight.stats == {"calls": 3, "shared": 2}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_interviews_share_generation(self, tmp_path, monkeypatch, mock_llm, llm_response):
+        monkeypatch.setattr(gateway, "response_cache", ResponseCache(tmp_path / "cache.sqlite3"))
+        content = json.dumps({"questions": [{"question": "Что такое GIL?"}]})
+
+        async def achat(prompt):
+            await asyncio.sleep(0.05)
+            return llm_response(content)
+
+        agent = InterviewerAgent(use_rag=False)
+        agent.llm = mock_llm(model="GigaChat", achat=achat)
+
+        sessions = await asyncio.gather(*[agent.astart_interview("Python", session_id=f"s{i}") for i in range(5)])
+
+        assert agent.llm.achat.call_count == 1
+        assert all(s.questions[0].question == "Что такое GIL?" for s in sessions)
+
+    def test_retrieve_context_coalesced(self, monkeypatch):
+        store = Mock()
+
+        def query(**kwargs):
+            time.sleep(0.05)
+            return {"documents": [["doc"]], "metadatas": [[{}]]}
+
+        store.query = Mock(side_effect=query)
+        monkeypatch.setattr(retriever, "get_vectorstore", lambda: store)
+
+        filters = {"type": "theory"}
+        threads = [threading.Thread(target=retriever.retrieve_context, args=("Python", 3, filters))
+                   for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert store.query.call_count == 1
+        assert filters == {"type": "theory"}
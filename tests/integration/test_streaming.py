@@ -0,0 +1,102 @@
+# tests/integration/test_streaming.py
+import json
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+from agents.planner_agent import PlannerAgent
+from aiogram.exceptions import TelegramNetworkError
+
+from bot.streaming import StreamingMessage, balance_html
+
+
+def chunk(text: str):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+def streaming_llm(content: str, size: int = 20, delay: float = 0.0):
+    """LLM-мок, который отдает ответ кусками по size символов"""
+    async def astream(prompt):
+        for i in range(0, len(content), size):
+            await asyncio.sleep(delay)
+            yield chunk(content[i:i + size])
+
+    llm = Mock()
+    llm.astream = astream
+    llm.achat = AsyncMock(side_effect=AssertionError("ожидался потоковый вызов"))
+    return llm
+
+
+class TestBalanceHtml:
+    """Промежуточный текст всегда корректный HTML."""
+
+    def test_closes_open_tags(self):
+        assert balance_html("<b>Неделя <i>1") == "<b>Неделя <i>1</i></b>"
+
+    def test_drops_partial_tag_and_entity(self):
+        assert balance_html("<b>План</b> <co") == "<b>План</b> "
+        assert balance_html("a &amp; b &am") == "a &amp; b "
+
+    def test_respects_length_limit(self):
+        text = balance_html("<b>" + "x" * 5000, limit=100)
+        assert len(text) <= 100
+        assert text.endswith("</b>")
+
+    def test_truncated_on_partial_tag_or_entity(self):
+        assert balance_html("<b>" + "x" * 46 + "<i>y", limit=100) == "<b>" + "x" * 46 + "…</b>"
+        assert balance_html("a" * 47 + "&amp;", limit=100) == "a" * 47 + "…"
+
+
+class TestStreamingMessage:
+    """Правки сообщения ограничены по частоте."""
+
+    @pytest.mark.asyncio
+    async def test_updates_are_throttled(self):
+        message = Mock()
+        message.edit_text = AsyncMock()
+        stream = StreamingMessage(message, min_interval=10)
+
+        for i in range(10):
+            await stream.update(f"<b>шаг {i}")
+        await stream.finish("готово")
+
+        assert message.edit_text.await_count == 2
+        assert message.edit_text.await_args_list[0].args[0] == "<b>шаг 0</b>"
+        assert message.edit_text.await_args_list[1].args[0] == "готово"
+
+    @pytest.mark.asyncio
+    async def test_network_error_does_not_break_preview(self):
+        message = Mock()
+        message.edit_text = AsyncMock(side_effect=TelegramNetworkError(method=Mock(), message="timeout"))
+        message.answer = AsyncMock()
+        stream = StreamingMessage(message, min_interval=0)
+
+        await stream.update("<b>шаг")
+        await stream.finish("готово")
+
+        message.answer.assert_awaited_once()
+        assert message.answer.await_args.args[0] == "готово"
+
+
+class TestPlannerStreaming:
+    """План показывается по неделям, пока модель его дописывает."""
+
+    @pytest.mark.asyncio
+    async def test_amake_plan_reports_progress(self):
+        content = json.dumps({
+            "plan": [{"week": 1, "title": "Основы <Python>"}, {"week": 2, "title": "ООП"}],
+            "summary": "План", "total_hours": 20, "focus_areas": ["Python"]
+        }, ensure_ascii=False)
+        agent = PlannerAgent(use_rag=False)
+        agent.llm = streaming_llm(content)
+        previews = []
+
+        async def on_progress(text):
+            previews.append(text)
+
+        result = await agent.amake_plan("Python", weeks=2, on_progress=on_progress)
+
+        assert [goal.title for goal in result.plan] == ["Основы <Python>", "ООП"]
+        assert len(previews) > 1
+        assert "Неделя 1:</b> Основы &lt;Python&gt;" in previews[-1]
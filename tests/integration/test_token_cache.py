@@ -0,0 +1,62 @@
+# tests/integration/test_token_cache.py
+import time
+import threading
+from unittest.mock import Mock
+
+from gigachat.models import AccessToken
+
+from llm.token_cache import TokenCache
+
+
+def make_token(value: str, ttl: float = 1800) -> AccessToken:
+    return AccessToken(access_token=value, expires_at=int((time.time() + ttl) * 1000))
+
+
+class TestTokenCache:
+    """Токен запрашивается один раз и переживает пересоздание кэша."""
+
+    def test_fetch_once_across_instances(self, tmp_path):
+        path = tmp_path / "token.json"
+        fetch = Mock(return_value=make_token("t1"))
+
+        first = TokenCache(path).get_or_fetch("k", fetch)
+        # Новый экземпляр - как после перезапуска или в другом процессе
+        second = TokenCache(path).get_or_fetch("k", fetch)
+
+        assert first.access_token == second.access_token == "t1"
+        fetch.assert_called_once()
+
+    def test_concurrent_callers_share_one_fetch(self, tmp_path):
+        cache = TokenCache(tmp_path / "token.json")
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            return make_token("t1")
+
+        threads = [threading.Thread(target=cache.get_or_fetch, args=("k", fetch)) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+
+    def test_refreshes_before_expiry(self, tmp_path):
+        cache = TokenCache(tmp_path / "token.json", refresh_margin=300)
+        cache.get_or_fetch("k", lambda: make_token("old", ttl=60))
+
+        token = cache.get_or_fetch("k", lambda: make_token("new"))
+
+        assert token.access_token == "new"
+
+    def test_invalidate_keeps_newer_token(self, tmp_path):
+        cache = TokenCache(tmp_path / "token.json")
+        cache.get_or_fetch("k", lambda: make_token("t2"))
+
+        cache.invalidate("k", access_token="t1")  # устаревший 401 от другого процесса
+        assert cache.load("k").access_token == "t2"
+
+        cache.invalidate("k", access_token="t2")
+        assert cache.load("k") is None
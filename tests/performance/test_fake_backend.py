@@ -0,0 +1,77 @@
+# tests/performance/test_fake_backend.py
+import time
+import asyncio
+
+import pytest
+from gigachat.exceptions import ResponseError
+from gigachat.models import Chat, Messages, MessagesRole
+
+from llm.fake import FakeGigaChat
+from llm.json_parser import extract_json
+from prompts.templates import PROMPTS
+from agents.assessor_agent import AssessorAgent
+from agents.interviewer_agent import SCORE_FUNCTION, InterviewerAgent
+from agents.planner_agent import PlannerAgent
+from agents.reviewer import ReviewerAgent
+
+
+def fake(**kwargs) -> FakeGigaChat:
+    return FakeGigaChat("GigaChat", **{"latency_ms": 0, "ms_per_token": 0, **kwargs})
+
+
+class TestFakeBackend:
+    """Локальная подмена GigaChat: валидные по схеме ответы и воспроизводимые сбои."""
+
+    def test_agents_work_unchanged(self):
+        assessor, interviewer = AssessorAgent(use_rag=False), InterviewerAgent(use_rag=False)
+        planner, reviewer = PlannerAgent(use_rag=False), ReviewerAgent(use_rag=False)
+        for agent in (assessor, interviewer, planner, reviewer):
+            agent.llm = fake()
+
+        assert set(assessor.assess("Знаю Python", topics=["Python"]).scores) == \
+            {"theory", "practice", "interview_readiness"}
+        session = interviewer.start_interview("Python", session_id="fake-1")
+        assert len(session.questions) == 3
+        assert 0 <= interviewer.evaluate_answer("fake-1", "ответ").score <= 100
+        assert len(planner.make_plan("Хочу в бэкенд", weeks=3).plan) == 3
+        assert reviewer.review("def f():\n    pass", language="python").issues
+
+    def test_deterministic(self):
+        prompt = PROMPTS.render("interviewer.hints", question="Что такое GIL?", topic="Python", level="junior")
+        first = fake(seed=1).chat(prompt).choices[0].message.content
+        assert fake(seed=1).chat(prompt).choices[0].message.content == first
+        assert extract_json(first, root="[")
+
+    def test_function_call(self):
+        prompt = PROMPTS.render("interviewer.evaluate", user_level="junior", question="Что такое GIL?",
+                                concepts="потоки", answer="блокировка")
+        chat = Chat(messages=[Messages(role=MessagesRole.USER, content=prompt)],
+                    functions=[SCORE_FUNCTION], function_call={"name": SCORE_FUNCTION.name})
+
+        message = fake().chat(chat).choices[0].message
+        assert message.function_call.name == "submit_score"
+        assert "score" in message.function_call.arguments
+
+    def test_fault_injection(self):
+        prompt = PROMPTS.render("reviewer.quick_feedback", language="python", code="x = 1")
+        with pytest.raises(ResponseError):
+            fake(error_rate=1.0).chat(prompt)
+
+        response = fake(truncate_rate=1.0).chat(prompt)
+        assert response.choices[0].finish_reason == "length"
+
+        chat = Chat(messages=[Messages(role=MessagesRole.USER, content="Составь план на 8 недель")], max_tokens=5)
+        assert fake().chat(chat).usage.completion_tokens <= 10
+
+    @pytest.mark.performance
+    def test_concurrent_latency(self):
+        llm = fake(latency_ms=20, latency_sigma=0.2)
+        prompt = PROMPTS.render("interviewer.hints", question="Что такое GIL?", topic="Python", level="junior")
+
+        async def burst():
+            await asyncio.gather(*(llm.achat(prompt) for _ in range(100)))
+
+        start = time.monotonic()
+        asyncio.run(burst())
+        assert time.monotonic() - start < 1.0
+        assert llm.stats["calls"] == 100
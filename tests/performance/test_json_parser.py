@@ -0,0 +1,101 @@
+# tests/performance/test_json_parser.py
+import re
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from llm.json_parser import extract_json, parse_model, JSONExtractError
+from agents.assessor_agent import AssessResult
+
+RESPONSES_PATH = Path(__file__).resolve().parent.parent / "fixtures" / "llm_responses.json"
+
+
+def load_responses():
+    with open(RESPONSES_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def legacy_extract(text: str) -> dict:
+    """Прежний способ агентов: срезать ```json и искать жадным регулярным выражением"""
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0].strip()
+    match = re.search(r'\{.*\}', text, re.DOTALL)
+    if match:
+        try:
+            return json.loads(match.group())
+        except ValueError:
+            pass
+    return json.loads(text)
+
+
+class TestJSONParser:
+    """Разбор записанных ответов модели"""
+
+    @pytest.mark.parametrize("case", load_responses(), ids=lambda c: c["id"])
+    def test_recorded_responses(self, case):
+        assert extract_json(case["text"]) == case["expected"]
+
+    def test_list_root(self):
+        assert extract_json('Подсказки: ["первая", "вторая",]', root="[") == ["первая", "вторая"]
+
+    def test_escaped_quote_in_single_quotes(self):
+        assert extract_json("{'a': 'it\\'s'}") == {"a": "it's"}
+
+    def test_prose_after_truncated_object(self):
+        assert extract_json('Ответ {"a": {"b": 1} дальше текст') == {"a": {"b": 1}}
+        assert extract_json('{"a": 1e5, "b": None} and more') == {"a": 1e5, "b": None}
+
+    def test_no_json(self):
+        with pytest.raises(JSONExtractError):
+            extract_json("Модель ответила текстом")
+
+    def test_parse_model(self):
+        case = next(c for c in load_responses() if c["id"] == "assess_fenced_trailing_comma")
+        result = parse_model(case["text"], AssessResult, defaults={"feedback": ""}, context_used=True)
+        assert result.scores["theory"] == 80
+        assert result.context_used is True
+
+
+class TestJSONParserBenchmark:
+    """Сравнение с прежним регулярным выражением"""
+
+    @pytest.mark.performance
+    def test_recorded_responses_recovered(self):
+        responses = load_responses()
+        legacy_ok = 0
+        for case in responses:
+            try:
+                legacy_ok += legacy_extract(case["text"]) == case["expected"]
+            except ValueError:
+                pass
+        parsed_ok = sum(extract_json(c["text"]) == c["expected"] for c in responses)
+
+        print(f"\nРазобрано: новый парсер {parsed_ok}/{len(responses)}, "
+              f"регулярное выражение {legacy_ok}/{len(responses)}")
+        assert parsed_ok == len(responses)
+        assert parsed_ok > legacy_ok
+
+    @pytest.mark.performance
+    def test_long_output_single_pass(self):
+        # Длинный оборванный ответ с множеством "{": жадный поиск перебирает
+        # каждую открывающую скобку до конца текста
+        text = "Анализ: " + "{ шаг " * 6000
+
+        start = time.perf_counter()
+        try:
+            legacy_extract(text)
+        except ValueError:
+            pass
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with pytest.raises(JSONExtractError):
+            extract_json(text)
+        parser_time = time.perf_counter() - start
+
+        print(f"\nДлинный ответ: парсер {parser_time * 1000:.1f} мс, "
+              f"регулярное выражение {legacy_time * 1000:.1f} мс")
+        assert parser_time < legacy_time
+        assert parser_time < 0.5
@@ -0,0 +1,108 @@
+# tests/performance/test_numpy_index.py
+import time
+import random
+import hashlib
+
+import numpy as np
+import pytest
+import chromadb
+from chromadb import EmbeddingFunction
+from chromadb.config import Settings
+
+from llm import config
+from rag import retriever
+from rag.numpy_index import NumpyIndex, export_index
+
+WORDS = ("python gil потоки sql индекс join docker kubernetes тест декоратор генератор "
+         "асинхронность очередь кэш транзакция api rest http git линукс").split()
+TYPES = ("interview_question", "code_example", "learning_plan")
+
+
+class WordEmbedding(EmbeddingFunction):
+    """Эмбеддинг - нормированная сумма случайных векторов слов (без загрузки ONNX модели)"""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _word(self, word: str) -> np.ndarray:
+        seed = int(hashlib.md5(word.encode()).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+
+    def __call__(self, input):
+        vectors = [sum(self._word(w) for w in text.lower().split()) for text in input]
+        return [v / np.linalg.norm(v) for v in vectors]
+
+    @staticmethod
+    def name() -> str:
+        return "word_test"
+
+
+@pytest.fixture(params=["l2", "cosine", "ip"])
+def collection(request):
+    rnd = random.Random(7)
+    client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+    name = f"kb_test_{time.monotonic_ns()}"
+    collection = client.create_collection(name, embedding_function=WordEmbedding(),
+                                          metadata={"version": "1.0", "fingerprint": "f1",
+                                                    "hnsw:space": request.param})
+    documents = [" ".join(rnd.sample(WORDS, 4)) for _ in range(400)]
+    collection.add(documents=documents, ids=[f"doc_{i}" for i in range(len(documents))],
+                   metadatas=[{"type": TYPES[i % 3], "level": "junior" if i % 2 else "middle"}
+                              for i in range(len(documents))])
+    yield collection
+    client.delete_collection(name)
+
+
+class TestNumpyIndex:
+    """Перебор по матрице эмбеддингов отвечает как Chroma."""
+
+    def test_same_results_as_chroma(self, collection, tmp_path):
+        index = NumpyIndex(export_index(collection, tmp_path), WordEmbedding())
+        where = {"type": "code_example"}
+
+        for query in ("python gil потоки", "sql индекс join", "docker тест"):
+            expected = collection.query(query_texts=[query], n_results=5, where=where)
+            found = index.query(query_texts=[query], n_results=5, where=where)
+            # Документы из одних и тех же слов равноудалены - порядок среди них не важен
+            assert np.allclose(found["distances"][0], expected["distances"][0], atol=1e-4)
+            assert found["ids"][0][0] in expected["ids"][0]
+            assert all(meta["type"] == "code_example" for meta in found["metadatas"][0])
+
+    def test_filters(self, collection, tmp_path):
+        index = NumpyIndex(export_index(collection, tmp_path), WordEmbedding())
+
+        both = index.get(where={"type": "learning_plan", "level": "junior"})
+        any_of = index.get(where={"type": {"$in": ["learning_plan", "code_example"]}})
+
+        assert both["ids"] and all(m == {"type": "learning_plan", "level": "junior"} for m in both["metadatas"])
+        assert len(any_of["ids"]) == index.count() * 2 // 3
+        assert index.query(query_texts=["python"], n_results=3, where={"type": "нет такого"})["ids"] == [[]]
+
+    def test_reexported_when_collection_changes(self, collection, tmp_path, monkeypatch):
+        monkeypatch.setattr(config, "RAG_BACKEND", "numpy")
+        monkeypatch.setattr(config, "RAG_NUMPY_INDEX_DIR", str(tmp_path))
+        monkeypatch.setattr(config, "RAG_EMBEDDING_CACHE_SIZE", 0)
+        monkeypatch.setattr(retriever, "DefaultEmbeddingFunction", WordEmbedding)
+
+        index = retriever._open_backend(collection)
+        assert isinstance(index, NumpyIndex) and index.count() == 400
+
+        collection.add(documents=["новый документ про python"], ids=["doc_new"], metadatas=[{"type": "code_example"}])
+        assert not retriever._index_current(index, collection)
+        assert retriever._open_backend(collection).count() == 401
+
+    @pytest.mark.performance
+    def test_latency_against_chroma(self, collection, tmp_path):
+        index = NumpyIndex(export_index(collection, tmp_path), WordEmbedding())
+        queries = [" ".join(random.Random(i).sample(WORDS, 3)) for i in range(100)]
+
+        def measure(store):
+            start = time.perf_counter()
+            for query in queries:
+                store.query(query_texts=[query], n_results=5, where={"type": "interview_question"})
+            return (time.perf_counter() - start) / len(queries) * 1000
+
+        chroma_ms, numpy_ms = measure(collection), measure(index)
+
+        print(f"\nChroma {chroma_ms:.3f} мс, NumPy {numpy_ms:.3f} мс на запрос")
+        assert numpy_ms < chroma_ms
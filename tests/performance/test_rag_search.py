@@ -0,0 +1,115 @@
+# tests/performance/test_rag_search.py
+import time
+import hashlib
+
+import numpy as np
+import pytest
+import chromadb
+from chromadb import EmbeddingFunction
+from chromadb.config import Settings
+
+from rag import retriever
+
+
+class HashEmbedding(EmbeddingFunction):
+    """Детерминированные эмбеддинги по словам (без загрузки ONNX модели)"""
+
+    def __init__(self, dim: int = 128):
+        self.dim = dim
+
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            vector = np.zeros(self.dim, dtype=np.float32)
+            for word in text.lower().split():
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1
+            norm = np.linalg.norm(vector)
+            vectors.append(vector / norm if norm else vector)
+        return vectors
+
+    @staticmethod
+    def name() -> str:
+        return "hash_test"
+
+
+DOCUMENTS = [
+    "python gil потоки блокировка интерпретатора",
+    "python gil потоки блокировка интерпретатора мешает",
+    "python asyncio корутины потоки",
+    "sql индекс btree диапазоны",
+    "docker контейнер образ слой",
+]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+    name = f"kb_test_{time.monotonic_ns()}"
+    collection = client.create_collection(name, embedding_function=HashEmbedding())
+    collection.add(documents=DOCUMENTS, ids=[f"doc_{i}" for i in range(len(DOCUMENTS))],
+                   metadatas=[{"type": "interview_question"} for _ in DOCUMENTS])
+    monkeypatch.setattr(retriever, "get_vectorstore", lambda: collection)
+    yield collection
+    client.delete_collection(name)
+
+
+class TestSearchSimilar:
+    """Поиск похожих документов: оценки, порог сходства и MMR."""
+
+    def test_scored_results(self, store):
+        results = retriever.search_similar("python gil потоки", k=3)
+
+        assert len(results) == 3
+        assert {"text", "metadata", "distance", "similarity"} <= set(results[0])
+        assert results[0]["metadata"]["type"] == "interview_question"
+        distances = [r["distance"] for r in results]
+        assert distances == sorted(distances)
+
+    def test_similarity_uses_collection_space(self, store, monkeypatch):
+        expected = retriever.search_similar("python gil потоки", k=3)
+
+        client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+        name = f"kb_cosine_{time.monotonic_ns()}"
+        try:
+            # Метрика только в конфигурации (chromadb 1.x), в метаданных ее нет
+            cosine = client.create_collection(name, embedding_function=HashEmbedding(),
+                                              configuration={"hnsw": {"space": "cosine"}})
+        except TypeError:
+            pytest.skip("chromadb без конфигурации коллекций")
+        cosine.add(documents=DOCUMENTS, ids=[f"doc_{i}" for i in range(len(DOCUMENTS))])
+        monkeypatch.setattr(retriever, "get_vectorstore", lambda: cosine)
+
+        found = retriever.search_similar("python gil потоки", k=3)
+        client.delete_collection(name)
+
+        assert np.allclose([r["similarity"] for r in found], [r["similarity"] for r in expected], atol=1e-4)
+
+    def test_min_similarity_drops_irrelevant(self, store):
+        results = retriever.search_similar("python gil потоки", k=5, min_similarity=0.3)
+
+        assert results and all(r["similarity"] >= 0.3 for r in results)
+        assert not any("docker" in r["text"] for r in results)
+
+    def test_mmr_skips_near_duplicate(self, store):
+        plain = [r["text"] for r in retriever.search_similar("python gil потоки блокировка", k=2)]
+        diverse = [r["text"] for r in retriever.search_similar("python gil потоки блокировка", k=2,
+                                                               mmr=True, lambda_mult=0.3)]
+
+        assert plain == DOCUMENTS[:2] or plain == DOCUMENTS[1::-1]
+        assert len(diverse) == 2 and not set(DOCUMENTS[:2]) <= set(diverse)
+
+    @pytest.mark.performance
+    def test_latency_against_retrieve_context(self, store):
+        def measure(fn, runs=50):
+            start = time.perf_counter()
+            for i in range(runs):
+                fn(f"python gil потоки {i}")
+            return (time.perf_counter() - start) / runs * 1000
+
+        plain = measure(lambda q: retriever._retrieve_context(store, q, 3, {}))
+        scored = measure(lambda q: retriever.search_similar(q, k=3))
+        diverse = measure(lambda q: retriever.search_similar(q, k=3, mmr=True))
+
+        print(f"\nretrieve_context {plain:.2f} мс, search_similar {scored:.2f} мс, с MMR {diverse:.2f} мс")
+        assert scored < plain * 3 + 5
+        assert diverse < plain * 5 + 10